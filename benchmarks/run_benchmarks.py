@@ -0,0 +1,306 @@
+"""Benchmark suite for the skyburst simulator.
+
+Runs `run_simulator` over synthetic traces (`job_gen.generate_synthetic_jobs`,
+so no Philly/Helios download is needed) for a grid of trace sizes, cluster
+sizes and scheduling policies, on both cluster backends (large clusters only
+run the NumPy backend, see `numpy_cluster_size`). Each case runs in a fresh process and reports
+wall time, events/sec (simulator timesteps per second), jobs/sec, peak RSS
+and the per-phase time breakdown of the simulator profile (see
+`skyburst.profiler.PhaseProfiler`).
+
+Usage:
+    # Run the quick suite and compare against the stored baseline.
+    python -m benchmarks.run_benchmarks
+    # Run the full suite (up to 1M jobs and 16384 nodes, takes hours). Only
+    # the quick suite has a stored baseline, full suite cases are compared
+    # against whichever baseline cases they share.
+    python -m benchmarks.run_benchmarks --suite full
+    # Record a new baseline.
+    python -m benchmarks.run_benchmarks --save_baseline benchmarks/baseline.json
+
+Exits with status 1 if a case regressed by more than `--tolerance` against
+the baseline.
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+
+import numpy as np
+from tabulate import tabulate
+
+from skyburst import JobTable, job_gen, run_simulator
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# Trace sizes (# of jobs) and cluster sizes (# of nodes) of each suite.
+# Clusters in `numpy_cluster_size` are only benchmarked with the NumPy
+# cluster backend (`ArrayCluster`), the Python backend is too slow there.
+SUITES = {
+    'quick': {
+        'total_jobs': [10000],
+        'cluster_size': [16, 256],
+        'numpy_cluster_size': [4096],
+    },
+    'full': {
+        'total_jobs': [10000, 100000, 1000000],
+        'cluster_size': [16, 256, 4096],
+        'numpy_cluster_size': [16384],
+    },
+}
+
+# Simulator settings of each benchmarked policy (on top of `BASE_SPEC`).
+POLICIES = {
+    'first-fit': {
+        'binpack_alg': 'first-fit'
+    },
+    'best-fit': {
+        'binpack_alg': 'best-fit'
+    },
+    'worst-fit': {
+        'binpack_alg': 'worst-fit'
+    },
+    'loop': {
+        'loop': True
+    },
+    'backfill': {
+        'backfill': True
+    },
+    # Star-Wait, as in `simulator_scripts/fig7.sh`.
+    'star-wait': {
+        'waiting_policy': 'linear_capacity-0.77',
+        'loop': True,
+        'max_queue_length': 30,
+        'long_job_thres': 0.25,
+        'preempt_cloud_ratio': 3,
+    },
+    # NumPy cluster backend (`ArrayCluster`).
+    'numpy-first-fit': {
+        'cluster_backend': 'numpy',
+        'binpack_alg': 'first-fit'
+    },
+    'numpy-best-fit': {
+        'cluster_backend': 'numpy',
+        'binpack_alg': 'best-fit'
+    },
+    'numpy-loop': {
+        'cluster_backend': 'numpy',
+        'loop': True
+    },
+    'numpy-backfill': {
+        'cluster_backend': 'numpy',
+        'backfill': True
+    },
+}
+
+BASE_SPEC = {
+    'gpus_per_node': 8,
+    'sched_alg': 'fifo',
+    'waiting_policy': 'linear_runtime-1.25',
+    'profile': True,
+}
+
+# Synthetic jobs request 1.8 GPUs on average and run for `JOB_RUNTIME` hours.
+JOB_RUNTIME = 1.0
+MEAN_GPUS = 1.8
+# Offered load relative to the cluster capacity, sets the arrival rate.
+LOAD = 0.9
+SEED = 2024
+
+
+def arrival_rate(cluster_size: int, gpus_per_node: int = 8) -> float:
+    """Returns the arrival rate (jobs/hour) that offers `LOAD` to the cluster."""
+    return LOAD * cluster_size * gpus_per_node / (MEAN_GPUS * JOB_RUNTIME)
+
+
+def case_name(total_jobs: int, cluster_size: int, policy: str) -> str:
+    return f'{total_jobs}jobs-{cluster_size}nodes-{policy}'
+
+
+def generate_job_table(total_jobs: int, cluster_size: int) -> JobTable:
+    return job_gen.generate_synthetic_jobs(
+        arrival_rate=arrival_rate(cluster_size),
+        job_runtime=JOB_RUNTIME,
+        total_jobs=total_jobs,
+        seed=SEED)
+
+
+def peak_rss_mb() -> float:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    if sys.platform == 'darwin':
+        peak_rss /= 1024
+    return peak_rss / 1024
+
+
+def run_case(job_table: JobTable, simulator_spec):
+    """Runs one benchmark case (in a fresh worker process)."""
+    # Keep the simulator's progress bar and summary table out of the report.
+    with contextlib.redirect_stdout(io.StringIO()), \
+        contextlib.redirect_stderr(io.StringIO()):
+        result_dict = run_simulator(job_table, simulator_spec)
+    profile = result_dict['stats']['profile']
+    wall_time = profile['total_time']
+    num_events = profile['phases']['next_time']['calls']
+    return {
+        'wall_time': wall_time,
+        'events': num_events,
+        'events_per_sec': num_events / wall_time,
+        'jobs_per_sec': len(job_table) / wall_time,
+        'peak_rss_mb': peak_rss_mb(),
+        'phases': {
+            phase: phase_stats['time']
+            for phase, phase_stats in profile['phases'].items()
+        },
+        'counters': profile['counters'],
+    }
+
+
+def is_numpy_policy(policy: str) -> bool:
+    return POLICIES[policy].get('cluster_backend') == 'numpy'
+
+
+def run_suite(suite, policies, repeat: int = 1):
+    results = {}
+    # Each case runs in its own process, so peak RSS is per case.
+    ctx = multiprocessing.get_context('spawn')
+    for total_jobs, cluster_size in itertools.product(
+            suite['total_jobs'],
+            suite['cluster_size'] + suite['numpy_cluster_size']):
+        if cluster_size in suite['numpy_cluster_size']:
+            cluster_policies = [p for p in policies if is_numpy_policy(p)]
+        else:
+            cluster_policies = policies
+        if not cluster_policies:
+            continue
+        job_table = generate_job_table(total_jobs, cluster_size)
+        for policy in cluster_policies:
+            simulator_spec = dict(BASE_SPEC,
+                                  cluster_size=cluster_size,
+                                  warmup_jobs=total_jobs // 10,
+                                  **POLICIES[policy])
+            name = case_name(total_jobs, cluster_size, policy)
+            runs = []
+            for _ in range(repeat):
+                with concurrent.futures.ProcessPoolExecutor(
+                        max_workers=1, mp_context=ctx) as executor:
+                    runs.append(
+                        executor.submit(run_case, job_table,
+                                        simulator_spec).result())
+            # The fastest run is the least disturbed by other processes.
+            results[name] = min(runs, key=lambda r: r['wall_time'])
+            print(f'{name}: {results[name]["wall_time"]:.2f}s, '
+                  f'{results[name]["events_per_sec"]:.0f} events/s, '
+                  f'{results[name]["peak_rss_mb"]:.0f} MB',
+                  flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance: float):
+    """Prints results next to the baseline, returns the names of regressed cases."""
+    headers = [
+        'Case', 'Wall Time (s)', 'Events/s', 'Baseline Events/s', 'Speedup',
+        'Peak RSS (MB)', 'Baseline RSS (MB)'
+    ]
+    data = []
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            data.append((name, result['wall_time'], result['events_per_sec'],
+                         None, None, result['peak_rss_mb'], None))
+            continue
+        speedup = result['events_per_sec'] / base['events_per_sec']
+        if speedup < 1 - tolerance or \
+            result['peak_rss_mb'] > (1 + tolerance) * base['peak_rss_mb']:
+            regressions.append(name)
+        data.append((name, result['wall_time'], result['events_per_sec'],
+                     base['events_per_sec'], speedup, result['peak_rss_mb'],
+                     base['peak_rss_mb']))
+    print(tabulate(data, headers=headers, floatfmt='.2f'))
+
+    phases = sorted({
+        phase
+        for result in results.values() for phase in result['phases']
+    })
+    data = [[name] + [result['phases'].get(phase, 0.0) for phase in phases]
+            for name, result in results.items()]
+    print('\nPer-phase time (s):')
+    print(tabulate(data, headers=['Case'] + phases, floatfmt='.3f'))
+    return regressions
+
+
+def environment_info():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the simulator over synthetic traces.')
+    parser.add_argument('--suite',
+                        type=str,
+                        default='quick',
+                        choices=list(SUITES),
+                        help='Trace and cluster sizes to benchmark.')
+    parser.add_argument('--policies',
+                        type=str,
+                        nargs='+',
+                        default=list(POLICIES),
+                        choices=list(POLICIES),
+                        help='Scheduling policies to benchmark.')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=1,
+                        help='Runs each case N times and keeps the fastest run.')
+    parser.add_argument('--baseline',
+                        type=str,
+                        default=DEFAULT_BASELINE,
+                        help='Baseline JSON to compare against.')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.25,
+        help=
+        'Relative drop in events/s (or growth in peak RSS) that counts as a regression.'
+    )
+    parser.add_argument('--save_baseline',
+                        type=str,
+                        default=None,
+                        help='Saves the results as a new baseline JSON.')
+    parser.add_argument('--output',
+                        type=str,
+                        default=None,
+                        help='Saves the results to a JSON file.')
+    args = parser.parse_args()
+
+    results = run_suite(SUITES[args.suite], args.policies, repeat=args.repeat)
+    report = {'environment': environment_info(), 'results': results}
+    for path in [args.output, args.save_baseline]:
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+    baseline = {}
+    if args.save_baseline is None and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f'\nRegressed cases (> {args.tolerance:.0%}): '
+              f'{", ".join(regressions)}')
+        sys.exit(1)
@@ -0,0 +1,239 @@
+"""Differential test of simulator engines.
+
+Runs a reference and a candidate engine (see `skyburst.differential.ENGINES`)
+side by side and checks that they make the same scheduling decisions:
+per-job start, state, deadline and GPU allocation, the order of scheduling
+events and the final stats. By default, the original per-timestep loop
+(`reference`) is checked against the simulator with the Python cluster
+backend, and the Python and NumPy cluster backends are also checked
+against each other. Cases are randomized simulator settings over
+synthetic traces and settings sampled from the sweeps in
+`simulator_scripts/*.sh`.
+
+Usage:
+    python run_differential.py
+    python run_differential.py --reference python --candidate numpy --no_backends
+    python run_differential.py --num_random 0 --scripts simulator_scripts/fig7.sh --use_traces
+
+Exits with status 1 if any case diverges.
+"""
+import argparse
+import glob
+import multiprocessing
+import random
+import shlex
+import sys
+
+from tabulate import tabulate
+
+from run_simulator_sweep import make_parser, make_run_configs
+from skyburst import JobTable, job_gen
+from skyburst.differential import ENGINES, compare_results, run_engine
+
+SWEEP_COMMAND = 'run_simulator_sweep.py'
+
+# Offered load of synthetic traces, relative to the cluster capacity
+# (synthetic jobs request 1.8 GPUs on average).
+LOAD = 0.9
+MEAN_GPUS = 1.8
+
+
+def parse_sweep_script(path: str):
+    """Returns the arguments of each `run_simulator_sweep.py` call in a shell script."""
+    with open(path, 'r') as f:
+        script = f.read().replace('\\\n', ' ')
+    calls = []
+    for line in script.splitlines():
+        tokens = shlex.split(line, comments=True)
+        if len(tokens) > 1 and tokens[0].startswith('python') and \
+            tokens[1].endswith(SWEEP_COMMAND):
+            calls.append(tokens[2:])
+    return calls
+
+
+def random_simulator_spec(rng: random.Random):
+    """Samples simulator settings for a randomized test case."""
+    waiting_policy = rng.choice([
+        'zero-1', 'constant-0.5', 'infinite-1', 'linear_runtime-1.25',
+        'linear_cost-0.076', 'linear_capacity-0.77',
+        'linear_cost_filter_cpu-0.04', 'linear_capacity_filter_cpu-0.234'
+    ])
+    mode = rng.choice(['head-of-line', 'loop', 'backfill'])
+    spec = {
+        'cluster_size': rng.choice([2, 4, 8, 16, 32]),
+        'gpus_per_node': 8,
+        'sched_alg': rng.choice(['fifo', 'lifo', 'edf', 'sjf', 'svjf', 'swf']),
+        'binpack_alg': rng.choice(['first-fit', 'best-fit', 'worst-fit']),
+        'waiting_policy': waiting_policy,
+        'loop': mode == 'loop',
+        'backfill': mode == 'backfill',
+        'max_queue_length': rng.choice([-1, -1, 10, 30]),
+        'predict_wait': rng.choice([0, 0, 1, 2]),
+        'time_estimator_error': rng.choice([0, 0, 20]),
+        'data_gravity': rng.choice([-1, -1, 0.5]),
+    }
+    if spec['backfill']:
+        # Reservations (`Cluster.try_reserve`) can fail for non-FIFO queues, backfill sweeps only use FIFO.
+        spec['sched_alg'] = 'fifo'
+    if rng.random() < 0.3:
+        # Star-Wait.
+        spec['long_job_thres'] = 0.25
+        spec['preempt_cloud_ratio'] = 3
+    return spec
+
+
+def synthetic_jobs(cluster_size: int, gpus_per_node: int, total_jobs: int,
+                   seed: int) -> JobTable:
+    arrival_rate = LOAD * cluster_size * gpus_per_node / MEAN_GPUS
+    return job_gen.generate_synthetic_jobs(arrival_rate=arrival_rate,
+                                           total_jobs=total_jobs,
+                                           seed=seed)
+
+
+def run_case(case):
+    name, simulator_spec, args = case
+    if args.use_traces:
+        jobs = job_gen.load_processed_jobs(simulator_spec['jobgen_spec'])
+    else:
+        jobs = synthetic_jobs(simulator_spec['cluster_size'],
+                              simulator_spec.get('gpus_per_node', 8),
+                              args.total_jobs, args.seed)
+        simulator_spec = dict(simulator_spec,
+                              warmup_jobs=min(
+                                  simulator_spec.get('warmup_jobs', 5000),
+                                  args.total_jobs // 10))
+    pairs = [(args.reference, args.candidate)]
+    if not args.no_backends:
+        pairs.append(('python', 'numpy'))
+    # Each engine runs once, even if it is part of several pairs.
+    results = {}
+    for engine in dict.fromkeys(e for pair in pairs for e in pair):
+        try:
+            results[engine] = (run_engine(engine, jobs, simulator_spec,
+                                          seed=args.seed), None)
+        except Exception as e:  # pylint: disable=broad-except
+            # Some settings crash the simulator (e.g. `Cluster.try_reserve`), engines must crash alike.
+            results[engine] = (None, repr(e))
+    reports = []
+    for reference, candidate in pairs:
+        reference_result, reference_error = results[reference]
+        candidate_result, candidate_error = results[candidate]
+        if reference_error is not None or candidate_error is not None:
+            report = {
+                'equivalent': reference_error == candidate_error,
+                'error':
+                f'reference: {reference_error}, candidate: {candidate_error}',
+            }
+        else:
+            report = compare_results(reference_result, candidate_result)
+        report['name'] = f'{name} ({reference} vs {candidate})'
+        report['simulator_spec'] = simulator_spec
+        reports.append(report)
+    return reports
+
+
+def make_cases(args):
+    rng = random.Random(args.seed)
+    cases = []
+    for i in range(args.num_random):
+        cases.append((f'random-{i}', random_simulator_spec(rng), args))
+    parser = make_parser()
+    for path in args.scripts:
+        run_configs = []
+        for call in parse_sweep_script(path):
+            run_configs.extend(make_run_configs(parser.parse_args(call)))
+        num_configs = min(args.configs_per_script, len(run_configs))
+        for i, run_config in enumerate(rng.sample(run_configs, num_configs)):
+            cases.append((f'{path}-{i}', run_config, args))
+    return cases
+
+
+def summarize(report):
+    if 'error' in report:
+        return report['error']
+    event_divergence = report['event_divergence']
+    if event_divergence is not None:
+        return (f'event {event_divergence["index"]}: '
+                f'{event_divergence["reference"]} != '
+                f'{event_divergence["candidate"]}')
+    if report['job_divergence'] is not None:
+        return f'job {report["job_divergence"]["idx"]}'
+    if report['stats_divergence']:
+        return f'stats {report["stats_divergence"]}'
+    return ''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Checks that simulator engines make the same decisions.')
+    parser.add_argument(
+        '--reference',
+        type=str,
+        default='reference',
+        choices=list(ENGINES),
+        help='Reference simulator engine (default: the original simulator loop).')
+    parser.add_argument('--candidate',
+                        type=str,
+                        default='python',
+                        choices=list(ENGINES),
+                        help='Candidate simulator engine.')
+    parser.add_argument(
+        '--no_backends',
+        action='store_true',
+        help=
+        'Skips the extra comparison of the Python and NumPy cluster backends.')
+    parser.add_argument('--num_random',
+                        type=int,
+                        default=50,
+                        help='# of randomized simulator settings to test.')
+    parser.add_argument('--scripts',
+                        type=str,
+                        nargs='*',
+                        default=sorted(glob.glob('simulator_scripts/*.sh')),
+                        help='Sweep scripts to sample simulator settings from.')
+    parser.add_argument('--configs_per_script',
+                        type=int,
+                        default=5,
+                        help='# of simulator settings sampled per sweep script.')
+    parser.add_argument(
+        '--use_traces',
+        action='store_true',
+        help=
+        'Runs sweep script settings over their datasets (Philly/Helios traces) instead of synthetic traces.'
+    )
+    parser.add_argument('--total_jobs',
+                        type=int,
+                        default=5000,
+                        help='# of jobs of each synthetic trace.')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=2024,
+                        help='Seed for test case sampling and job generation.')
+    parser.add_argument('--num_procs',
+                        type=int,
+                        default=1,
+                        help='# of test cases to run in parallel.')
+    args = parser.parse_args()
+
+    cases = make_cases(args)
+    with multiprocessing.Pool(processes=args.num_procs) as pool:
+        reports = [
+            report for case_reports in pool.map(run_case, cases)
+            for report in case_reports
+        ]
+
+    headers = ['Case', 'Equivalent', '# Events', '# Diverged Jobs', 'First Divergence']
+    data = [(r['name'], r['equivalent'], r.get('num_events'),
+             (r.get('job_divergence') or {}).get('num_jobs', 0), summarize(r))
+            for r in reports]
+    print(tabulate(data, headers=headers))
+    diverged = [r for r in reports if not r['equivalent']]
+    for r in diverged:
+        print(f'\n{r["name"]}: {r["simulator_spec"]}')
+        if r.get('event_divergence') is not None:
+            print('Events before the first divergent event:')
+            for event in r['event_divergence']['context']:
+                print(f'  {event}')
+    if diverged:
+        print(f'\n{len(diverged)} / {len(reports)} cases diverged.')
+        sys.exit(1)
@@ -2,30 +2,136 @@ import argparse
 import itertools
 import json
 import multiprocessing
-import pickle
 import os
+import tempfile
 
-from skyburst import job_gen, run_simulator
-from skyburst import utils
+from skyburst import JobTable, job_gen, run_simulator
+from skyburst import result_cache, utils
 from skyburst.filter_config import apply_filter_config
 
 
-def generate_data_run_simulator(run_config):
-    proc_jobs = job_gen.load_processed_jobs(
-        dataset_config=run_config['jobgen_spec'])
-    return run_simulator(proc_jobs, run_config)
+def generate_data_run_simulator(run_config,
+                                job_dir=None,
+                                cache_path=None,
+                                run_path=None):
+    if job_dir is None:
+        proc_jobs = job_gen.load_processed_jobs(
+            dataset_config=run_config['jobgen_spec'])
+    else:
+        proc_jobs = JobTable.load(job_dir)
+    result = run_simulator(proc_jobs, run_config)
+    # Saved by the worker, so finished runs survive a failed sweep.
+    if cache_path is not None:
+        utils.save_logs(cache_path, result)
+    if run_path is not None:
+        utils.save_logs(run_path, result)
+        # The parent reads the result back from `run_path`.
+        return None
+    return result
+
+
+def run_file_path(run_dir, i, run_config):
+    """Returns the result file of run `i`, named after its settings."""
+    return os.path.join(
+        run_dir, f'{i}-{result_cache.spec_digest(run_config)[:16]}.pkl')
+
 
+def publish_jobs(run_configs, root_dir):
+    """Generates the jobs of each distinct `jobgen_spec` once.
 
-def run_grid_search(run_configs, num_procs=32):
+    Each job table is saved under `root_dir` for workers to memory-map (see
+    `JobTable.load`). Returns the job directory of each run config.
+    """
+    job_dirs = {}
+    for r in run_configs:
+        key = json.dumps(r['jobgen_spec'], sort_keys=True)
+        if key not in job_dirs:
+            job_dir = os.path.join(root_dir, str(len(job_dirs)))
+            job_gen.load_processed_jobs(r['jobgen_spec']).save(job_dir)
+            job_dirs[key] = job_dir
+    return [
+        job_dirs[json.dumps(r['jobgen_spec'], sort_keys=True)]
+        for r in run_configs
+    ]
+
+
+def run_grid_search(run_configs,
+                    num_procs=32,
+                    cache_dir=None,
+                    run_dir=None,
+                    resume=False):
+    """Runs the simulator over all run configs.
+
+    With `cache_dir`, results are cached (see `result_cache.ResultCache`)
+    and only runs missing from the cache are simulated. With `run_dir`,
+    each run's result is written to its own file (see `run_file_path`) as
+    soon as it finishes, instead of being held in memory until the sweep
+    ends; with `resume`, runs that already have a result file are skipped.
+    """
     for i, r in enumerate(run_configs):
         r['pbar_idx'] = i
-    run_configs = [[r] for r in run_configs]
-    with multiprocessing.Pool(processes=num_procs) as pool:
-        results = pool.starmap(generate_data_run_simulator, run_configs)
+    results = [None] * len(run_configs)
+    run_paths = [None] * len(run_configs)
+    if run_dir is not None:
+        run_paths = [
+            run_file_path(run_dir, i, r) for i, r in enumerate(run_configs)
+        ]
+    # Runs whose results are already in memory or in their result file.
+    done = [
+        resume and run_path is not None and os.path.exists(run_path)
+        for run_path in run_paths
+    ]
+    if resume:
+        print(f'Resuming sweep: {sum(done)} of {len(run_configs)} runs '
+              'already finished.')
+    cache_paths = [None] * len(run_configs)
+    with tempfile.TemporaryDirectory(prefix='skyburst-jobs-') as root_dir:
+        pending = [i for i, d in enumerate(done) if not d]
+        job_dirs = [None] * len(run_configs)
+        for i, job_dir in zip(
+                pending,
+                publish_jobs([run_configs[i] for i in pending], root_dir)):
+            job_dirs[i] = job_dir
+        if cache_dir is not None:
+            cache = result_cache.ResultCache(cache_dir)
+            jobs_digests = {
+                job_dir: JobTable.load(job_dir).digest()
+                for job_dir in set(job_dirs) if job_dir is not None
+            }
+            num_hits = 0
+            for i, r in enumerate(run_configs):
+                if done[i] or not result_cache.is_cacheable(r):
+                    continue
+                key = cache.key(r, jobs_digests[job_dirs[i]])
+                result = cache.get(key, r)
+                cache_paths[i] = cache.path(key)
+                if result is None:
+                    continue
+                num_hits += 1
+                done[i] = True
+                if run_paths[i] is None:
+                    results[i] = result
+                else:
+                    utils.save_logs(run_paths[i], result)
+            print(f'Result cache: {num_hits} cached, '
+                  f'{len(done) - sum(done)} to simulate.')
+        missing = [i for i, d in enumerate(done) if not d]
+        simulated = []
+        if missing:
+            with multiprocessing.Pool(processes=num_procs) as pool:
+                simulated = pool.starmap(
+                    generate_data_run_simulator,
+                    [(run_configs[i], job_dirs[i], cache_paths[i],
+                      run_paths[i]) for i in missing])
+    for i, result in zip(missing, simulated):
+        results[i] = result
+    for i, run_path in enumerate(run_paths):
+        if run_path is not None:
+            results[i] = utils.load_logs(run_path)
     return results
 
 
-if __name__ == '__main__':
+def make_parser():
     parser = argparse.ArgumentParser(
         description=
         'Run a hyperparameter sweep over diff. values in a hybrid cloud simulator.'
@@ -87,6 +193,12 @@ if __name__ == '__main__':
                         default='first-fit',
                         choices=['first-fit', 'best-fit', 'worst-fit'],
                         help='Binpacking algorithm for the cluster.')
+    parser.add_argument(
+        '--cluster_backend',
+        type=str,
+        default='python',
+        choices=['python', 'numpy'],
+        help='Cluster state backend (`numpy` is faster for large clusters).')
     parser.add_argument(
         '--waiting_policy',
         type=str,
@@ -176,6 +288,63 @@ if __name__ == '__main__':
         type=str,
         default=None,
         help='Specifies where to save the simulator sweep results.')
+    parser.add_argument(
+        '--result_dir',
+        type=str,
+        default=None,
+        help=
+        'Streams per-job results of each run to <result_dir>/<run index>.parquet (requires pyarrow), the sweep log then only keeps stats.'
+    )
+    parser.add_argument(
+        '--run_dir',
+        type=str,
+        default=None,
+        help=
+        'Saves the result of each run to <run_dir>/<run index>-<settings hash>.pkl as soon as it finishes, so a crashed sweep can be rerun with --resume.'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=
+        'Skips runs that already have a result file in the run directory (e.g. from a sweep that crashed).'
+    )
+    parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=None,
+        help=
+        'Caches the result of each run under <cache_dir>, keyed by its settings, jobs and the simulator code version. Runs already cached are not simulated again.'
+    )
+    parser.add_argument(
+        '--checkpoint_dir',
+        type=str,
+        default=None,
+        help=
+        'Checkpoints each run to <checkpoint_dir>/<run index>.ckpt, rerunning the sweep resumes unfinished runs from their checkpoints.'
+    )
+    parser.add_argument(
+        '--checkpoint_interval',
+        type=float,
+        default=0,
+        help='Checkpoints at most once every N hours of simulated time.')
+    parser.add_argument(
+        '--checkpoint_events',
+        type=int,
+        default=0,
+        help='Checkpoints at most once every N simulator timesteps.')
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help=
+        'Records time per simulator phase and fit/heap counters into the stats of each run.'
+    )
+    parser.add_argument(
+        '--profile_dir',
+        type=str,
+        default=None,
+        help=
+        'With --profile, dumps cProfile stats of each run to <profile_dir>/<run index>.prof.'
+    )
 
     parser.add_argument(
         '--snapshot',
@@ -185,8 +354,18 @@ if __name__ == '__main__':
         help=
         'Specifies whether to save queue state at the end of each iteration. (This is used for underutilization analysis.)'
     )
+    parser.add_argument(
+        '--snapshot_interval',
+        type=float,
+        default=0,
+        help=
+        'Saves queue state at most once every N hours of simulated time (0 saves every iteration).'
+    )
+    return parser
 
-    args = parser.parse_args()
+
+def make_run_configs(args):
+    """Expands parsed sweep arguments into one simulator spec per run."""
     grid_search_config = {
         # Cluster config
         'cluster_size': args.cluster_size,
@@ -195,6 +374,7 @@ if __name__ == '__main__':
         # Policy config
         'sched_alg': args.sched_alg,
         'binpack_alg': args.binpack_alg,
+        'cluster_backend': args.cluster_backend,
         'waiting_policy': args.waiting_policy,
         'backfill': args.backfill,
         'loop': args.loop,
@@ -208,6 +388,8 @@ if __name__ == '__main__':
         'debug': args.debug,
         'warmup_jobs': args.warmup_jobs,
         'snapshot': args.snapshot,
+        'snapshot_interval': args.snapshot_interval,
+        'profile': args.profile,
         'max_queue_length': args.max_queue_length,
         'time_estimator_error': args.time_estimator_error,
         'jobgen_spec': {
@@ -222,16 +404,30 @@ if __name__ == '__main__':
     grid_search_config = utils.convert_to_lists(grid_search_config)
     run_configs = utils.generate_cartesian_product(grid_search_config)
     run_configs = apply_filter_config(args.filter_name, run_configs)
+    if args.result_dir:
+        for i, r in enumerate(run_configs):
+            r['result_path'] = os.path.join(args.result_dir, f'{i}.parquet')
+    if args.profile_dir:
+        for i, r in enumerate(run_configs):
+            r['profile_path'] = os.path.join(args.profile_dir, f'{i}.prof')
+    if args.checkpoint_dir:
+        for i, r in enumerate(run_configs):
+            r['checkpoint_path'] = os.path.join(args.checkpoint_dir,
+                                                f'{i}.ckpt')
+            r['checkpoint_interval'] = args.checkpoint_interval
+            r['checkpoint_events'] = args.checkpoint_events
+    return run_configs
 
-    final_simulator_results = run_grid_search(run_configs)
-    if args.log:
-        file_path = args.log
-    else:
-        file_path = None
+
+if __name__ == '__main__':
+    parser = make_parser()
+    args = parser.parse_args()
+    if args.resume and args.run_dir is None:
+        parser.error('--resume requires --run_dir.')
+    run_configs = make_run_configs(args)
+    final_simulator_results = run_grid_search(run_configs,
+                                              cache_dir=args.cache_dir,
+                                              run_dir=args.run_dir,
+                                              resume=args.resume)
     if args.log:
-        absolute_file_path = os.path.abspath(file_path)
-        dir_path = os.path.dirname(absolute_file_path)
-        os.system(f'mkdir -p {dir_path}')
-        file = open(absolute_file_path, 'wb')
-        pickle.dump(final_simulator_results, file)
-        file.close()
+        utils.save_logs(args.log, final_simulator_results)
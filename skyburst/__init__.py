@@ -1,8 +1,10 @@
 """ Starburst Package """
 import os
 
+from skyburst.array_cluster import ArrayCluster
 from skyburst.cluster import Cluster
 from skyburst.job import Job
+from skyburst.job_table import JobTable
 import skyburst.job_generator as job_gen
 from skyburst.node import Node
 from skyburst.simulator import run_simulator
@@ -0,0 +1,240 @@
+import heapq
+
+import numpy as np
+
+from skyburst import utils
+
+
+class ArrayCluster(object):
+    """Cluster backed by NumPy arrays instead of a list of `Node` objects.
+
+    Makes the same scheduling decisions as `Cluster`, but stores free GPUs,
+    free CPUs and GPU reservations as arrays and runs first-fit, best-fit and
+    worst-fit as vectorized masks with argmax/argmin. Meant for large
+    clusters (thousands of nodes), where per-node Python loops dominate.
+    """
+    def __init__(self,
+                 num_nodes,
+                 num_gpus_per_node=8,
+                 num_cpus_per_node=96,
+                 binpack='first-fit',
+                 backfill=False):
+        self.num_nodes = num_nodes
+        self.num_gpus_per_node = num_gpus_per_node
+        self.num_cpus_per_node = num_cpus_per_node
+        # Whether a GPU is not occupied by an active job, shape (num_nodes, num_gpus_per_node).
+        self.free_gpus = np.ones((num_nodes, num_gpus_per_node), dtype=bool)
+        # Free CPUs per node, shape (num_nodes,).
+        self.free_cpus = np.full(num_nodes,
+                                 num_cpus_per_node,
+                                 dtype=np.float64)
+        # Start time of the reserved job holding a GPU (inf if unreserved).
+        self.reserved_start = np.full((num_nodes, num_gpus_per_node),
+                                      np.inf)
+        # Maps Job ID to Job, active jobs running in the cluster
+        self.active_jobs = {}
+        # Maps Job ID to Job, reserved jobs to be scheduled in cluster
+        self.reserved_jobs = {}
+        # Min-heap of (end time, push order, job) over active jobs.
+        self.completion_heap = []
+        # Maps Job ID of a blocking job to (push order, job) of jobs reserved behind it.
+        self.blocked_reserved_jobs = {}
+        # Push order of the next completion heap or reservation entry.
+        self._counter = 0
+        # This determines whether to binpack with backfill scheduling.
+        self.backfill = backfill
+        # Defines the bin packing algorithm, `first-fit`, `best-fit`.
+        self.binpack = binpack
+        if binpack not in ['first-fit', 'best-fit', 'worst-fit', 'tetris']:
+            raise ValueError(f'Invalid allocation strategy {self.binpack}!')
+
+    def is_full(self):
+        return not self.free_gpus.any()
+
+    def get_active_jobs(self):
+        return self.active_jobs
+
+    @property
+    def total_free_gpus(self):
+        """Total free GPU(s) in the cluster."""
+        return int(self.free_gpus.sum())
+
+    @property
+    def total_free_cpus(self):
+        """Total free CPU(s) in the cluster."""
+        return self.free_cpus.sum()
+
+    def _gpu_demands(self, num_gpus, nodes):
+        """Splits a job's GPUs into per-node demands (see `Cluster.try_fit_v2`)."""
+        if nodes == 1:
+            if num_gpus > self.num_gpus_per_node:
+                # Assume worst case colocation
+                # Multinode case, i.e. 26 GPUs, 8 GPU/node cluster -> job_gpu_demands = [8,8,8,2]
+                job_gpu_demands = [self.num_gpus_per_node] * int(
+                    num_gpus / self.num_gpus_per_node)
+                if num_gpus % self.num_gpus_per_node:
+                    job_gpu_demands.append(num_gpus % self.num_gpus_per_node)
+            else:
+                job_gpu_demands = [num_gpus]
+        else:
+            job_gpu_demands = [int(num_gpus / nodes)] * nodes
+        return job_gpu_demands
+
+    def try_fit_v2(self, cur_timestamp, job):
+        num_gpus = job.resources['GPUs']
+        num_cpus = job.resources['CPUs']
+        num_cpus_per_node = num_cpus / job.nodes
+
+        node_free_gpus = self.free_gpus
+        node_free_cpus = self.free_cpus
+        node_free_gpu_count = node_free_gpus.sum(axis=1)
+        # Quick check, no hope of fitting onto cluster :(
+        if num_gpus > node_free_gpu_count.sum() or num_cpus > node_free_cpus.sum():
+            return False, []
+
+        job_gpu_demands = self._gpu_demands(num_gpus, job.nodes)
+
+        # Remove GPUs (and CPUs) held by reserved jobs that start before this job would finish.
+        if self.reserved_jobs:
+            end_timestamp = cur_timestamp + job.runtime
+            node_free_gpus = node_free_gpus & (self.reserved_start >=
+                                               end_timestamp)
+            node_free_gpu_count = node_free_gpus.sum(axis=1)
+            node_free_cpus = node_free_cpus.copy()
+            for r_job in self.reserved_jobs.values():
+                if r_job.start < end_timestamp:
+                    # Matches `Cluster._plan_with_reservations`, which charges CPUs to the last reserved node.
+                    n_idx = r_job.allocated_gpu_masks[-1][0]
+                    node_free_cpus[n_idx] -= r_job.num_cpus / r_job.nodes
+
+        # Maps node idx to list of gpu indexes for the job to take.
+        node_idx_taken = {}
+        node_taken = np.zeros(self.num_nodes, dtype=bool)
+        cpu_fits = node_free_cpus >= num_cpus_per_node
+        for gpu_demand in job_gpu_demands:
+            can_fit = (node_free_gpu_count >= gpu_demand) & cpu_fits & ~node_taken
+            if not can_fit.any():
+                return False, []
+            if self.binpack == 'best-fit':
+                # Node with the least free GPU(s).
+                n_idx = np.argmin(
+                    np.where(can_fit, node_free_gpu_count,
+                             self.num_gpus_per_node + 1))
+            elif self.binpack == 'worst-fit':
+                # Node with the most free GPU(s).
+                n_idx = np.argmax(np.where(can_fit, node_free_gpu_count, -1))
+            else:
+                # First-fit (and tetris, see `Cluster._plan_with_reservations`).
+                n_idx = np.argmax(can_fit)
+            node_taken[n_idx] = True
+            node_idx_taken[int(n_idx)] = np.flatnonzero(
+                node_free_gpus[n_idx])[:gpu_demand].tolist()
+
+        # Job plan stores in `node_idx_taken`: {Node Index -> List of GPU Indexes}
+        for n_idx, gpu_demand_list in node_idx_taken.items():
+            if not self.free_gpus[n_idx, gpu_demand_list].all():
+                raise ValueError('Generated execution plan is incorrect.')
+            self.free_gpus[n_idx, gpu_demand_list] = False
+            self.free_cpus[n_idx] -= num_cpus_per_node
+            if self.free_cpus[n_idx] < 0:
+                raise ValueError('Ran out of cluster resources!')
+            job.allocate_gpus(n_idx, utils.bits_to_mask(gpu_demand_list))
+        job.start = cur_timestamp
+        self._activate(job)
+
+        return True, []
+
+    def _activate(self, job):
+        """Adds a placed job to active jobs and the completion heap."""
+        self.active_jobs[job.idx] = job
+        heapq.heappush(self.completion_heap,
+                       (job.start + job.runtime, self._counter, job))
+        self._counter += 1
+
+    # Backfill Scheduling: Reserve blocking job.
+    def try_reserve(self, cur_timestamp, job):
+        active_job_list = [a_job for a_job in self.active_jobs.values()]
+        active_job_list.sort(key=lambda x: x.start + x.runtime)
+
+        # Like `Cluster.try_reserve`, reservations do not account for multi-node jobs.
+        job_gpu_demands = self._gpu_demands(job.num_gpus, 1)
+
+        unreserved_gpus = np.isinf(self.reserved_start)
+        node_free_list = [
+            np.flatnonzero(free_gpus).tolist()
+            for free_gpus in self.free_gpus & unreserved_gpus
+        ]
+        node_free_count = [len(gpu_list) for gpu_list in node_free_list]
+
+        for a_job in active_job_list:
+            if a_job.start + a_job.runtime > job.deadline - job.runtime:
+                return False
+            for n_idx, gpu_mask in a_job.allocated_gpu_masks:
+                for gpu_idx in utils.set_bits(gpu_mask):
+                    if not unreserved_gpus[n_idx, gpu_idx]:
+                        continue
+                    node_free_list[n_idx].append(gpu_idx)
+                    node_free_count[n_idx] += 1
+
+            node_indexes = utils.is_subset(node_free_count, job_gpu_demands)
+            if node_indexes:
+                job.start = a_job.start + a_job.runtime
+                for idx, n_idx in enumerate(node_indexes):
+                    gpu_list = node_free_list[n_idx][-job_gpu_demands[idx]:]
+                    job.allocate_gpus(n_idx, utils.bits_to_mask(gpu_list))
+                    self.reserved_start[n_idx, gpu_list] = job.start
+                self.reserved_jobs[job.idx] = job
+                self.blocked_reserved_jobs.setdefault(a_job.idx, []).append(
+                    (self._counter, job))
+                self._counter += 1
+                job.block_job_idx = a_job.idx
+                return True
+        raise ValueError('I should not go here!')
+
+    def try_clear(self, t: float):
+        """Clears cluster of completed jobs at time t.
+        """
+        completed_jobs = []
+        # Free jobs on the cluster which have completed, i.e. finished before time t.
+        heap = self.completion_heap
+        while heap and t >= heap[0][0]:
+            job = heapq.heappop(heap)[2]
+            for node_idx, gpu_mask in job.allocated_gpu_masks:
+                self.free_gpus[node_idx, utils.set_bits(gpu_mask)] = True
+                self.free_cpus[node_idx] += job.num_cpus / job.nodes
+            completed_jobs.append(job)
+
+        # Clears cluster of completed jobs.
+        unblocked_jobs = []
+        for job in completed_jobs:
+            job.state = 'LOCAL'
+            del self.active_jobs[job.idx]
+            unblocked_jobs.extend(self.blocked_reserved_jobs.pop(job.idx, []))
+
+        # Move reserved jobs blocked by completed jobs to active jobs, in reservation order.
+        unblocked_jobs.sort(key=lambda x: x[0])
+        for _, r_job in unblocked_jobs:
+            if t > r_job.start:
+                raise ValueError('sus')
+            for node_idx, gpu_mask in r_job.allocated_gpu_masks:
+                gpu_list = utils.set_bits(gpu_mask)
+                # The reserved GPUs must have been freed by the blocking jobs.
+                if not self.free_gpus[node_idx, gpu_list].all():
+                    raise ValueError('Reserved job, insufficient space.')
+                self.free_gpus[node_idx, gpu_list] = False
+                self.reserved_start[node_idx, gpu_list] = np.inf
+                self.free_cpus[node_idx] -= r_job.num_cpus / r_job.nodes
+                if self.free_cpus[node_idx] < 0:
+                    raise ValueError('Reserved job, insufficient space.')
+            del self.reserved_jobs[r_job.idx]
+            self._activate(r_job)
+
+        return completed_jobs
+
+    def __repr__(self):
+        repr_str = 'Cluster State:\n'
+        for idx in range(self.num_nodes):
+            free_gpus = np.flatnonzero(self.free_gpus[idx]).tolist()
+            used_cpus = self.num_cpus_per_node - self.free_cpus[idx]
+            repr_str += f'Node {idx}: Free GPU: {free_gpus}, CPU: {used_cpus}\n'
+        return repr_str
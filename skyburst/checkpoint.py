@@ -0,0 +1,71 @@
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+# Bumped whenever the layout of the simulator state changes.
+CHECKPOINT_VERSION = 4
+
+# Simulator settings that may differ between a checkpointed run and its resume.
+RESUME_IGNORED_KEYS = ('pbar_idx', 'verbose', 'debug', 'checkpoint_path',
+                       'checkpoint_interval', 'checkpoint_events', 'profile',
+                       'profile_path')
+
+
+def _resume_spec(simulator_spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        k: v
+        for k, v in simulator_spec.items() if k not in RESUME_IGNORED_KEYS
+    }
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    """Pickles the simulator state to `path`.
+
+    The state is written to a temporary file that is then renamed over
+    `path`, so a run killed mid-write leaves the previous checkpoint intact.
+    All objects are pickled together, so jobs shared between the queue,
+    cluster and event calendar remain shared once loaded.
+    """
+    dir_path = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_path, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(dict(state, version=CHECKPOINT_VERSION),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, simulator_spec: Dict[str, Any], num_jobs: int,
+                    jobs_digest: str) -> Optional[Dict[str, Any]]:
+    """Loads the simulator state saved at `path`, None if there is no checkpoint.
+
+    Raises a ValueError if the checkpoint was taken by a run with different
+    simulator settings or over different jobs (see `JobTable.digest`).
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(
+            f'Checkpoint {path} has version {state.get("version")}, '
+            f'expected {CHECKPOINT_VERSION}.')
+    if _resume_spec(state['simulator_spec']) != _resume_spec(simulator_spec):
+        raise ValueError(
+            f'Checkpoint {path} was taken with different simulator settings.')
+    if state['num_jobs'] != num_jobs:
+        raise ValueError(f'Checkpoint {path} was taken over '
+                         f'{state["num_jobs"]} jobs, not {num_jobs}.')
+    if state['jobs_digest'] != jobs_digest:
+        raise ValueError(
+            f'Checkpoint {path} was taken over a different job trace.')
+    return state
+
+
+def remove_checkpoint(path: str):
+    """Deletes the checkpoint at `path` (once its run has finished)."""
+    if os.path.exists(path):
+        os.remove(path)
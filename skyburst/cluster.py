@@ -1,3 +1,6 @@
+import bisect
+import heapq
+
 from skyburst.node import Node
 from skyburst import utils
 
@@ -24,10 +27,33 @@ class Cluster(object):
         self.active_jobs = {}
         # Maps Job ID to Job, reserved jobs to be scheduled in cluster
         self.reserved_jobs = {}
+        # Min-heap of (end time, push order, job) over active jobs.
+        self.completion_heap = []
+        # Maps Job ID of a blocking job to (push order, job) of jobs reserved behind it.
+        self.blocked_reserved_jobs = {}
+        # Push order of the next completion heap or reservation entry.
+        self._counter = 0
         # This determines whether to binpack with backfill scheduling.
         self.backfill = backfill
         # Defines the bin packing algorithm, `first-fit`, `best-fit`.
         self.binpack = binpack
+        # Free-capacity index. Bucket `g` holds the sorted indexes of nodes with `g` free GPU(s).
+        self.free_gpu_buckets = [[] for _ in range(num_gpus_per_node + 1)]
+        self.free_gpu_buckets[num_gpus_per_node] = list(range(num_nodes))
+        # Total free GPU(s) and CPU(s) in the cluster.
+        self.total_free_gpus = num_nodes * num_gpus_per_node
+        self.total_free_cpus = num_nodes * num_cpus_per_node
+
+    def _update_free_capacity(self, n_idx, gpu_delta, cpu_delta):
+        """Updates node `n_idx`'s free GPU(s)/CPU(s) and the free-capacity index."""
+        node = self.nodes[n_idx]
+        old_bucket = self.free_gpu_buckets[node.free_gpus]
+        del old_bucket[bisect.bisect_left(old_bucket, n_idx)]
+        node.free_gpus += gpu_delta
+        node.free_cpus += cpu_delta
+        bisect.insort(self.free_gpu_buckets[node.free_gpus], n_idx)
+        self.total_free_gpus += gpu_delta
+        self.total_free_cpus += cpu_delta
 
     def is_full(self):
         return all([n.free_gpus == 0 for n in self.nodes])
@@ -42,10 +68,8 @@ class Cluster(object):
         num_cpus = job.resources['CPUs']
         num_cpus_per_node = num_cpus / job.nodes
 
-        free_gpus = [n.free_gpus for n in self.nodes]
-        free_cpus = [n.free_cpus for n in self.nodes]
         # Quick check, no hope of fitting onto cluster :(
-        if num_gpus > sum(free_gpus) or num_cpus > sum(free_cpus):
+        if num_gpus > self.total_free_gpus or num_cpus > self.total_free_cpus:
             return False, []
 
         # Generate job GPU demands
@@ -65,32 +89,109 @@ class Cluster(object):
         # =============================================================================
         # Generate Job Plans
         # =============================================================================
-        # Go through free space only first, generate partial plan with free space
-        node_free_gpu_list = [
-            list(range(self.num_gpus_per_node)) for _ in range(self.num_nodes)
-        ]
-        node_free_cpu_count = [self.num_cpus_per_node] * self.num_nodes
+        # Job plans map node idx to list of gpu indexes for the job to take.
+        if self.reserved_jobs:
+            node_idx_taken = self._plan_with_reservations(
+                cur_timestamp, job, job_gpu_demands, num_cpus_per_node)
+        else:
+            node_idx_taken = self._plan_from_index(job_gpu_demands,
+                                                   num_cpus_per_node)
+        # If there are still demands that cannot be satisifed via free and preempted jobs,
+        # it cannot be scheduled on the cluster.
+        if node_idx_taken is None:
+            return False, []
 
-        # Go through active jobs
-        for a_job_idx, a_job in self.active_jobs.items():
-            a_job_cpu_per_node = a_job.num_cpus / a_job.nodes
-            for n_idx, gpu_list in a_job.allocated_gpus.items():
-                for gpu_idx in gpu_list:
-                    node_free_gpu_list[n_idx].remove(gpu_idx)
-                node_free_cpu_count[n_idx] -= a_job_cpu_per_node
+        # =============================================================================
+        # Execute Job Plans
+        # =============================================================================
+        # Job plan stores in `node_idx_taken`: {Node Index -> List of GPU Indexes}
+        for n_idx, gpu_demand_list in node_idx_taken.items():
+            node = self.nodes[n_idx]
+            if len(gpu_demand_list) > node.free_gpus or \
+                num_cpus_per_node > node.free_cpus:
+                raise ValueError('Ran out of cluster resources!')
+            self._update_free_capacity(n_idx, -len(gpu_demand_list),
+                                       -num_cpus_per_node)
+            for idx in gpu_demand_list:
+                if node.gpu_dict[idx] is not None:
+                    raise ValueError('Generated execution plan is incorrect.')
+                node.gpu_dict[idx] = job
+            gpu_mask = utils.bits_to_mask(gpu_demand_list)
+            node.free_gpu_mask ^= gpu_mask
+            job.allocate_gpus(n_idx, gpu_mask)
+        job.start = cur_timestamp
+        self._activate(job)
+
+        return True, []
+
+    def _activate(self, job):
+        """Adds a placed job to active jobs and the completion heap."""
+        self.active_jobs[job.idx] = job
+        heapq.heappush(self.completion_heap,
+                       (job.start + job.runtime, self._counter, job))
+        self._counter += 1
+
+    def _plan_from_index(self, job_gpu_demands, num_cpus_per_node):
+        """Generates a job plan by looking up nodes in the free-capacity index.
+
+        Picks the same nodes as sorting all nodes by free GPU(s) (see
+        `_plan_with_reservations`), but only visits the buckets that can fit
+        each GPU demand.
+        """
+        if self.binpack not in ['first-fit', 'best-fit', 'worst-fit', 'tetris']:
+            raise ValueError(f'Invalid allocation strategy {self.binpack}!')
+
+        node_idx_taken = {}
+        for gpu_demand in job_gpu_demands:
+            if self.binpack == 'worst-fit':
+                # Nodes with the most free GPU(s) first.
+                buckets = range(self.num_gpus_per_node, gpu_demand - 1, -1)
+            else:
+                # Nodes with the least free GPU(s) first.
+                buckets = range(gpu_demand, self.num_gpus_per_node + 1)
+            fit_idx = None
+            for free_gpus in buckets:
+                for n_idx in self.free_gpu_buckets[free_gpus]:
+                    if fit_idx is not None and n_idx > fit_idx:
+                        break
+                    if n_idx in node_idx_taken:
+                        continue
+                    if self.nodes[n_idx].free_cpus >= num_cpus_per_node:
+                        fit_idx = n_idx
+                        break
+                # Best-fit and worst-fit take the first bucket that fits,
+                # first-fit (and tetris) look for the lowest node index across buckets.
+                if fit_idx is not None and self.binpack in [
+                        'best-fit', 'worst-fit'
+                ]:
+                    break
+            if fit_idx is None:
+                return None
+            node_idx_taken[fit_idx] = utils.lowest_set_bits(
+                self.nodes[fit_idx].free_gpu_mask, gpu_demand)
+        return node_idx_taken
+
+    def _plan_with_reservations(self, cur_timestamp, job, job_gpu_demands,
+                                num_cpus_per_node):
+        """Generates a job plan, avoiding GPUs held by reserved jobs (backfill)."""
+        job_gpu_demands = list(job_gpu_demands)
+        # Go through free space only first, generate partial plan with free space.
+        # Free GPUs (as bitmasks) and CPUs are kept up to date by the nodes as jobs start and finish.
+        node_free_gpu_mask = [n.free_gpu_mask for n in self.nodes]
+        node_free_gpu_count = [n.free_gpus for n in self.nodes]
+        node_free_cpu_count = [n.free_cpus for n in self.nodes]
 
         # Go through reserved jobs
         for r_job_idx, r_job in self.reserved_jobs.items():
             if r_job.start < cur_timestamp + job.runtime:
                 r_job_cpu_per_node = r_job.num_cpus / r_job.nodes
-                for n_idx, gpu_list in r_job.allocated_gpus.items():
-                    for gpu_idx in gpu_list:
-                        if not self.nodes[n_idx].gpu_dict[gpu_idx]:
-                            node_free_gpu_list[n_idx].remove(gpu_idx)
+                for n_idx, gpu_mask in r_job.allocated_gpu_masks:
+                    reserved_free_gpus = node_free_gpu_mask[n_idx] & gpu_mask
+                    node_free_gpu_mask[n_idx] ^= reserved_free_gpus
+                    node_free_gpu_count[n_idx] -= len(
+                        utils.set_bits(reserved_free_gpus))
                 node_free_cpu_count[n_idx] -= r_job_cpu_per_node
 
-        node_free_gpu_count = [len(g) for g in node_free_gpu_list]
-
         node_free_count = [(i, node_free_gpu_count[i], node_free_cpu_count[i])
                            for i in range(len(node_free_gpu_count))]
         if self.binpack == 'first-fit':
@@ -117,8 +218,8 @@ class Cluster(object):
                 if free_gpus >= gpu_demand:
                     if free_cpus >= num_cpus_per_node:
                         # TODO: Reserved GPUs in the beginning of list. Prioritize taking reserved.
-                        node_idx_taken[n_idx] = node_free_gpu_list[
-                            n_idx][:gpu_demand]
+                        node_idx_taken[n_idx] = utils.lowest_set_bits(
+                            node_free_gpu_mask[n_idx], gpu_demand)
                         job_gpu_demands.remove(gpu_demand)
                         break
                     else:
@@ -134,27 +235,8 @@ class Cluster(object):
             #     print(
             #         f'GPU-CPU block occurrences: {blocked_by_gpu_cpu_job}, CPU block occurrences: {blocked_by_cpu_job}'
             #     )
-            return False, []
-
-        # =============================================================================
-        # Execute Job Plans
-        # =============================================================================
-        # Job plan stores in `node_idx_taken`: {Node Index -> List of GPU Indexes}
-        for n_idx, gpu_demand_list in node_idx_taken.items():
-            node = self.nodes[n_idx]
-            node.free_gpus -= len(gpu_demand_list)
-            node.free_cpus -= num_cpus_per_node
-            if node.free_gpus < 0 or node.free_cpus < 0:
-                raise ValueError('Ran out of cluster resources!')
-            for idx in gpu_demand_list:
-                if node.gpu_dict[idx] is not None:
-                    raise ValueError('Generated execution plan is incorrect.')
-                node.gpu_dict[idx] = job
-            job.allocated_gpus[n_idx] = gpu_demand_list
-        job.start = cur_timestamp
-        self.active_jobs[job.idx] = job
-
-        return True, []
+            return None
+        return node_idx_taken
 
     def predict_wait(self, cur_timestamp, job, queue, loop=False):
         max_timestamp = job.deadline - job.runtime
@@ -229,8 +311,8 @@ class Cluster(object):
         for a_job in active_job_list:
             if a_job.start + a_job.runtime > max_timestamp:
                 return False
-            for n_idx, gpu_list in a_job.allocated_gpus.items():
-                node_free_gpu_count[n_idx] += len(gpu_list)
+            for n_idx, gpu_mask in a_job.allocated_gpu_masks:
+                node_free_gpu_count[n_idx] += len(utils.set_bits(gpu_mask))
 
             if can_cluster_fit(node_free_gpu_count):
                 return True
@@ -267,8 +349,8 @@ class Cluster(object):
         for a_job in active_job_list:
             if a_job.start + a_job.runtime > job.deadline - job.runtime:
                 return False
-            for n_idx, gpu_list in a_job.allocated_gpus.items():
-                for gpu_idx in gpu_list:
+            for n_idx, gpu_mask in a_job.allocated_gpu_masks:
+                for gpu_idx in utils.set_bits(gpu_mask):
                     if self.nodes[n_idx].reserved_gpus[gpu_idx]:
                         continue
                     node_free_list[n_idx].append(gpu_idx)
@@ -278,11 +360,14 @@ class Cluster(object):
             if node_indexes:
                 for idx, n_idx in enumerate(node_indexes):
                     gpu_list = node_free_list[n_idx][-job_gpu_demands[idx]:]
-                    job.allocated_gpus[n_idx] = gpu_list
+                    job.allocate_gpus(n_idx, utils.bits_to_mask(gpu_list))
                     cur_node = self.nodes[n_idx]
                     for gpu_idx in gpu_list:
                         cur_node.reserved_gpus[gpu_idx] = job
                 self.reserved_jobs[job.idx] = job
+                self.blocked_reserved_jobs.setdefault(a_job.idx, []).append(
+                    (self._counter, job))
+                self._counter += 1
                 job.block_job_idx = a_job.idx
                 job.start = a_job.start + a_job.runtime
                 return True
@@ -368,50 +453,51 @@ class Cluster(object):
         """Clears cluster of completed jobs at time t.
         """
         completed_jobs = []
-        # Free jobs on the cluster which have completed.
-        for job_idx, job in self.active_jobs.items():
-            # If job has finished before time t...
-            if t >= job.start + job.runtime:
-                for node_idx, gpu_list in job.allocated_gpus.items():
-                    cur_node = self.nodes[node_idx]
-                    node_gpu_dict = cur_node.gpu_dict
-                    for gpu_idx in gpu_list:
-                        node_gpu_dict[gpu_idx] = None
-                    cur_node.free_gpus += len(gpu_list)
-                    cur_node.free_cpus += job.num_cpus / job.nodes
-                completed_jobs.append(job)
+        # Free jobs on the cluster which have completed, i.e. finished before time t.
+        heap = self.completion_heap
+        while heap and t >= heap[0][0]:
+            job = heapq.heappop(heap)[2]
+            for node_idx, gpu_mask in job.allocated_gpu_masks:
+                cur_node = self.nodes[node_idx]
+                node_gpu_dict = cur_node.gpu_dict
+                gpu_list = utils.set_bits(gpu_mask)
+                for gpu_idx in gpu_list:
+                    node_gpu_dict[gpu_idx] = None
+                cur_node.free_gpu_mask |= gpu_mask
+                self._update_free_capacity(node_idx, len(gpu_list),
+                                           job.num_cpus / job.nodes)
+            completed_jobs.append(job)
 
         # Clears cluster of completed jobs.
-        c_job_idx = []
+        unblocked_jobs = []
         for job in completed_jobs:
             job.state = 'LOCAL'
-            c_job_idx.append(job.idx)
             del self.active_jobs[job.idx]
-
-        # Go through reserved jobs
-        r_job_delete_idx = []
-        for r_job_idx, r_job in self.reserved_jobs.items():
-            # Move reserved job to active jobs
-            if r_job.block_job_idx in c_job_idx:
-                if t > r_job.start:
-                    raise ValueError('sus')
-                for node_idx, gpu_list in r_job.allocated_gpus.items():
-                    cur_node = self.nodes[node_idx]
-                    for gpu_idx in gpu_list:
-                        cur_node.gpu_dict[gpu_idx] = r_job
-                        cur_node.reserved_gpus[gpu_idx] = None
-                    cur_node.free_gpus -= len(gpu_list)
-                    cur_node.free_cpus -= r_job.num_cpus / r_job.nodes
-                    if cur_node.free_gpus < 0 or cur_node.free_cpus < 0:
-                        print(cur_node.free_gpus, cur_node.free_cpus)
-                        import pdb
-                        pdb.set_trace()
-                        raise ValueError('Reserved job, insufficient space.')
-                r_job_delete_idx.append(r_job_idx)
-                self.active_jobs[r_job_idx] = r_job
-
-        for r_job_idx in r_job_delete_idx:
-            del self.reserved_jobs[r_job_idx]
+            unblocked_jobs.extend(self.blocked_reserved_jobs.pop(job.idx, []))
+
+        # Move reserved jobs blocked by completed jobs to active jobs, in reservation order.
+        unblocked_jobs.sort(key=lambda x: x[0])
+        for _, r_job in unblocked_jobs:
+            if t > r_job.start:
+                raise ValueError('sus')
+            for node_idx, gpu_mask in r_job.allocated_gpu_masks:
+                cur_node = self.nodes[node_idx]
+                gpu_list = utils.set_bits(gpu_mask)
+                for gpu_idx in gpu_list:
+                    cur_node.gpu_dict[gpu_idx] = r_job
+                    cur_node.reserved_gpus[gpu_idx] = None
+                cur_node.free_gpu_mask &= ~gpu_mask
+                r_job_cpu_per_node = r_job.num_cpus / r_job.nodes
+                if len(gpu_list) > cur_node.free_gpus or \
+                    r_job_cpu_per_node > cur_node.free_cpus:
+                    print(cur_node.free_gpus, cur_node.free_cpus)
+                    import pdb
+                    pdb.set_trace()
+                    raise ValueError('Reserved job, insufficient space.')
+                self._update_free_capacity(node_idx, -len(gpu_list),
+                                           -r_job_cpu_per_node)
+            del self.reserved_jobs[r_job.idx]
+            self._activate(r_job)
 
         return completed_jobs
 
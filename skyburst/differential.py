@@ -0,0 +1,161 @@
+import contextlib
+import io
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from skyburst import reference_simulator
+from skyburst.job import Job
+from skyburst.job_table import JobTable
+from skyburst.simulator import run_simulator
+
+# Simulator engines, as simulator spec overrides or functions. `reference` is
+# the original per-timestep rescan loop (see `reference_simulator`).
+ENGINES = {
+    'reference': reference_simulator.run_simulator,
+    'python': {
+        'cluster_backend': 'python'
+    },
+    'numpy': {
+        'cluster_backend': 'numpy'
+    },
+}
+
+# Per-job result columns that must match between engines.
+COMPARED_COLUMNS = ['start', 'state', 'deadline', 'allocated_gpus']
+
+# Relative tolerance of stats, which engines may sum up in a different order.
+STATS_RTOL = 1e-9
+
+# An engine is a name in `ENGINES`, a dict of simulator spec overrides, or
+# a function with the signature of `run_simulator`.
+Engine = Union[str, Dict[str, Any], Callable]
+
+
+def run_engine(engine: Engine,
+               jobs: Union[List[Job], JobTable],
+               simulator_spec: Dict[str, Any],
+               seed: int = 0,
+               quiet: bool = True) -> Dict[str, Any]:
+    """Runs the simulator engine `engine` with the event log on.
+
+    The simulator RNG (time estimator errors) is seeded with `seed`, so all
+    engines see the same random draws.
+    """
+    simulator_spec = dict(simulator_spec,
+                          seed=seed,
+                          event_log=True,
+                          result_path=None,
+                          checkpoint_path=None)
+    if isinstance(engine, str):
+        engine = ENGINES[engine]
+    if isinstance(engine, dict):
+        simulator_spec.update(engine)
+        engine = run_simulator
+    if not quiet:
+        return engine(jobs, simulator_spec)
+    with contextlib.redirect_stdout(io.StringIO()), \
+        contextlib.redirect_stderr(io.StringIO()):
+        return engine(jobs, simulator_spec)
+
+
+def _diverged_rows(reference, candidate) -> np.ndarray:
+    """Returns a boolean mask of rows where two result columns differ."""
+    reference = np.asarray(reference)
+    candidate = np.asarray(candidate)
+    if reference.dtype.kind == 'f' and candidate.dtype.kind == 'f':
+        return ~((reference == candidate) |
+                 (np.isnan(reference) & np.isnan(candidate)))
+    return np.array([a != b for a, b in zip(reference, candidate)],
+                    dtype=bool)
+
+
+def compare_jobs(reference: Dict[str, Any],
+                 candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Compares per-job results of two runs.
+
+    Returns None if all jobs match, otherwise the number of diverged jobs
+    and the diverged columns of the diverged job with the smallest Job ID.
+    """
+    if not np.array_equal(reference['idx'], candidate['idx']):
+        return {'num_jobs': 0, 'error': 'Runs have different jobs.'}
+    diverged = {
+        column: _diverged_rows(reference[column], candidate[column])
+        for column in COMPARED_COLUMNS
+    }
+    any_diverged = np.logical_or.reduce(list(diverged.values()))
+    if not any_diverged.any():
+        return None
+    row = int(np.flatnonzero(any_diverged)[0])
+    return {
+        'num_jobs': int(any_diverged.sum()),
+        'idx': reference['idx'][row].item(),
+        'columns': {
+            column: (reference[column][row], candidate[column][row])
+            for column in COMPARED_COLUMNS if diverged[column][row]
+        },
+    }
+
+
+def compare_events(reference: List[tuple],
+                   candidate: List[tuple],
+                   context: int = 5) -> Optional[Dict[str, Any]]:
+    """Finds the first divergent scheduling decision of two event logs.
+
+    Returns None if the logs match, otherwise the position of the first
+    divergent event, both events (None if one log ended early) and the
+    `context` events before it.
+    """
+    num_events = min(len(reference), len(candidate))
+    for i in range(num_events):
+        if reference[i] != candidate[i]:
+            break
+    else:
+        if len(reference) == len(candidate):
+            return None
+        i = num_events
+    return {
+        'index': i,
+        'reference': reference[i] if i < len(reference) else None,
+        'candidate': candidate[i] if i < len(candidate) else None,
+        'context': reference[max(0, i - context):i],
+    }
+
+
+def compare_results(reference_result: Dict[str, Any],
+                    candidate_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compares two runs (with event logs) of the same jobs and simulator settings.
+
+    Compares per-job start, state, deadline and GPU allocation and the
+    event logs of the two runs exactly, and their stats up to `STATS_RTOL`.
+    """
+    job_divergence = compare_jobs(reference_result, candidate_result)
+    event_divergence = compare_events(reference_result['events'],
+                                      candidate_result['events'])
+    stats_divergence = [
+        k for k, v in reference_result['stats'].items() if k != 'profile'
+        and not np.isclose(v,
+                           candidate_result['stats'].get(k, np.nan),
+                           rtol=STATS_RTOL,
+                           atol=0.0,
+                           equal_nan=True)
+    ]
+    return {
+        'equivalent': job_divergence is None and event_divergence is None and
+        not stats_divergence,
+        'num_events': len(reference_result['events']),
+        'job_divergence': job_divergence,
+        'event_divergence': event_divergence,
+        'stats_divergence': stats_divergence,
+    }
+
+
+def compare_engines(jobs: Union[List[Job], JobTable],
+                    simulator_spec: Dict[str, Any],
+                    reference: Engine = 'reference',
+                    candidate: Engine = 'python',
+                    seed: int = 0) -> Dict[str, Any]:
+    """Runs two simulator engines over the same jobs and compares their decisions."""
+    reference_result = run_engine(reference, jobs, simulator_spec, seed=seed)
+    candidate_result = run_engine(candidate, jobs, simulator_spec, seed=seed)
+    return compare_results(reference_result, candidate_result)
@@ -0,0 +1,81 @@
+import heapq
+from typing import List, Optional, Tuple
+
+from skyburst.job import Job
+
+# Next job in the trace arrives to the scheduler.
+ARRIVAL = 'arrival'
+# Job finishes running on the local cluster.
+COMPLETION = 'completion'
+# Job in the queue has waited too long and is moved to the cloud.
+QUEUE_TIMEOUT = 'queue_timeout'
+# Job preempted from the cloud arrives back to the scheduler (Star-Wait).
+CLOUD_REARRIVAL = 'cloud_rearrival'
+
+EVENT_TYPES = [ARRIVAL, COMPLETION, QUEUE_TIMEOUT, CLOUD_REARRIVAL]
+
+
+class EventCalendar(object):
+    """Discrete-event calendar for the simulator.
+
+    Keeps one min-heap of `(time, seq, job)` per event type. A job has at
+    most one live event per type; rescheduling or cancelling an event does
+    not touch the heap, the stale entry is instead dropped lazily once it
+    reaches the top of its heap. Scheduling, cancelling and peeking all cost
+    O(log n).
+    """
+    def __init__(self):
+        self._heaps = {event_type: [] for event_type in EVENT_TYPES}
+        # Maps (event type, job idx) to the sequence number of the live event.
+        self._live = {}
+        # Sequence number of the next scheduled event.
+        self._counter = 0
+
+    def schedule(self, event_type: str, time: float, job: Job):
+        """Schedules an event, replacing the job's live event of that type."""
+        seq = self._counter
+        self._counter += 1
+        self._live[(event_type, job.idx)] = seq
+        heapq.heappush(self._heaps[event_type], (time, seq, job))
+
+    def cancel(self, event_type: str, job: Job):
+        """Invalidates the job's live event of type `event_type`, if any."""
+        self._live.pop((event_type, job.idx), None)
+
+    def _prune(self, event_type: str):
+        heap = self._heaps[event_type]
+        while heap and self._live.get(
+            (event_type, heap[0][2].idx)) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap
+
+    def peek_time(self, event_type: Optional[str] = None) -> Optional[float]:
+        """Returns the time of the earliest live event (of `event_type` if
+        given, otherwise of any type), or None if there are no events."""
+        event_types = EVENT_TYPES if event_type is None else [event_type]
+        next_time = None
+        for e_type in event_types:
+            heap = self._prune(e_type)
+            if heap and (next_time is None or heap[0][0] < next_time):
+                next_time = heap[0][0]
+        return next_time
+
+    def pop_due(self, event_type: str, t: float) -> List[Tuple[float, Job]]:
+        """Pops all live events of `event_type` that occur at or before time
+        `t`. Events are ordered by time, ties are broken by scheduling order.
+        """
+        due = []
+        heap = self._prune(event_type)
+        while heap and heap[0][0] <= t:
+            time, _, job = heapq.heappop(heap)
+            del self._live[(event_type, job.idx)]
+            due.append((time, job))
+            heap = self._prune(event_type)
+        return due
+
+    def heap_size(self) -> int:
+        """Returns the # of heap entries, including cancelled events not yet dropped."""
+        return sum(len(heap) for heap in self._heaps.values())
+
+    def __len__(self):
+        return len(self._live)
@@ -222,7 +222,7 @@ def backfill_appendix_filter(run_configs):
             if r['loop'] == 1 and r['backfill'] == 1:
                 continue
             temp.append(r)
-    run_configs = temp
+    return temp
 
 def philly_data_gravity_filter(run_configs):
     temp = []
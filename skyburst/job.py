@@ -1,4 +1,26 @@
+from skyburst import utils
+
+
+def decode_gpu_masks(gpu_masks):
+    """Decodes (node index, GPU bitmask) pairs into {node index: [GPU indexes]}.
+
+    A bitmask only records which GPUs a job holds, so each list comes out in
+    ascending GPU order, regardless of the order the scheduler picked them in
+    (e.g. a backfill reservation over freed GPUs 6, 7 and free GPUs 2, 3
+    decodes to [2, 3, 6, 7]).
+    """
+    return {
+        node_idx: utils.set_bits(gpu_mask)
+        for node_idx, gpu_mask in gpu_masks
+    }
+
+
 class Job(object):
+    __slots__ = ('idx', 'arrival', 'runtime', 'deadline', 'resources',
+                 'num_gpus', 'num_cpus', 'cost', 'nodes', 'state', 'start',
+                 'allocated_gpu_masks', 'block_job_idx', 'starved_space',
+                 'preempt_cloud', 'new_arrival')
+
     def __init__(self,
                  idx: int,
                  arrival: float = 0.0,
@@ -33,8 +55,8 @@ class Job(object):
         # Starting time of the job on the local cluster, if none, the job was ran on the cloud.
         self.start = None
 
-        # Keeps track of which GPU(s) the job ran on.
-        self.allocated_gpus = {}
+        # Keeps track of which GPU(s) the job ran on, as (node index, GPU bitmask) pairs.
+        self.allocated_gpu_masks = ()
 
         # For backfill scheduling, job immediately executed after Job idx `block_job_idx` completes.
         self.block_job_idx = None
@@ -53,7 +75,16 @@ class Job(object):
         return self.idx == other.idx
 
     def __hash__(self):
-        return hash(str(self.idx))
+        return hash(self.idx)
+
+    @property
+    def allocated_gpus(self):
+        """Maps node index to the sorted list of GPU indexes the job ran on."""
+        return decode_gpu_masks(self.allocated_gpu_masks)
+
+    def allocate_gpus(self, node_idx, gpu_mask):
+        """Records that the job runs on the GPUs in `gpu_mask` of node `node_idx`."""
+        self.allocated_gpu_masks += ((node_idx, gpu_mask), )
 
     def set_deadline(self, deadline):
         self.deadline = deadline
@@ -1,9 +1,18 @@
+import os
+from typing import Any, Dict, List, Union
+
 import numpy as np
-from typing import Any, Dict, List
 
-from skyburst import Job, waiting_policy
+from skyburst import JobTable
 from skyburst.traces import philly
 from skyburst.traces import helios
+from skyburst.traces import trace_cache
+
+PHILLY_TRACE_DIR = '~/philly-traces/trace-data'
+HELIOS_TRACE_DIR = '~/HeliosData/data/Venus'
+
+# Processed trace columns (see `philly.job_columns` and `helios.job_columns`).
+TraceColumns = Dict[str, np.ndarray]
 
 
 # Returns the total cost of a GPU-only job.
@@ -16,13 +25,54 @@ def hybrid_cost_fn(resources: dict, runtime: float):
     return 50 * resources['GPUs'] * runtime + resources['CPUs'] * runtime
 
 
+def generate_arrival_times(rng: np.random.Generator, arrival_rate: float,
+                           cv_factor: float, total_jobs: int) -> np.ndarray:
+    """Draws arrival times with Gamma interarrival times (Poisson arrivals if cv_factor=1)."""
+    alpha = (1.0 / cv_factor)**2
+    interarrival_times = rng.gamma(shape=alpha,
+                                   scale=1 / (alpha * arrival_rate),
+                                   size=total_jobs - 1)
+    # The first job arrives at time 0.
+    return np.cumsum(np.insert(interarrival_times, 0, 0))
+
+
+def load_philly_columns(trace_dir: str = PHILLY_TRACE_DIR) -> TraceColumns:
+    """Returns the processed Philly trace columns, cached on disk after the first parse."""
+    trace_path = os.path.join(os.path.expanduser(trace_dir), 'cluster_job_log')
+    return trace_cache.load_cached_columns(
+        'philly', trace_path,
+        lambda: philly.job_columns(philly.load_philly_trace_columns(trace_dir)))
+
+
+def load_helios_columns(trace_dir: str = HELIOS_TRACE_DIR) -> TraceColumns:
+    """Returns the processed Helios trace columns, cached on disk after the first parse."""
+    trace_path = os.path.join(os.path.expanduser(trace_dir), 'cluster_log.csv')
+    return trace_cache.load_cached_columns(
+        'helios', trace_path,
+        lambda: helios.load_helios_job_columns(trace_dir))
+
+
+def _philly_columns(
+        philly_jobs: Union[List['JobTrace'], TraceColumns]) -> TraceColumns:
+    if isinstance(philly_jobs, dict):
+        return philly_jobs
+    return philly.job_columns(philly_jobs)
+
+
+def _helios_columns(
+        helios_jobs: Union[List['HeliosJobTrace'],
+                           TraceColumns]) -> TraceColumns:
+    if isinstance(helios_jobs, dict):
+        return helios_jobs
+    return helios.job_columns(helios_jobs)
+
+
 def load_processed_jobs(dataset_config: Dict[str, Any]):
     dataset_type = dataset_config['dataset']
     if dataset_type == 'philly':
-        philly_jobs = philly.load_philly_traces('~/philly-traces/trace-data')
-        return process_philly_jobs(philly_jobs)
+        return process_philly_jobs(load_philly_columns())
     elif dataset_type == 'philly_gen':
-        philly_jobs = philly.load_philly_traces('~/philly-traces/trace-data')
+        philly_jobs = load_philly_columns()
         dataset_kwargs = {
             'total_jobs': dataset_config['total_jobs'],
             'arrival_rate': dataset_config['arrival_rate'],
@@ -31,7 +81,7 @@ def load_processed_jobs(dataset_config: Dict[str, Any]):
         }
         return generate_philly_gpu_jobs(philly_jobs, **dataset_kwargs)
     elif dataset_type == 'gen_gpu':
-        philly_jobs = philly.load_philly_traces('~/philly-traces/trace-data')
+        philly_jobs = load_philly_columns()
         dataset_kwargs = {
             'total_jobs': dataset_config['total_jobs'],
             'arrival_rate': dataset_config['arrival_rate'],
@@ -40,10 +90,9 @@ def load_processed_jobs(dataset_config: Dict[str, Any]):
         }
         return generate_gpu_jobs(philly_jobs, **dataset_kwargs)
     elif dataset_type == 'helios':
-        helios_jobs = helios.load_helios_traces('~/HeliosData/data/Venus')
-        return process_helios_jobs(helios_jobs)
+        return process_helios_jobs(load_helios_columns())
     elif dataset_type == 'helios_gen':
-        helios_jobs = helios.load_helios_traces('~/HeliosData/data/Venus')
+        helios_jobs = load_helios_columns()
         dataset_kwargs = {
             'total_jobs': dataset_config['total_jobs'],
             'arrival_rate': dataset_config['arrival_rate'],
@@ -66,273 +115,151 @@ def load_processed_jobs(dataset_config: Dict[str, Any]):
         )
 
 
-def process_philly_jobs(philly_jobs: List['JobTrace']):
-    """Converts entire Philly job trace into a list of simulator jobs.
-    """
-    jobs = philly_jobs.copy()
-    # Remove invalid jobs (jobs that have not finished and jobs that failed/killed early)
-    jobs = [j for j in jobs if j._run_time is not None and j.status == 'Pass']
-    jobs.sort(key=lambda j: j._submitted_time)
-
-    # Arrival time for jobs
-    start_time = jobs[0]._submitted_time
-    arrival_times = [(j._submitted_time - start_time).total_seconds() / 3600.0
-                     for j in jobs]
-
-    # Run time for jobs
-    run_times = [j._run_time / 60.0 for j in jobs]
-
-    # Get GPU resources
-    resources = []
-    for j in jobs:
-        gpu_count = sum(
-            [len(node_dict['gpus']) for node_dict in j.attempts[-1]['detail']])
-        resources.append({'GPUs': gpu_count})
-
-    costs = [res['GPUs'] * run for res, run in zip(resources, run_times)]
-
-    return [Job(idx, arrival=arr, runtime=run, resources=res, cost=cost) \
-            for idx, (arr, run, res, cost) in \
-            enumerate(list(zip(arrival_times, run_times, resources, costs)))]
-
+def process_philly_jobs(
+        philly_jobs: Union[List['JobTrace'], TraceColumns]) -> JobTable:
+    """Converts entire Philly job trace into a table of simulator jobs.
 
-def generate_philly_gpu_jobs(philly_jobs: List['JobTrace'],
+    Takes the parsed trace or its processed columns (`load_philly_columns`).
+    """
+    columns = _philly_columns(philly_jobs)
+    run_times = columns['runtime']
+    num_gpus = columns['num_gpus']
+    return JobTable(idx=np.arange(len(run_times)),
+                    arrival=columns['arrival'],
+                    runtime=run_times,
+                    num_gpus=num_gpus,
+                    cost=num_gpus * run_times)
+
+
+def generate_philly_gpu_jobs(philly_jobs: Union[List['JobTrace'],
+                                                TraceColumns],
                              arrival_rate=32.0,
                              cv_factor=1.0,
                              total_jobs=300000,
-                             seed=2024):
+                             seed=2024) -> JobTable:
     """Generates Philly jobs based on a Poisson arrival distribution.
 
     Interarrival times follow an exponential distribution of 1/arrival_rate.
     Jobs are randomly sampled from the Philly job trace.
     """
     total_jobs = int(total_jobs)
-    jobs = philly_jobs.copy()
-    # Remove invalid jobs (jobs that have not finished and jobs that failed/killed early)
-    jobs = [j for j in jobs if j._run_time is not None and j.status == 'Pass']
-    jobs.sort(key=lambda j: j._submitted_time)
+    columns = _philly_columns(philly_jobs)
 
     # Arrival time for jobs
-    np.random.seed(seed)
-    alpha = (1.0 / cv_factor)**2
-    interarrival_times = np.array([
-        np.random.gamma(shape=alpha, scale=1 / (alpha * arrival_rate))
-        for _ in range(total_jobs - 1)
-    ])
-    # interarrival_times = np.random.exponential(scale=1 / arrival_rate,
-    #                                            size=total_jobs - 1)
-    interarrival_times = np.insert(interarrival_times, 0, 0)
-    arrival_times = np.cumsum(interarrival_times)
-
-    # Run time for jobs
-    run_times = []
-    for j in jobs:
-        run_time_hr = j._run_time / 60.0
-        run_times.append(run_time_hr)
-
-    # Get GPU resources
-    resources = []
-    for j in jobs:
-        detail_dict = j.attempts[-1]['detail']
-        gpu_count = sum([len(node_dict['gpus']) for node_dict in detail_dict])
-        resources.append({'GPUs': gpu_count})
-    np.random.seed(seed)
-    job_indexes = np.random.choice(list(range(len(run_times))),
-                                   size=total_jobs,
-                                   replace=True)
-    proc_jobs = []
-    for idx in range(total_jobs):
-        job_idx = job_indexes[idx]
-        resources_dict = resources[job_idx]
-        runtime = run_times[job_idx]
-        cost = resources_dict['GPUs'] * runtime
-        proc_jobs.append(
-            Job(idx,
-                arrival=arrival_times[idx],
-                runtime=runtime,
-                resources=resources_dict,
-                cost=cost))
-    return proc_jobs
-
-
-def generate_helios_jobs(helios_jobs: List['HeliosJobTrace'],
+    rng = np.random.default_rng(seed)
+    arrival_times = generate_arrival_times(rng, arrival_rate, cv_factor,
+                                           total_jobs)
+
+    job_indexes = rng.integers(len(columns['runtime']), size=total_jobs)
+    runtime = columns['runtime'][job_indexes]
+    num_gpus = columns['num_gpus'][job_indexes]
+    return JobTable(idx=np.arange(total_jobs),
+                    arrival=arrival_times,
+                    runtime=runtime,
+                    num_gpus=num_gpus,
+                    cost=num_gpus * runtime)
+
+
+def generate_helios_jobs(helios_jobs: Union[List['HeliosJobTrace'],
+                                            TraceColumns],
                          arrival_rate=32.0,
                          cv_factor=1.0,
                          total_jobs=300000,
-                         seed=2024):
-    """Converts entire Helios job trace into a list of simulator jobs.
+                         seed=2024) -> JobTable:
+    """Generates Helios jobs based on a Poisson arrival distribution.
+
+    Jobs are randomly sampled from the Helios job trace.
     """
-    jobs = helios_jobs.copy()
-    # Remove invalid jobs (jobs that have not finished and jobs that failed/killed early)
-    jobs = [
-        j for j in jobs
-        if j._run_time is not None and (j.status in ['COMPLETED', 'TIMEOUT'])
-    ]
-    jobs.sort(key=lambda j: j._submitted_time)
+    total_jobs = int(total_jobs)
+    columns = _helios_columns(helios_jobs)
 
     # Arrival time for jobs
-    np.random.seed(seed)
-    alpha = (1.0 / cv_factor)**2
-    interarrival_times = np.array([
-        np.random.gamma(shape=alpha, scale=1 / (alpha * arrival_rate))
-        for _ in range(total_jobs - 1)
-    ])
-    # interarrival_times = np.random.exponential(scale=1 / arrival_rate,
-    #                                            size=total_jobs - 1)
-    interarrival_times = np.insert(interarrival_times, 0, 0)
-    arrival_times = np.cumsum(interarrival_times)
+    rng = np.random.default_rng(seed)
+    arrival_times = generate_arrival_times(rng, arrival_rate, cv_factor,
+                                           total_jobs)
 
-    # Run time for jobs
-    run_times = [j._run_time for j in jobs]
-    nodes = [j._nodes for j in jobs]
+    # Run time and resources for jobs
+    run_times = columns['runtime']
+    costs = (columns['num_gpus'] + columns['num_cpus'] / 53.0) * run_times
 
-    # Get GPU resources
-    resources = []
-    for j in jobs:
-        resources.append({'GPUs': j.num_gpus, 'CPUs': j.num_cpus})
-
-    costs = [(res['GPUs'] + res['CPUs'] / 53.0) * run
-             for res, run in zip(resources, run_times)]
-
-    np.random.seed(seed)
-    job_indexes = np.random.choice(list(range(len(run_times))),
-                                   size=total_jobs,
-                                   replace=True)
-    proc_jobs = []
-    for idx in range(total_jobs):
-        job_idx = job_indexes[idx]
-        resources_dict = resources[job_idx]
-        runtime = run_times[job_idx]
-        cost = costs[job_idx]
-        num_nodes = nodes[job_idx]
-        proc_jobs.append(
-            Job(idx,
-                arrival=arrival_times[idx],
-                runtime=runtime,
-                resources=resources_dict,
-                cost=cost,
-                nodes=num_nodes))
-    return proc_jobs
-
-
-def generate_gpu_jobs(philly_jobs: List['JobTrace'],
+    job_indexes = rng.integers(len(run_times), size=total_jobs)
+    return JobTable(idx=np.arange(total_jobs),
+                    arrival=arrival_times,
+                    runtime=run_times[job_indexes],
+                    num_gpus=columns['num_gpus'][job_indexes],
+                    num_cpus=columns['num_cpus'][job_indexes],
+                    cost=costs[job_indexes],
+                    nodes=columns['nodes'][job_indexes])
+
+
+def generate_gpu_jobs(philly_jobs: Union[List['JobTrace'], TraceColumns],
                       arrival_rate=32.0,
                       job_runtime=4.0,
                       total_jobs=200000,
-                      seed=2024):
+                      seed=2024) -> JobTable:
     """Generates GPU jobs based on a Poisson arrival distribution and exponential runtime distribution.
     """
     total_jobs = int(total_jobs)
-    jobs = philly_jobs.copy()
-    # Remove invalid jobs (jobs that have not finished and jobs that failed/killed early)
-    jobs = [j for j in jobs if j._run_time is not None and j.status == 'Pass']
-    jobs.sort(key=lambda j: j._submitted_time)
+    columns = _philly_columns(philly_jobs)
 
     # Arrival time for jobs
-    np.random.seed(seed)
-    interarrival_times = np.random.exponential(scale=1 / arrival_rate,
-                                               size=total_jobs - 1)
-    interarrival_times = np.insert(interarrival_times, 0, 0)
-    arrival_times = np.cumsum(interarrival_times)
+    rng = np.random.default_rng(seed)
+    arrival_times = generate_arrival_times(rng, arrival_rate, 1.0, total_jobs)
 
     # Run time for jobs
-    run_times = np.random.exponential(scale=job_runtime, size=total_jobs)
+    run_times = rng.exponential(scale=job_runtime, size=total_jobs)
 
     # Get GPU resources
-    resources = []
-    for j in jobs:
-        detail_dict = j.attempts[-1]['detail']
-        gpu_count = sum([len(node_dict['gpus']) for node_dict in detail_dict])
-        resources.append({'GPUs': gpu_count})
-    np.random.seed(seed)
-    job_indexes = np.random.choice(list(range(len(resources))),
-                                   size=total_jobs,
-                                   replace=True)
-    proc_jobs = []
-    for idx in range(total_jobs):
-        job_idx = job_indexes[idx]
-        runtime = run_times[idx]
-        resources_dict = resources[job_idx]
-        cost = resources_dict['GPUs'] * runtime
-        proc_jobs.append(
-            Job(idx,
-                arrival=arrival_times[idx],
-                runtime=runtime,
-                resources=resources_dict,
-                cost=cost))
-    return proc_jobs
-
-
-def process_helios_jobs(helios_jobs: List['HeliosJobTrace']):
-    """Converts entire Helios job trace into a list of simulator jobs.
-    """
-    jobs = helios_jobs.copy()
-    # Remove invalid jobs (jobs that have not finished and jobs that failed/killed early)
-    jobs = [
-        j for j in jobs
-        if j._run_time is not None and (j.status in ['COMPLETED', 'TIMEOUT'])
-    ]
-    jobs.sort(key=lambda j: j._submitted_time)
-
-    # Arrival time for jobs
-    start_time = jobs[0]._submitted_time
-    arrival_times = [(j._submitted_time - start_time).total_seconds() / 3600.0
-                     for j in jobs]
+    num_gpus = columns['num_gpus'][rng.integers(len(columns['num_gpus']),
+                                                size=total_jobs)]
+    return JobTable(idx=np.arange(total_jobs),
+                    arrival=arrival_times,
+                    runtime=run_times,
+                    num_gpus=num_gpus,
+                    cost=num_gpus * run_times)
 
-    # Run time for jobs
-    run_times = [j._run_time for j in jobs]
-    nodes = [j._nodes for j in jobs]
 
-    # Get GPU resources
-    resources = []
-    for j in jobs:
-        resources.append({'GPUs': j.num_gpus, 'CPUs': j.num_cpus})
+def process_helios_jobs(
+        helios_jobs: Union[List['HeliosJobTrace'], TraceColumns]) -> JobTable:
+    """Converts entire Helios job trace into a table of simulator jobs.
 
-    costs = [(res['GPUs'] + res['CPUs'] / 53.0) * run
-             for res, run in zip(resources, run_times)]
-
-    return [Job(idx, arrival=arr, runtime=run, resources=res, cost=cost, nodes=node) \
-            for idx, (arr, run, res, cost, node) in \
-            enumerate(list(zip(arrival_times, run_times, resources, costs, nodes)))]
+    Takes the parsed trace or its processed columns (`load_helios_columns`).
+    """
+    columns = _helios_columns(helios_jobs)
+    run_times = columns['runtime']
+    num_gpus = columns['num_gpus']
+    num_cpus = columns['num_cpus']
+    return JobTable(idx=np.arange(len(run_times)),
+                    arrival=columns['arrival'],
+                    runtime=run_times,
+                    num_gpus=num_gpus,
+                    num_cpus=num_cpus,
+                    cost=(num_gpus + num_cpus / 53.0) * run_times,
+                    nodes=columns['nodes'])
 
 
 def generate_synthetic_jobs(arrival_rate=8.0,
                             job_runtime=1.0,
                             cv_factor=1.0,
                             total_jobs=20000,
-                            seed=2024):
+                            seed=2024) -> JobTable:
     """Generates GPU jobs based on a Poisson arrival distribution and exponential runtime distribution.
     """
-    total_jobs = total_jobs
-
+    total_jobs = int(total_jobs)
+    rng = np.random.default_rng(seed)
     # Arrival time for jobs
-    np.random.seed(seed)
-    alpha = (1.0 / cv_factor)**2
-    interarrival_times = np.array([
-        np.random.gamma(shape=alpha, scale=1 / (alpha * arrival_rate))
-        for _ in range(total_jobs - 1)
-    ])
-    # interarrival_times = np.random.exponential(scale=1 / arrival_rate,
-    #                                            size=total_jobs - 1)
-    interarrival_times = np.insert(interarrival_times, 0, 0)
-    arrival_times = np.cumsum(interarrival_times)
+    arrival_times = generate_arrival_times(rng, arrival_rate, cv_factor,
+                                           total_jobs)
 
     # Run time for jobs
-    run_times = np.random.exponential(scale=job_runtime, size=total_jobs)
+    run_times = rng.exponential(scale=job_runtime, size=total_jobs)
 
     # Get GPU resources
-    proc_jobs = []
     categorical = [0.7, 0.15, 0.1, 0.05]
     sizes = [1, 2, 4, 8]
-    for idx in range(total_jobs):
-
-        resources_dict = {'GPUs': np.random.choice(sizes, p=categorical)}
-        temp = run_times[idx]
-        cost = resources_dict['GPUs'] * temp
-        proc_jobs.append(
-            Job(idx,
-                arrival=arrival_times[idx],
-                runtime=temp,
-                resources=resources_dict,
-                cost=cost))
-    return proc_jobs
+    num_gpus = rng.choice(sizes, size=total_jobs, p=categorical)
+    return JobTable(idx=np.arange(total_jobs),
+                    arrival=arrival_times,
+                    runtime=run_times,
+                    num_gpus=num_gpus,
+                    cost=num_gpus * run_times)
@@ -0,0 +1,127 @@
+import bisect
+import heapq
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from skyburst.job import Job
+
+
+class JobQueue(object):
+    """Scheduler queue that is kept ordered by a scheduling policy.
+
+    The sort key of a job (see `utils.generate_sorting_function`) is fixed
+    once the job is enqueued, so it is computed once at insert time. Jobs are
+    ordered by `(key, insertion order)`, which matches stably re-sorting a
+    list of jobs every timestep. Inserts and deletes locate the job with a
+    binary search, so the queue never has to be re-sorted.
+    """
+    def __init__(self, sort_func: Callable[[Job], Any]):
+        self.sort_func = sort_func
+        # Sorted list of (sort key, insertion order), parallel to `_jobs`.
+        self._keys = []
+        self._jobs = []
+        # Maps Job ID to its (sort key, insertion order) entry.
+        self._entries = {}
+        # Insertion order of the next enqueued job.
+        self._counter = 0
+        # If set to a list, (is enqueue, entry, job) of each enqueue/dequeue is appended to it (see `QueueSnapshots`).
+        self.journal = None
+
+    def append(self, job: Job):
+        entry = (self.sort_func(job), self._counter)
+        self._counter += 1
+        idx = bisect.bisect_right(self._keys, entry)
+        self._keys.insert(idx, entry)
+        self._jobs.insert(idx, job)
+        self._entries[job.idx] = entry
+        if self.journal is not None:
+            self.journal.append((True, entry, job))
+
+    def remove(self, job: Job):
+        entry = self._entries.pop(job.idx)
+        idx = bisect.bisect_left(self._keys, entry)
+        del self._keys[idx]
+        del self._jobs[idx]
+        if self.journal is not None:
+            self.journal.append((False, entry, job))
+
+    def order_key(self, job: Job):
+        """Returns the key that orders `job` in the queue."""
+        return self._entries[job.idx]
+
+    def __contains__(self, job: Job) -> bool:
+        return job.idx in self._entries
+
+    def __getitem__(self, idx: int) -> Job:
+        return self._jobs[idx]
+
+    def __iter__(self) -> Iterator[Job]:
+        return iter(self._jobs)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __repr__(self):
+        return f'JobQueue({self._jobs})'
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Sort functions are lambdas, the simulator sets `sort_func` again on resume.
+        state['sort_func'] = None
+        return state
+
+
+class ArrivalStream(object):
+    """Jobs that have yet to arrive to the scheduler.
+
+    Trace jobs are read in arrival order with a cursor, from a list or from
+    a `JobTable` (which creates each `Job` only once it is next to arrive).
+    Jobs preempted from
+    the cloud (Star-Wait) arrive again at `new_arrival` and are kept in a
+    small side heap. The front of the stream is the earliest of the two; on
+    ties, trace jobs arrive before re-arrivals and re-arrivals arrive in the
+    order they were pushed.
+    """
+    def __init__(self, jobs: Sequence[Job]):
+        self._jobs = jobs
+        self._cursor = 0
+        # Job at the cursor, read once so that the same object is returned until it is popped.
+        self._head = None
+        # Min-heap of (new arrival, push order, job) for cloud re-arrivals.
+        self._rearrivals = []
+        # Push order of the next re-arrival.
+        self._counter = 0
+
+    def trace_head(self) -> Optional[Job]:
+        """Returns the next job in the trace that has not arrived yet."""
+        if self._head is None and self._cursor < len(self._jobs):
+            self._head = self._jobs[self._cursor]
+        return self._head
+
+    def _front_is_rearrival(self) -> bool:
+        job = self.trace_head()
+        return bool(self._rearrivals) and (
+            job is None or self._rearrivals[0][0] < job.arrival)
+
+    def peek(self) -> Optional[Job]:
+        """Returns the job at the front of the stream without removing it."""
+        if self._front_is_rearrival():
+            return self._rearrivals[0][2]
+        return self.trace_head()
+
+    def pop(self) -> Job:
+        """Removes and returns the job at the front of the stream."""
+        if self._front_is_rearrival():
+            return heapq.heappop(self._rearrivals)[2]
+        job = self.trace_head()
+        self._head = None
+        self._cursor += 1
+        return job
+
+    def push_rearrival(self, job: Job):
+        """Adds a job preempted from the cloud, arriving at `new_arrival`."""
+        heapq.heappush(self._rearrivals,
+                       (job.new_arrival, self._counter, job))
+        self._counter += 1
+
+    def __len__(self) -> int:
+        return len(self._jobs) - self._cursor + len(self._rearrivals)
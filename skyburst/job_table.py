@@ -0,0 +1,200 @@
+import copy
+import hashlib
+import os
+from typing import List
+
+import numpy as np
+
+from skyburst.job import Job, decode_gpu_masks
+
+
+# Static columns, as saved by `JobTable.save` (and constructor arguments).
+STATIC_COLUMNS = ('idx', 'arrival', 'runtime', 'num_gpus', 'num_cpus', 'cost',
+                  'nodes', 'initial_deadline')
+
+# Element-wise `decode_gpu_masks` over an object array.
+_decode_gpu_masks = np.frompyfunc(decode_gpu_masks, 1, 1)
+
+
+def _make_job(idx, arrival, runtime, deadline, num_gpus, num_cpus, cost,
+              nodes):
+    return Job(idx,
+               arrival=arrival,
+               runtime=runtime,
+               deadline=deadline,
+               resources={
+                   'GPUs': num_gpus,
+                   'CPUs': num_cpus
+               },
+               cost=cost,
+               nodes=nodes)
+
+
+class JobTable(object):
+    """Columnar store of a job trace.
+
+    Static job fields (idx, arrival, runtime, GPUs, CPUs, nodes, cost) are
+    kept as NumPy columns and are never modified by the simulator. Per-run
+    state (start, deadline, state, new arrival, cloud preemption and
+    allocated GPUs) lives in separate columns. Each simulator run works on
+    a `run_copy` that shares the static columns and has fresh state
+    columns, so one table can be reused across simulator runs instead of
+    deep copying a list of `Job` objects per run.
+    """
+    def __init__(self,
+                 idx,
+                 arrival,
+                 runtime,
+                 num_gpus,
+                 num_cpus=None,
+                 cost=None,
+                 nodes=None,
+                 deadline=None):
+        self.idx = np.asarray(idx)
+        num_jobs = len(self.idx)
+        self.arrival = np.asarray(arrival)
+        self.runtime = np.asarray(runtime)
+        self.num_gpus = np.asarray(num_gpus)
+        self.num_cpus = np.zeros(num_jobs, dtype=np.int64) \
+            if num_cpus is None else np.asarray(num_cpus)
+        self.cost = np.zeros(num_jobs) if cost is None else np.asarray(cost)
+        self.nodes = np.ones(num_jobs, dtype=np.int64) \
+            if nodes is None else np.asarray(nodes)
+        # Deadline given with the trace, the simulator sets the real deadline on arrival.
+        self.initial_deadline = np.zeros(num_jobs) \
+            if deadline is None else np.asarray(deadline)
+        # Maps Job ID to its row in the table.
+        self._rows = dict(zip(self.idx.tolist(), range(num_jobs)))
+        self.reset()
+
+    @classmethod
+    def from_jobs(cls, jobs: List[Job]) -> 'JobTable':
+        """Builds a table from a list of `Job` objects."""
+        return cls(idx=[j.idx for j in jobs],
+                   arrival=[j.arrival for j in jobs],
+                   runtime=[j.runtime for j in jobs],
+                   num_gpus=[j.num_gpus for j in jobs],
+                   num_cpus=[j.num_cpus for j in jobs],
+                   cost=[j.cost for j in jobs],
+                   nodes=[j.nodes for j in jobs],
+                   deadline=[j.deadline for j in jobs])
+
+    def save(self, dir_path: str):
+        """Saves the static columns as one `.npy` file each under `dir_path`."""
+        os.makedirs(dir_path, exist_ok=True)
+        for column in STATIC_COLUMNS:
+            np.save(os.path.join(dir_path, f'{column}.npy'),
+                    getattr(self, column))
+
+    @classmethod
+    def load(cls, dir_path: str, mmap: bool = True) -> 'JobTable':
+        """Loads a table saved with `save`.
+
+        With `mmap`, the static columns are memory-mapped read-only, so
+        processes loading the same table share one copy in the page cache.
+        """
+        mmap_mode = 'r' if mmap else None
+        columns = {
+            column: np.load(os.path.join(dir_path, f'{column}.npy'),
+                            mmap_mode=mmap_mode)
+            for column in STATIC_COLUMNS
+        }
+        columns['deadline'] = columns.pop('initial_deadline')
+        return cls(**columns)
+
+    def digest(self) -> str:
+        """Returns a hash of the static columns (dtypes and values)."""
+        sha = hashlib.sha256()
+        for column in STATIC_COLUMNS:
+            values = np.ascontiguousarray(getattr(self, column))
+            sha.update(f'{column}:{values.dtype.str}:{values.shape}'.encode())
+            sha.update(values.tobytes())
+        return sha.hexdigest()
+
+    def run_copy(self) -> 'JobTable':
+        """Returns a shallow copy with its own (cleared) state columns.
+
+        The copy shares the static columns with this table, so recording
+        jobs into it leaves this table untouched.
+        """
+        table = copy.copy(self)
+        table.reset()
+        return table
+
+    def reset(self):
+        """Clears the per-run state columns."""
+        num_jobs = len(self)
+        self.start = np.full(num_jobs, np.nan)
+        self.deadline = self.initial_deadline.astype(np.float64)
+        self.state = np.full(num_jobs, None, dtype=object)
+        self.new_arrival = np.full(num_jobs, -1.0)
+        self.preempt_cloud = np.zeros(num_jobs, dtype=bool)
+        # (node index, GPU bitmask) pairs, see `Job.allocated_gpu_masks`.
+        self.allocated_gpu_masks = np.empty(num_jobs, dtype=object)
+
+    def to_jobs(self) -> List[Job]:
+        """Creates fresh `Job` objects (in table order) for a simulator run."""
+        columns = zip(self.idx.tolist(), self.arrival.tolist(),
+                      self.runtime.tolist(), self.initial_deadline.tolist(),
+                      self.num_gpus.tolist(), self.num_cpus.tolist(),
+                      self.cost.tolist(), self.nodes.tolist())
+        return [_make_job(*row) for row in columns]
+
+    def __getitem__(self, row: int) -> Job:
+        """Creates a fresh `Job` for row `row` (jobs are created lazily by `ArrivalStream`)."""
+        return _make_job(self.idx[row].item(), self.arrival[row].item(),
+                         self.runtime[row].item(),
+                         self.initial_deadline[row].item(),
+                         self.num_gpus[row].item(), self.num_cpus[row].item(),
+                         self.cost[row].item(), self.nodes[row].item())
+
+    def record(self, job: Job, result_sink=None):
+        """Writes the final state of a finished job into the state columns.
+
+        With `result_sink` (see `result_sink.ParquetResultSink`), the job is
+        also written to the sink.
+        """
+        row = self._rows[job.idx]
+        self.start[row] = job.start
+        self.deadline[row] = job.deadline
+        self.state[row] = job.state
+        self.new_arrival[row] = job.new_arrival
+        self.preempt_cloud[row] = job.preempt_cloud
+        if result_sink is not None:
+            result_sink.write(job)
+        else:
+            # Allocations are only kept in memory if they are not streamed out.
+            self.allocated_gpu_masks[row] = job.allocated_gpu_masks
+
+    def result_columns(self):
+        """Returns the per-job columns of `run_simulator`'s result dict, sorted by Job ID."""
+        order = np.argsort(self.idx, kind='stable')
+        return {
+            'idx': self.idx[order],
+            'arrival': self.arrival[order],
+            'start': self.start[order],
+            'runtime': self.runtime[order],
+            'deadline': self.deadline[order],
+            'num_gpus': self.num_gpus[order],
+            'state': self.state[order].astype(str),
+            # Decoded to {node index: [GPU indexes]} dicts, as read by notebooks and
+            # plots. GPU lists are in ascending order, see `job.decode_gpu_masks`.
+            'allocated_gpus': _decode_gpu_masks(self.allocated_gpu_masks[order]),
+        }
+
+    def stats_columns(self):
+        """Returns the per-job columns read by `stats.compute_stats`, sorted by Job ID."""
+        order = np.argsort(self.idx, kind='stable')
+        return {
+            'idx': self.idx[order],
+            'arrival': self.arrival[order],
+            'start': self.start[order],
+            'runtime': self.runtime[order],
+            'num_gpus': self.num_gpus[order],
+            'state': self.state[order],
+            'cost': self.cost[order],
+            'preempt_cloud': self.preempt_cloud[order],
+        }
+
+    def __len__(self) -> int:
+        return len(self.idx)
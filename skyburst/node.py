@@ -1,4 +1,7 @@
 class Node(object):
+    __slots__ = ('num_gpus', 'num_cpus', 'gpu_dict', 'reserved_gpus',
+                 'free_gpus', 'free_cpus', 'free_gpu_mask')
+
     def __init__(self, num_gpus, num_cpus):
         self.num_gpus = num_gpus
         self.num_cpus = num_cpus
@@ -11,6 +14,8 @@ class Node(object):
             self.reserved_gpus[idx] = None
         self.free_gpus = self.num_gpus
         self.free_cpus = self.num_cpus
+        # Bitmask of free GPUs (bit i is set iff gpu_dict[i] is None).
+        self.free_gpu_mask = (1 << self.num_gpus) - 1
 
     def __repr__(self):
         return f'GPU: {self.gpu_dict}, CPU: {self.num_cpus - self.free_cpus}'
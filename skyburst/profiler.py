@@ -0,0 +1,94 @@
+import cProfile
+import os
+import time
+from typing import Any, Dict, Optional
+
+
+class PhaseProfiler(object):
+    """Opt-in instrumentation of the simulator loop.
+
+    The simulator calls `lap(phase)` at the end of each phase of a timestep;
+    the wall time since the previous lap is charged to that phase. Counters
+    (fit attempts, failed fits, ...) are summed with `count`, and sizes of the
+    queue, calendar heaps and cluster are sampled with `observe`, which keeps
+    their max and mean. Optionally, the whole loop also runs under cProfile
+    and its stats are dumped to `cprofile_path` (readable with `pstats`).
+
+    When profiling is off the simulator does not create a profiler, so the
+    only cost is an `is not None` check per phase.
+    """
+    def __init__(self, cprofile_path: Optional[str] = None):
+        self.cprofile_path = cprofile_path
+        # Maps phase to cumulative wall time (seconds) and # of laps.
+        self.phase_time = {}
+        self.phase_calls = {}
+        self.counters = {}
+        # Maps observed quantity to [max, sum, # of samples].
+        self._observed = {}
+        self._cprofile = None
+        self._start = None
+        self._last = None
+        self._total_time = 0.0
+
+    def start(self):
+        if self.cprofile_path is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Charges the wall time since the last lap to `phase`."""
+        now = time.perf_counter()
+        self.phase_time[phase] = self.phase_time.get(phase, 0.0) + now - self._last
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+        self._last = now
+
+    def count(self, counter: str, n: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def record_fit(self, can_fit: bool):
+        """Counts an attempt to place a job on the cluster."""
+        self.count('fit_attempts')
+        if not can_fit:
+            self.count('failed_fits')
+
+    def observe(self, quantity: str, value: float):
+        observed = self._observed.get(quantity)
+        if observed is None:
+            self._observed[quantity] = [value, value, 1]
+        else:
+            observed[0] = max(observed[0], value)
+            observed[1] += value
+            observed[2] += 1
+
+    def stop(self):
+        self._total_time = time.perf_counter() - self._start
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            dir_path = os.path.dirname(os.path.abspath(self.cprofile_path))
+            os.makedirs(dir_path, exist_ok=True)
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the profile as plain dicts (stored in `result_dict['stats']['profile']`)."""
+        return {
+            'total_time': self._total_time,
+            'phases': {
+                phase: {
+                    'time': self.phase_time[phase],
+                    'calls': self.phase_calls[phase],
+                }
+                for phase in self.phase_time
+            },
+            'counters': dict(self.counters),
+            'sizes': {
+                quantity: {
+                    'max': max_value,
+                    'mean': total / num_samples,
+                }
+                for quantity, (max_value, total,
+                               num_samples) in self._observed.items()
+            },
+            'cprofile_path': self.cprofile_path,
+        }
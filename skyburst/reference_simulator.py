@@ -0,0 +1,758 @@
+"""Original simulator loop, kept as the reference engine of `differential`.
+
+Every timestep rescans the arrival list, the queue and the active jobs,
+re-sorts the queue and deep-copies the job trace, exactly like the
+simulator did before the event calendar, `JobQueue`, `ArrivalStream`,
+completion heap and `JobTable` rewrite. `ReferenceCluster`,
+`ReferenceNode` and `ReferenceJob` are the original list-based cluster
+state and job, where GPU allocations are lists in allocation order. Only
+the event log (see `simulator.DEFAULT_SIMULATOR_SPEC['event_log']`) is
+added, so `differential` can check the rewritten simulator against it.
+It is slow, only use it to test.
+"""
+import copy
+import numpy as np
+from typing import Any, Dict, List, Optional, Union
+
+from tabulate import tabulate
+from tqdm import tqdm
+
+from skyburst import utils, waiting_policy
+from skyburst.job import Job
+from skyburst.job_table import JobTable
+from skyburst.simulator import DEFAULT_SIMULATOR_SPEC, make_rng
+
+
+class ReferenceJob(object):
+    def __init__(self,
+                 idx: int,
+                 arrival: float = 0.0,
+                 runtime: float = 0.0,
+                 deadline: float = 0.0,
+                 resources: dict = None,
+                 cost: float = 0.0,
+                 nodes: int = 1):
+        self.idx = idx
+        # Original arrival time for job.
+        self.arrival = arrival
+        self.runtime = runtime
+        self.deadline = deadline
+        self.resources = resources
+        if 'GPUs' in resources:
+            self.num_gpus = resources['GPUs']
+        else:
+            self.resources['GPUs'] = 0
+            self.num_gpus = 0
+
+        if 'CPUs' in resources:
+            self.num_cpus = resources['CPUs']
+        else:
+            self.resources['CPUs'] = 0
+            self.num_cpus = 0
+
+        self.cost = cost
+        self.nodes = nodes
+
+        # State of the Job
+        self.state = None
+        # Starting time of the job on the local cluster, if none, the job was ran on the cloud.
+        self.start = None
+
+        # Keeps track of which GPU(s) the job ran on.
+        self.allocated_gpus = {}
+
+        # For backfill scheduling, job immediately executed after Job idx `block_job_idx` completes.
+        self.block_job_idx = None
+
+        # This field keeps track if the job has been on the cloud before and was preemepted from running on cloud.
+        self.preempt_cloud = False
+        # New arrival time for job.
+        self.new_arrival = -1
+
+    @classmethod
+    def from_job(cls, job: Job):
+        return cls(idx=job.idx,
+                   arrival=job.arrival,
+                   runtime=job.runtime,
+                   deadline=job.deadline,
+                   resources=dict(job.resources),
+                   cost=job.cost,
+                   nodes=job.nodes)
+
+    @property
+    def allocated_gpu_masks(self):
+        """Allocated GPUs as (node index, GPU bitmask) pairs, as logged by `run_simulator`."""
+        return tuple((n_idx, utils.bits_to_mask(gpu_list))
+                     for n_idx, gpu_list in self.allocated_gpus.items())
+
+    def __eq__(self, other):
+        return self.idx == other.idx
+
+    def __hash__(self):
+        return hash(str(self.idx))
+
+    def set_deadline(self, deadline):
+        self.deadline = deadline
+
+
+class ReferenceNode(object):
+    def __init__(self, num_gpus, num_cpus):
+        self.num_gpus = num_gpus
+        self.num_cpus = num_cpus
+        # Maps gpu index to job occupying that gpu
+        self.gpu_dict = {}
+        # Maps gpu index to job reserving that gpu
+        self.reserved_gpus = {}
+        for idx in range(self.num_gpus):
+            self.gpu_dict[idx] = None
+            self.reserved_gpus[idx] = None
+        self.free_gpus = self.num_gpus
+        self.free_cpus = self.num_cpus
+
+
+class ReferenceCluster(object):
+    def __init__(self,
+                 num_nodes,
+                 num_gpus_per_node=8,
+                 num_cpus_per_node=96,
+                 binpack='first-fit',
+                 backfill=False):
+        self.num_nodes = num_nodes
+        self.num_gpus_per_node = num_gpus_per_node
+        self.num_cpus_per_node = num_cpus_per_node
+        # List of nodes in the cluster. Assumed homogeneity.
+        self.nodes = [
+            ReferenceNode(num_gpus_per_node, num_cpus_per_node)
+            for _ in range(num_nodes)
+        ]
+        # Maps Job ID to Job, active jobs running in the cluster
+        self.active_jobs = {}
+        # Maps Job ID to Job, reserved jobs to be scheduled in cluster
+        self.reserved_jobs = {}
+        # This determines whether to binpack with backfill scheduling.
+        self.backfill = backfill
+        # Defines the bin packing algorithm, `first-fit`, `best-fit`.
+        self.binpack = binpack
+
+    def try_fit_v2(self, cur_timestamp, job):
+        num_gpus = job.resources['GPUs']
+        num_cpus = job.resources['CPUs']
+        num_cpus_per_node = num_cpus / job.nodes
+
+        free_gpus = [n.free_gpus for n in self.nodes]
+        free_cpus = [n.free_cpus for n in self.nodes]
+        # Quick check, no hope of fitting onto cluster :(
+        if num_gpus > sum(free_gpus) or num_cpus > sum(free_cpus):
+            return False, []
+
+        # Generate job GPU demands
+        if job.nodes == 1:
+            if num_gpus > self.num_gpus_per_node:
+                # Assume worst case colocation
+                # Multinode case, i.e. 26 GPUs, 8 GPU/node cluster -> job_gpu_demands = [8,8,8,2]
+                job_gpu_demands = [self.num_gpus_per_node] * int(
+                    num_gpus / self.num_gpus_per_node)
+                if num_gpus % self.num_gpus_per_node:
+                    job_gpu_demands.append(num_gpus % self.num_gpus_per_node)
+            else:
+                job_gpu_demands = [num_gpus]
+        else:
+            job_gpu_demands = [int(num_gpus / job.nodes)] * job.nodes
+
+        # =============================================================================
+        # Generate Job Plans
+        # =============================================================================
+        # Go through free space only first, generate partial plan with free space
+        node_free_gpu_list = [
+            list(range(self.num_gpus_per_node)) for _ in range(self.num_nodes)
+        ]
+        node_free_cpu_count = [self.num_cpus_per_node] * self.num_nodes
+
+        # Go through active jobs
+        for a_job_idx, a_job in self.active_jobs.items():
+            a_job_cpu_per_node = a_job.num_cpus / a_job.nodes
+            for n_idx, gpu_list in a_job.allocated_gpus.items():
+                for gpu_idx in gpu_list:
+                    node_free_gpu_list[n_idx].remove(gpu_idx)
+                node_free_cpu_count[n_idx] -= a_job_cpu_per_node
+
+        # Go through reserved jobs
+        for r_job_idx, r_job in self.reserved_jobs.items():
+            if r_job.start < cur_timestamp + job.runtime:
+                r_job_cpu_per_node = r_job.num_cpus / r_job.nodes
+                for n_idx, gpu_list in r_job.allocated_gpus.items():
+                    for gpu_idx in gpu_list:
+                        if not self.nodes[n_idx].gpu_dict[gpu_idx]:
+                            node_free_gpu_list[n_idx].remove(gpu_idx)
+                node_free_cpu_count[n_idx] -= r_job_cpu_per_node
+
+        node_free_gpu_count = [len(g) for g in node_free_gpu_list]
+
+        node_free_count = [(i, node_free_gpu_count[i], node_free_cpu_count[i])
+                           for i in range(len(node_free_gpu_count))]
+        if self.binpack == 'first-fit':
+            pass
+        elif self.binpack == 'best-fit':
+            # Sort by nodes with the least free GPU(s).
+            node_free_count.sort(key=lambda x: x[1])
+        elif self.binpack == 'worst-fit':
+            # Sort by nodes with the most free GPU(s). Don't use, very bad.
+            node_free_count.sort(key=lambda x: x[1], reverse=True)
+        elif self.binpack == 'tetris':
+            pass
+        else:
+            raise ValueError(f'Invalid allocation strategy {self.binpack}!')
+
+        # Maps node idx to list of gpu indexes for the job to take.
+        node_idx_taken = {}
+        for list_idx, gpu_demand in enumerate(list(job_gpu_demands)):
+            for n_idx, free_gpus, free_cpus in node_free_count:
+                if n_idx in node_idx_taken:
+                    continue
+                if free_gpus >= gpu_demand:
+                    if free_cpus >= num_cpus_per_node:
+                        node_idx_taken[n_idx] = node_free_gpu_list[
+                            n_idx][:gpu_demand]
+                        job_gpu_demands.remove(gpu_demand)
+                        break
+
+        # If there are still demands that cannot be satisifed via free and preempted jobs,
+        # it cannot be scheduled on the cluster.
+        if job_gpu_demands:
+            return False, []
+
+        # =============================================================================
+        # Execute Job Plans
+        # =============================================================================
+        # Job plan stores in `node_idx_taken`: {Node Index -> List of GPU Indexes}
+        for n_idx, gpu_demand_list in node_idx_taken.items():
+            node = self.nodes[n_idx]
+            node.free_gpus -= len(gpu_demand_list)
+            node.free_cpus -= num_cpus_per_node
+            if node.free_gpus < 0 or node.free_cpus < 0:
+                raise ValueError('Ran out of cluster resources!')
+            for idx in gpu_demand_list:
+                if node.gpu_dict[idx] is not None:
+                    raise ValueError('Generated execution plan is incorrect.')
+                node.gpu_dict[idx] = job
+            job.allocated_gpus[n_idx] = gpu_demand_list
+        job.start = cur_timestamp
+        self.active_jobs[job.idx] = job
+
+        return True, []
+
+    # Backfill Scheduling: Reserve blocking job.
+    def try_reserve(self, cur_timestamp, job):
+        active_job_list = [a_job for a_job in self.active_jobs.values()]
+        active_job_list.sort(key=lambda x: x.start + x.runtime)
+
+        num_gpus = job.num_gpus
+        # Generate job GPU demands
+        if num_gpus > self.num_gpus_per_node:
+            # Multinode case, i.e. 26 GPUs, 8 GPU/node cluster -> job_gpu_demands = [8,8,8,2]
+            job_gpu_demands = [self.num_gpus_per_node] * int(
+                num_gpus / self.num_gpus_per_node)
+            if num_gpus % self.num_gpus_per_node:
+                job_gpu_demands.append(num_gpus % self.num_gpus_per_node)
+        else:
+            job_gpu_demands = [num_gpus]
+
+        node_free_list = [[] for _ in range(self.num_nodes)]
+        node_free_count = [0] * self.num_nodes
+        for n_idx, node in enumerate(self.nodes):
+            for gpu_idx in range(self.num_gpus_per_node):
+                if node.gpu_dict[gpu_idx] or node.reserved_gpus[gpu_idx]:
+                    continue
+                node_free_count[n_idx] += 1
+                node_free_list[n_idx].append(gpu_idx)
+
+        for a_job in active_job_list:
+            if a_job.start + a_job.runtime > job.deadline - job.runtime:
+                return False
+            for n_idx, gpu_list in a_job.allocated_gpus.items():
+                for gpu_idx in gpu_list:
+                    if self.nodes[n_idx].reserved_gpus[gpu_idx]:
+                        continue
+                    node_free_list[n_idx].append(gpu_idx)
+                    node_free_count[n_idx] += 1
+
+            node_indexes = utils.is_subset(node_free_count, job_gpu_demands)
+            if node_indexes:
+                for idx, n_idx in enumerate(node_indexes):
+                    gpu_list = node_free_list[n_idx][-job_gpu_demands[idx]:]
+                    job.allocated_gpus[n_idx] = gpu_list
+                    cur_node = self.nodes[n_idx]
+                    for gpu_idx in gpu_list:
+                        cur_node.reserved_gpus[gpu_idx] = job
+                self.reserved_jobs[job.idx] = job
+                job.block_job_idx = a_job.idx
+                job.start = a_job.start + a_job.runtime
+                return True
+        raise ValueError('I should not go here!')
+
+    def try_clear(self, t: float):
+        """Clears cluster of completed jobs at time t.
+        """
+        completed_jobs = []
+        # Free jobs on the cluster which have completed.
+        for job_idx, job in self.active_jobs.items():
+            # If job has finished before time t...
+            if t >= job.start + job.runtime:
+                for node_idx, gpu_list in job.allocated_gpus.items():
+                    cur_node = self.nodes[node_idx]
+                    node_gpu_dict = cur_node.gpu_dict
+                    for gpu_idx in gpu_list:
+                        node_gpu_dict[gpu_idx] = None
+                    cur_node.free_gpus += len(gpu_list)
+                    cur_node.free_cpus += job.num_cpus / job.nodes
+                completed_jobs.append(job)
+
+        # Clears cluster of completed jobs.
+        c_job_idx = []
+        for job in completed_jobs:
+            job.state = 'LOCAL'
+            c_job_idx.append(job.idx)
+            del self.active_jobs[job.idx]
+
+        # Go through reserved jobs
+        r_job_delete_idx = []
+        for r_job_idx, r_job in self.reserved_jobs.items():
+            # Move reserved job to active jobs
+            if r_job.block_job_idx in c_job_idx:
+                if t > r_job.start:
+                    raise ValueError('sus')
+                for node_idx, gpu_list in r_job.allocated_gpus.items():
+                    cur_node = self.nodes[node_idx]
+                    for gpu_idx in gpu_list:
+                        cur_node.gpu_dict[gpu_idx] = r_job
+                        cur_node.reserved_gpus[gpu_idx] = None
+                    cur_node.free_gpus -= len(gpu_list)
+                    cur_node.free_cpus -= r_job.num_cpus / r_job.nodes
+                    if cur_node.free_gpus < 0 or cur_node.free_cpus < 0:
+                        raise ValueError('Reserved job, insufficient space.')
+                r_job_delete_idx.append(r_job_idx)
+                self.active_jobs[r_job_idx] = r_job
+
+        for r_job_idx in r_job_delete_idx:
+            del self.reserved_jobs[r_job_idx]
+
+        return completed_jobs
+
+
+def run_simulator(
+        jobs: Union[List[Job], JobTable],
+        simulator_spec: Optional[Dict[str, Any]] = DEFAULT_SIMULATOR_SPEC):
+    """Executes the original simulator loop over a fixed set of jobs.
+
+    Takes the same arguments as `simulator.run_simulator` and returns the
+    same per-job columns, stats and (if `event_log` is set) event log.
+    Snapshots, checkpoints, profiling, result streaming and
+    `cluster_backend` are not supported.
+    """
+    _simulator_spec = DEFAULT_SIMULATOR_SPEC.copy()
+    _simulator_spec.update(simulator_spec)
+    simulator_spec = _simulator_spec
+    # Time estimator errors are drawn like in `simulator.run_simulator`.
+    rng = make_rng(simulator_spec)
+
+    sched_alg = simulator_spec['sched_alg']
+    sort_func = utils.generate_sorting_function(sched_alg)
+
+    waiting_policy_str = simulator_spec['waiting_policy'].split('-')
+    assert len(waiting_policy_str) <= 2
+    if len(waiting_policy_str) == 2:
+        simulator_spec['waiting_policy'] = waiting_policy_str[0]
+        simulator_spec['waiting_factor'] = float(waiting_policy_str[1])
+
+    waiting_fn = waiting_policy.lookup_linear_function(
+        simulator_spec['waiting_policy'],
+        waiting_factor=simulator_spec['waiting_factor'])
+    binpack_alg = simulator_spec['binpack_alg']
+    backfill = simulator_spec['backfill']
+    loop = simulator_spec['loop']
+    predict_wait = simulator_spec['predict_wait']
+    clip_time = simulator_spec['clip_time']
+    max_queue_length = simulator_spec['max_queue_length']
+    time_estimator_error = simulator_spec['time_estimator_error'] / 100.0
+    long_job_thres = simulator_spec['long_job_thres']
+    preempt_cloud_ratio = simulator_spec['preempt_cloud_ratio']
+    data_gravity = simulator_spec['data_gravity']
+    if preempt_cloud_ratio >0:
+        assert long_job_thres > 0, 'Must set long_job_thres > 0 if preempt_cloud_ratio > 0'
+    assert not (
+        backfill and loop
+    ), f'Must only set one option to be True - backfill:{backfill}, loop:{loop} '
+
+    # Initialize simulator variables
+    if not isinstance(jobs, JobTable):
+        jobs = JobTable.from_jobs(jobs)
+    jobs = [ReferenceJob.from_job(job) for job in jobs.to_jobs()]
+    jobs = copy.deepcopy(jobs)
+    queue = []
+    finished_jobs = []
+    cloud_cost = 0.0
+    # Create fake cluster. The cluster is homogeneous.
+    cluster = ReferenceCluster(
+        num_nodes=simulator_spec['cluster_size'],
+        num_gpus_per_node=simulator_spec['gpus_per_node'],
+        num_cpus_per_node=simulator_spec['cpus_per_node'],
+        backfill=backfill,
+        binpack=binpack_alg)
+    t = 0
+    pbar = tqdm(total=len(jobs),
+                desc="Jobs progress: ",
+                position=simulator_spec['pbar_idx'])
+
+    total_cloud_jobs = 0
+    # Scheduling decisions, in the order they are made.
+    event_log = [] if simulator_spec['event_log'] else None
+    # Simulation Loop - Continues until all jobs have passed and the queue is empty and the cluster has no more jobs.
+    while len(jobs) > 0 or len(queue) > 0 or cluster.active_jobs:
+        # Clear cluster of jobs that have completed
+        completed_jobs = cluster.try_clear(t)
+        finished_jobs.extend(completed_jobs)
+        if event_log is not None:
+            for job in completed_jobs:
+                event_log.append((t, 'complete', job.idx, None))
+
+        # Check for jobs that have waited too long (move to cloud).
+        i = 0
+        while i < len(queue):
+            job = queue[i]
+            # If job has timed out, send to cloud.
+            if t > job.deadline - job.runtime:
+                raise ValueError(
+                    f'Job {job.idx} has timed out: {t} > {job.deadline}')
+            elif t == job.deadline - job.runtime:
+                queue.remove(job)
+                job.state = 'TIMEOUT-CLOUD'
+                # Shortcut: Job can predict it will go to cloud or not, if so, it would have began running at job.arrival.
+                # Perfect Oracle
+                if predict_wait == 1:
+                    job.start = job.arrival
+                elif predict_wait == 0 or predict_wait == 2:
+                    job.start = job.deadline - job.runtime
+                else:
+                    raise ValueError(
+                        f'Predict wait {predict_wait} wrong value!')
+
+                if preempt_cloud_ratio > 0:
+                    # If a job has not been prempted to the cloud before.
+                    if not job.preempt_cloud:
+                        # Emulate preemption from cloud back to onprem.
+                        if job.runtime > long_job_thres:
+                            # Job will run on the cloud for long_job_thres and then move back to onprem.
+                            job.preempt_cloud = True
+                            # The job will arrive again at this time (original arrival + original waiting time + long_job_thres)
+                            job.new_arrival = job.deadline - job.runtime + long_job_thres
+                            job.start = None
+                            job.deadline = None
+                            job.state = None
+
+                            # Here, we add it back into the arrival jobs, sorted by arrival time.
+                            # Finding the correct position for the new object
+                            position = 0
+                            for obj in jobs:
+                                # Design Choice: Should we insert by its original arrival or new arrival?
+                                # Here, we insert by the new arrival.
+                                if obj.arrival > job.new_arrival:
+                                    break
+                                position += 1
+                            # Inserting the object at the found position
+                            jobs.insert(position, job)
+                            # Cloud cost incurred includes the time job ran for LONG_JOB_THRES on the cloud.
+                            cloud_cost += job.cost / (job.runtime/long_job_thres)
+                            pbar.update(-1)
+                            if event_log is not None:
+                                event_log.append((t, 'cloud_preempt', job.idx,
+                                                  job.new_arrival))
+                            continue
+                cloud_cost += job.cost
+                total_cloud_jobs += 1
+                finished_jobs.append(job)
+                if event_log is not None:
+                    event_log.append((t, 'timeout', job.idx, job.start))
+            else:
+                i += 1
+
+        # Add jobs to queue that have arrived. Jobs are assumed to have been ordered by arrival times.
+        i = 0
+        while i < len(jobs):
+            job = jobs[i]
+            if job.arrival < t and job.new_arrival < t:
+                raise ValueError("Should not have entered here!")
+            elif job.arrival == t or job.new_arrival==t:
+                jobs.remove(job)
+                deadline = waiting_fn(job)
+                if job.preempt_cloud:
+                    arrival = job.new_arrival
+                else:
+                    arrival = job.arrival
+
+                if preempt_cloud_ratio > 0:
+                    # Mutate waiting function.
+                    waiting_time = max(0.0, deadline - job.runtime - arrival)
+                    if job.preempt_cloud:
+                        # Star-Wait applies a laonger waiting policy for cloud preempted jobs.
+                        waiting_time = preempt_cloud_ratio * waiting_time
+                    else:
+                        # Star-Wait originally applies No-Wait policy
+                        waiting_time = 0
+                    deadline = arrival + job.runtime + waiting_time
+                job.set_deadline(deadline)
+
+                if deadline == -1 or (preempt_cloud_ratio <0 and job.runtime < long_job_thres):
+                    # For Constant-Wait + No-SJ (job offloading)
+                    job.state = 'TIMEOUT-CLOUD'
+                    job.start = arrival
+                    job.set_deadline(deadline=arrival + job.runtime)
+                    cloud_cost += job.cost
+                    finished_jobs.append(job)
+                    if event_log is not None:
+                        event_log.append((t, 'offload', job.idx, None))
+                else:
+                    # For time estimator ablations.
+                    if time_estimator_error != 0:
+                        original_runtime = job.runtime
+                        mod_runtime = original_runtime + rng.normal(
+                            loc=0.0,
+                            scale=time_estimator_error * original_runtime)
+                        mod_runtime = max(0, mod_runtime)
+                        if 'filter' in simulator_spec['waiting_policy']:
+                            deadline = arrival + simulator_spec[
+                                'waiting_factor'] * (
+                                    job.resources['GPUs'] +
+                                    job.resources['CPUs'] /
+                                    53.0) * mod_runtime + job.runtime
+                    waiting_time = max(0.0,
+                                       deadline - job.runtime - arrival)
+                    if waiting_time < 0:
+                        raise ValueError('Waiting time should not be negative.')
+                    waiting_time = min(clip_time, waiting_time)
+                    job.set_deadline(deadline=arrival + job.runtime +
+                                     waiting_time)
+                    queue.append(job)
+                    if event_log is not None:
+                        event_log.append((t, 'arrive', job.idx, job.deadline))
+                pbar.update(1)
+            else:
+                break
+
+        # Sort the queue based on the queueing order algorithm. (FIFO, SJF, etc.)
+        queue.sort(key=sort_func)
+
+        # Go through queue and fit jobs onto cluster as needed
+        i = 0
+        while i < len(queue):
+            job = queue[i]
+            can_fit, _ = cluster.try_fit_v2(t, job)
+            if can_fit:
+                queue.remove(job)
+                if event_log is not None:
+                    event_log.append(
+                        (t, 'start', job.idx, job.allocated_gpu_masks))
+            elif not loop:
+                break
+            else:
+                i += 1
+
+        # Perform EASY backfilling (assumes time estimator).
+        if backfill:
+            # Reserve the first element of queue that is blocking
+            if queue:
+                job_to_reserve = queue[0]
+                # Reserving large jobs for backfilling (like in Slurm).
+                can_reserve = cluster.try_reserve(t, job_to_reserve)
+                # If can't reserve within reasonble time, leave the job in the queue.
+                if not can_reserve:
+                    pass
+                else:
+                    queue.remove(job_to_reserve)
+                    if event_log is not None:
+                        event_log.append(
+                            (t, 'reserve', job_to_reserve.idx,
+                             (job_to_reserve.start,
+                              job_to_reserve.allocated_gpu_masks)))
+                i = 0
+                while i < len(queue):
+                    job = queue[i]
+                    can_fit, preempted_jobs = cluster.try_fit_v2(t, job)
+                    if can_fit:
+                        queue.remove(job)
+                        if event_log is not None:
+                            event_log.append((t, 'start', job.idx,
+                                              job.allocated_gpu_masks))
+                    else:
+                        i += 1
+
+        if max_queue_length != -1:
+            while len(queue) > max_queue_length:
+                q_job = queue[-1]
+                queue.remove(q_job)
+                q_job.state = 'TIMEOUT-CLOUD'
+                q_job.start = t
+                if q_job.preempt_cloud:
+                    q_job.set_deadline(deadline=q_job.new_arrival +
+                                       q_job.runtime)
+                else:
+                    q_job.set_deadline(deadline=q_job.arrival + q_job.runtime)
+                cloud_cost += q_job.cost
+                finished_jobs.append(q_job)
+                if event_log is not None:
+                    event_log.append((t, 'trim', q_job.idx, None))
+
+        # Skip to next timestep (matches algorithm 1 in paper). The next timestep is the minimum of:
+        # 1) a new job either arrives (first elmeent in job queue)
+        # 2) job finishes on the cluster
+        # 3) existing job in the queue times out.
+
+        # Case 2
+        next_time_list = []
+        for _, job in cluster.active_jobs.items():
+            next_time_list.append(job.start + job.runtime)
+
+        # Case 1
+        if len(jobs) > 0:
+            cur_job = jobs[0]
+            if cur_job.preempt_cloud:
+                next_time_list.append(cur_job.new_arrival)
+            else:
+                next_time_list.append(cur_job.arrival)
+
+        # Case 3
+        if queue:
+            for q in queue:
+                # append time outs
+                next_time_list.append(q.deadline - q.runtime)
+
+        # If there are no jobs left in the cluster and in the job and queue, terminate simulation.
+        if len(next_time_list) == 0:
+            assert len(queue) == 0 and len(jobs) == 0
+            break
+
+        if min(next_time_list) < t and abs(min(next_time_list) - t) > 1e-6:
+            raise ValueError(
+                f'Simulator cannot go back in time, there is a bug: {t}->{min(next_time_list)}'
+            )
+        t = min(next_time_list)
+
+    end_sim_jobs = cluster.try_clear(1e12)
+    assert len(end_sim_jobs) == 0 and len(jobs) == 0 and len(
+        queue) == 0, 'Simulator did not finish properly. There are still running jobs in the cluster.'
+
+    # Sort jobs by their initial arrival (aka idx).
+    finished_jobs.sort(key=lambda x: x.idx)
+
+    # Generate final logs for the simulator.
+    result_dict = {
+        'idx': np.array([j.idx for j in finished_jobs]),
+        'arrival': np.array([j.arrival for j in finished_jobs]),
+        'start': np.array([j.start for j in finished_jobs]),
+        'runtime': np.array([j.runtime for j in finished_jobs]),
+        'deadline': np.array([j.deadline for j in finished_jobs]),
+        'num_gpus': np.array([j.num_gpus for j in finished_jobs]),
+        'state': np.array([j.state for j in finished_jobs]),
+        # GPU lists in ascending order, like `simulator.run_simulator` (see `job.decode_gpu_masks`).
+        'allocated_gpus': np.array([{
+            n_idx: sorted(gpu_list)
+            for n_idx, gpu_list in j.allocated_gpus.items()
+        } for j in finished_jobs]),
+        'simulator_spec': simulator_spec,
+        'stats': {}
+    }
+    if event_log is not None:
+        result_dict['events'] = event_log
+
+    # Computing Simulator stats, such as avg. waiting, avg. JCT, cloud cost, utilization.
+    total_waiting_time = 0.0
+    total_running_time = 0.0
+    num_jobs = 0
+    total_cloud_cost = 0
+    sum_local_space = 0.0
+    sum_cloud_space = 0.0
+
+    start_time = finished_jobs[simulator_spec['warmup_jobs']].arrival
+    end_time = finished_jobs[len(finished_jobs) -
+                             simulator_spec['warmup_jobs'] - 1].arrival
+
+    jct_list = []
+    wait_list = []
+    if data_gravity!=-1:
+        for job in finished_jobs:
+            if job.state == 'TIMEOUT-CLOUD':
+                job.cost = job.cost * (1 + data_gravity/job.runtime)
+                job.runtime = job.runtime + data_gravity
+    for job in finished_jobs:
+        inter_start = max(job.start, start_time)
+        inter_end = min(job.start + job.runtime, end_time)
+        # Cut off beginning and ending of simulator to reach steady state. Calculate the "bleeding".
+        if job.idx < simulator_spec['warmup_jobs'] or job.idx > len(
+                finished_jobs) - simulator_spec['warmup_jobs']:
+            if job.state == 'LOCAL':
+                if inter_end >= inter_start:
+                    sum_local_space += job.num_gpus * (inter_end - inter_start)
+            elif job.state == 'TIMEOUT-CLOUD':
+                if inter_end >= inter_start:
+                    sum_cloud_space += job.num_gpus * (inter_end - inter_start)
+            continue
+        # Moved to cloud
+        if job.state == 'TIMEOUT-CLOUD':
+            total_waiting_time += job.start - job.arrival
+            if inter_end >= inter_start:
+                sum_cloud_space += job.num_gpus * (inter_end - inter_start)
+            total_cloud_cost += job.cost
+        elif job.state == 'LOCAL':
+            total_waiting_time += job.start - job.arrival
+            if inter_end >= inter_start:
+                sum_local_space += job.num_gpus * (inter_end - inter_start)
+            if job.preempt_cloud:
+                total_cloud_cost += job.cost / (job.runtime/long_job_thres)
+        else:
+            raise ValueError(f'Job {job.idx} has invalid state: {job.state}')
+        jct_list.append(job.runtime + job.start - job.arrival)
+        wait_list.append(job.start - job.arrival)
+        total_running_time += job.runtime
+        num_jobs += 1
+
+    result_dict['stats']['total_cloud_cost'] = total_cloud_cost
+    result_dict['stats']['avg_cloud_cost'] = total_cloud_cost / (end_time -
+                                                                 start_time)
+    result_dict['stats']['avg_waiting'] = total_waiting_time / num_jobs
+    result_dict['stats']['avg_jct'] = (total_waiting_time +
+                                       total_running_time) / num_jobs
+    result_dict['stats']['90_jct'] = np.percentile(jct_list,
+                                                   90,
+                                                   method='nearest')
+    result_dict['stats']['99_jct'] = np.percentile(jct_list,
+                                                   99,
+                                                   method='nearest')
+
+    result_dict['stats']['avg_wait'] = np.mean(wait_list)
+    result_dict['stats']['90_wait'] = np.percentile(wait_list,
+                                                    90,
+                                                    method='nearest')
+    result_dict['stats']['99_wait'] = min(
+        24, np.percentile(wait_list, 99, method='nearest'))
+
+    result_dict['stats']['cluster_utilization'] = sum_local_space / (
+        simulator_spec['cluster_size'] * simulator_spec['gpus_per_node'] *
+        (end_time - start_time))
+    result_dict['stats']['system_utilization'] = (
+        sum_local_space + sum_cloud_space) / (simulator_spec['cluster_size'] *
+                                              simulator_spec['gpus_per_node'] *
+                                              (end_time - start_time))
+
+    stats_dict = result_dict['stats']
+    headers = [
+        'Sched Policy', 'Waiting Policy', '# Cluster Nodes',
+        'Total Cloud Cost', 'Avg. Cloud Cost', 'Avg. Waiting', 'Avg. JCT',
+        '90th JCT', '99th JCT', 'Cluster Utilization', 'System Utilization'
+    ]
+    waiting_policy_str = simulator_spec['waiting_policy']
+    waiting_factor_str = simulator_spec['waiting_factor']
+    data = [(simulator_spec['sched_alg'], \
+        f'{waiting_policy_str}-{waiting_factor_str}', simulator_spec['cluster_size'], \
+        stats_dict['total_cloud_cost'], stats_dict['avg_cloud_cost'], \
+        stats_dict['avg_waiting'], stats_dict['avg_jct'], stats_dict['90_jct'], stats_dict['99_jct'], stats_dict['cluster_utilization'], stats_dict['system_utilization'])]
+    print(tabulate(data, headers=headers))
+    return result_dict
@@ -0,0 +1,107 @@
+import functools
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from skyburst import utils
+
+# Simulator settings that do not change a run's results.
+IGNORED_KEYS = ('pbar_idx', 'verbose', 'debug', 'checkpoint_path',
+                'checkpoint_interval', 'checkpoint_events')
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Returns a hash of the simulator's source code (all `.py` files of skyburst).
+
+    Any code change yields a new version, so results cached by older code
+    are never returned.
+    """
+    sha = hashlib.sha256()
+    for dir_path, dir_names, file_names in os.walk(PACKAGE_DIR):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if not file_name.endswith('.py'):
+                continue
+            path = os.path.join(dir_path, file_name)
+            sha.update(os.path.relpath(path, PACKAGE_DIR).encode())
+            with open(path, 'rb') as f:
+                sha.update(f.read())
+    return sha.hexdigest()
+
+
+def is_cacheable(simulator_spec: Dict[str, Any]) -> bool:
+    """Runs that write side outputs (Parquet results, cProfile dumps) always run."""
+    return simulator_spec.get('result_path') is None and \
+        simulator_spec.get('profile_path') is None
+
+
+def _canonical_json(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), default=repr)
+
+
+def spec_digest(simulator_spec: Dict[str, Any]) -> str:
+    """Returns a hash of the simulator settings (including `jobgen_spec`) that change results."""
+    spec = {
+        k: v
+        for k, v in simulator_spec.items() if k not in IGNORED_KEYS
+    }
+    return hashlib.sha256(_canonical_json(spec).encode()).hexdigest()
+
+
+def result_key(simulator_spec: Dict[str, Any],
+               jobs_digest: str,
+               version: Optional[str] = None) -> str:
+    """Returns the cache key of a run.
+
+    The key is a hash of the simulator settings (see `spec_digest`), the
+    digest of the jobs the run simulates (see `JobTable.digest`) and the
+    code version.
+    """
+    key = {
+        'simulator_spec': spec_digest(simulator_spec),
+        'jobs': jobs_digest,
+        'code_version': code_version() if version is None else version,
+    }
+    return hashlib.sha256(_canonical_json(key).encode()).hexdigest()
+
+
+class ResultCache(object):
+    """Content-addressed store of simulator results, one pickle per run.
+
+    Results are stored in the format returned by `run_simulator`, so cache
+    hits can be mixed with fresh results (and read back with
+    `utils.load_logs_as_dataframe`).
+    """
+    def __init__(self, cache_dir: str, version: Optional[str] = None):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.version = version
+
+    def key(self, simulator_spec: Dict[str, Any], jobs_digest: str) -> str:
+        return result_key(simulator_spec, jobs_digest, version=self.version)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.pkl')
+
+    def get(self, key: str,
+            simulator_spec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns the cached result of a run, None on a cache miss.
+
+        Settings in `IGNORED_KEYS` of the returned result's simulator spec
+        are taken from `simulator_spec`.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        result = utils.load_logs(path)
+        result['simulator_spec'].update({
+            k: simulator_spec[k]
+            for k in IGNORED_KEYS if k in simulator_spec
+        })
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        utils.save_logs(self.path(key), result)
@@ -0,0 +1,132 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from skyburst.job import Job
+
+# Row group size of the Parquet file (# of finished jobs per row group).
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+
+def _stats_path(path: str) -> str:
+    return f'{path}.stats.json'
+
+
+class ParquetResultSink(object):
+    """Streams finished jobs of a simulator run to a Parquet file.
+
+    Finished jobs are buffered and written out one row group at a time, so
+    memory stays flat no matter how many jobs the trace has. GPU allocations
+    are stored as two list columns, node indexes and GPU bitmasks (see
+    `Job.allocated_gpu_masks`). Stats and the simulator spec are written as a
+    small JSON record next to the Parquet file (`<path>.stats.json`).
+
+    Requires `pyarrow`.
+    """
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                'Streaming results to Parquet requires `pyarrow`, '
+                'install it with `pip install pyarrow`.') from e
+        self._pa = pa
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([
+            ('idx', pa.int64()),
+            ('arrival', pa.float64()),
+            ('start', pa.float64()),
+            ('runtime', pa.float64()),
+            ('deadline', pa.float64()),
+            ('num_gpus', pa.int64()),
+            ('num_cpus', pa.float64()),
+            ('nodes', pa.int64()),
+            ('cost', pa.float64()),
+            ('state', pa.string()),
+            ('preempt_cloud', pa.bool_()),
+            ('allocated_nodes', pa.list_(pa.int64())),
+            ('allocated_gpu_masks', pa.list_(pa.int64())),
+        ])
+        dir_path = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dir_path, exist_ok=True)
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._buffer = {name: [] for name in self.schema.names}
+        self.num_rows = 0
+
+    def write(self, job: Job):
+        """Adds a finished job, flushing a row group once the buffer is full."""
+        buffer = self._buffer
+        buffer['idx'].append(job.idx)
+        buffer['arrival'].append(job.arrival)
+        buffer['start'].append(job.start)
+        buffer['runtime'].append(job.runtime)
+        buffer['deadline'].append(job.deadline)
+        buffer['num_gpus'].append(job.num_gpus)
+        buffer['num_cpus'].append(job.num_cpus)
+        buffer['nodes'].append(job.nodes)
+        buffer['cost'].append(job.cost)
+        buffer['state'].append(job.state)
+        buffer['preempt_cloud'].append(job.preempt_cloud)
+        buffer['allocated_nodes'].append(
+            [node_idx for node_idx, _ in job.allocated_gpu_masks])
+        buffer['allocated_gpu_masks'].append(
+            [gpu_mask for _, gpu_mask in job.allocated_gpu_masks])
+        self.num_rows += 1
+        if len(buffer['idx']) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered jobs to the file as one row group."""
+        if not self._buffer['idx']:
+            return
+        table = self._pa.Table.from_pydict(self._buffer, schema=self.schema)
+        self._writer.write_table(table)
+        for column in self._buffer.values():
+            column.clear()
+
+    def write_stats(self, stats: Dict[str, Any],
+                    simulator_spec: Dict[str, Any]):
+        """Writes the run's stats and simulator spec to `<path>.stats.json`."""
+        record = {
+            # The simulator profile (see `profiler.PhaseProfiler`) is already plain dicts.
+            'stats': {
+                k: v if k == 'profile' else float(v)
+                for k, v in stats.items()
+            },
+            'simulator_spec': simulator_spec,
+            'num_jobs': self.num_rows,
+        }
+        with open(_stats_path(self.path), 'w') as f:
+            json.dump(record, f, default=str)
+
+    def close(self):
+        """Flushes buffered jobs and closes the file (later calls are no-ops)."""
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+
+def read_results(path: str, columns: Optional[List[str]] = None):
+    """Reads per-job results written by `ParquetResultSink` as a DataFrame, sorted by Job ID.
+
+    Args:
+        path: Path to the Parquet file.
+        columns: Columns to read (all if None).
+    """
+    import pyarrow.parquet as pq
+    if columns is not None and 'idx' not in columns:
+        df = pq.read_table(path, columns=columns + ['idx']).to_pandas()
+        return df.sort_values('idx', kind='stable').drop(
+            columns='idx').reset_index(drop=True)
+    df = pq.read_table(path, columns=columns).to_pandas()
+    return df.sort_values('idx', kind='stable').reset_index(drop=True)
+
+
+def read_stats(path: str) -> Dict[str, Any]:
+    """Reads the stats record written next to the Parquet file at `path`."""
+    with open(_stats_path(path), 'r') as f:
+        return json.load(f)
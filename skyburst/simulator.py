@@ -1,11 +1,18 @@
-import copy
+import itertools
 import numpy as np
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from tabulate import tabulate
 from tqdm import tqdm
 
-from skyburst import Cluster, Job, utils, waiting_policy
+from skyburst import ArrayCluster, Cluster, Job, utils, waiting_policy
+from skyburst import checkpoint, event_calendar, stats
+from skyburst.event_calendar import EventCalendar
+from skyburst.job_queue import ArrivalStream, JobQueue
+from skyburst.job_table import JobTable
+from skyburst.profiler import PhaseProfiler
+from skyburst.result_sink import ParquetResultSink
+from skyburst.snapshot import QueueSnapshots
 
 DEFAULT_SIMULATOR_SPEC = {
     # Size of the cluster (i.e. # of cluster nodes).
@@ -18,6 +25,8 @@ DEFAULT_SIMULATOR_SPEC = {
     'sched_alg': 'fifo',
     # How jobs are binpacked into the cluster.
     'binpack_alg': 'first-fit',
+    # Cluster state backend, `python` (list of nodes) or `numpy` (arrays, for large clusters).
+    'cluster_backend': 'python',
     # Waiting policy (how long jobs should wait in the cloud).
     'waiting_policy': 'linear_runtime',
     # Waiting hyperparameter (to be passed to waiting_policy)
@@ -37,6 +46,8 @@ DEFAULT_SIMULATOR_SPEC = {
     'long_job_thres': -1,
     # Time estimator error
     'time_estimator_error': 0,
+    # Seed of the simulator's RNG (time estimator errors), None uses the seed in `jobgen_spec`.
+    'seed': None,
     # Data locality dealy
     'data_gravity': -1,
     # Pre-empt Cloud Ratio.
@@ -56,6 +67,24 @@ DEFAULT_SIMULATOR_SPEC = {
     'warmup_jobs': 5000,
     # Whether to get snapshots and save to result dict
     'snapshot': False,
+    # Take snapshots at most once every N hours of simulated time (0 is every timestep).
+    'snapshot_interval': 0,
+    # Store the full queue every N snapshots (other snapshots store queue deltas).
+    'snapshot_keyframe_interval': 100,
+    # Parquet file that finished jobs are streamed to (None keeps per-job results in the result dict).
+    'result_path': None,
+    # Pickle file the simulator state is checkpointed to, and resumed from if it exists (None disables checkpointing).
+    'checkpoint_path': None,
+    # Checkpoint at most once every N hours of simulated time (0 disables).
+    'checkpoint_interval': 0,
+    # Checkpoint at most once every N timesteps (0 disables).
+    'checkpoint_events': 0,
+    # Records wall time and call counts per simulator phase, fit counters and queue/heap sizes into result_dict['stats']['profile'].
+    'profile': False,
+    # File to dump cProfile stats of the simulator loop to (only if `profile` is set).
+    'profile_path': None,
+    # Records (time, event, Job ID, details) of every scheduling decision into result_dict['events'] (see `differential`).
+    'event_log': False,
     # Metadata on job generation (run prior to simulator).
     'jobgen_spec': {
         # Dataset type ['philly', 'philly_gen', 'gen_gpu']
@@ -71,20 +100,48 @@ DEFAULT_SIMULATOR_SPEC = {
 
 
 def run_simulator(
-        jobs: List[Job],
+        jobs: Union[List[Job], JobTable],
         simulator_spec: Optional[Dict[str, Any]] = DEFAULT_SIMULATOR_SPEC):
     """Executes a simulator over a fixed set of jobs. Returns a 
     a result dictionary over all finished jobs.
 
     Args:
-        jobs: List of generated jobs sorted by their arrival times.
+        jobs: List of generated jobs (or a `JobTable`) sorted by their
+              arrival times. Neither is modified by the run.
         simulator_spec: Simulator settings, see above dictionary for default
                         values.
     """
     _simulator_spec = DEFAULT_SIMULATOR_SPEC.copy()
     _simulator_spec.update(simulator_spec)
     simulator_spec = _simulator_spec
-
+    rng = make_rng(simulator_spec)
+    result_path = simulator_spec['result_path']
+    if result_path is None:
+        return _simulate(jobs, simulator_spec, None, rng)
+    if simulator_spec['checkpoint_path'] is not None:
+        # Parquet files cannot be appended to, so a resumed run could not continue the file.
+        raise ValueError(
+            'Checkpointing does not support streaming results to result_path.')
+    # Finished jobs are streamed to `result_path`, the file is closed even if the run fails.
+    result_sink = ParquetResultSink(result_path)
+    try:
+        return _simulate(jobs, simulator_spec, result_sink, rng)
+    finally:
+        result_sink.close()
+
+
+def make_rng(simulator_spec: Dict[str, Any]) -> np.random.Generator:
+    """Returns the RNG of a run, seeded by its spec so runs do not depend on the worker running them."""
+    seed = simulator_spec.get('seed')
+    if seed is None:
+        seed = simulator_spec.get('jobgen_spec', {}).get('seed', 0)
+    return np.random.default_rng(seed)
+
+
+def _simulate(jobs: Union[List[Job], JobTable], simulator_spec: Dict[str, Any],
+              result_sink: Optional[ParquetResultSink],
+              rng: np.random.Generator):
+    """Runs the simulator loop of `run_simulator` (over a complete simulator spec)."""
     # TODO(mluo): convert into class fields instead of manual indexing.
     sched_alg = simulator_spec['sched_alg']
     sort_func = utils.generate_sorting_function(sched_alg)
@@ -119,93 +176,204 @@ def run_simulator(
     debug = simulator_spec['debug']
     snapshot = simulator_spec['snapshot']
     # Initialize simulator variables\
-    jobs = copy.deepcopy(jobs)
-    queue = []
-    finished_jobs = []
-    num_jobs = len(jobs)
+    if not isinstance(jobs, JobTable):
+        jobs = JobTable.from_jobs(jobs)
+    # Columnar job trace, finished jobs are recorded into the state columns
+    # of a per-run copy (the caller's table is not modified).
+    job_table = jobs.run_copy()
+    num_jobs = len(job_table)
+    # Jobs that have not arrived yet, including jobs preempted from the cloud.
+    jobs = ArrivalStream(job_table)
+    checkpoint_path = simulator_spec['checkpoint_path']
+    # Scheduler queue, ordered by the queueing order algorithm. (FIFO, SJF, etc.)
+    queue = JobQueue(sort_func)
+    num_finished_jobs = 0
     cloud_cost = 0.0
     # Create fake cluster. The cluster is homogeneous.
-    cluster = Cluster(num_nodes=simulator_spec['cluster_size'],
-                      num_gpus_per_node=simulator_spec['gpus_per_node'],
-                      num_cpus_per_node=simulator_spec['cpus_per_node'],
-                      backfill=backfill,
-                      binpack=binpack_alg)
+    cluster_backend = simulator_spec['cluster_backend']
+    if cluster_backend == 'python':
+        cluster_cls = Cluster
+    elif cluster_backend == 'numpy':
+        cluster_cls = ArrayCluster
+    else:
+        raise ValueError(f'Cluster backend {cluster_backend} does not exist.')
+    cluster = cluster_cls(num_nodes=simulator_spec['cluster_size'],
+                          num_gpus_per_node=simulator_spec['gpus_per_node'],
+                          num_cpus_per_node=simulator_spec['cpus_per_node'],
+                          backfill=backfill,
+                          binpack=binpack_alg)
     t = 0
-    pbar = tqdm(total=len(jobs),
+    pbar = tqdm(total=num_jobs,
                 desc="Jobs progress: ",
                 position=simulator_spec['pbar_idx'])
 
-    snapshots = {}
+    if snapshot:
+        snapshots = QueueSnapshots(
+            queue,
+            keyframe_interval=simulator_spec['snapshot_keyframe_interval'],
+            sample_interval=simulator_spec['snapshot_interval'])
     total_cloud_jobs = 0
+    # Discrete-event calendar, determines the next timestep of the simulator.
+    calendar = EventCalendar()
+    # Only the next job in the trace needs an arrival event (cloud re-arrivals are scheduled on preemption),
+    # it is rescheduled whenever a trace job arrives.
+    next_trace_job = jobs.trace_head()
+    if next_trace_job is not None:
+        calendar.schedule(event_calendar.ARRIVAL, next_trace_job.arrival,
+                          next_trace_job)
+    # Scheduling decisions, in the order they are made.
+    event_log = [] if simulator_spec['event_log'] else None
+    # Timesteps run so far and when the next checkpoint is due.
+    num_steps = 0
+    checkpoint_interval = simulator_spec['checkpoint_interval']
+    checkpoint_events = simulator_spec['checkpoint_events']
+    next_checkpoint_time = checkpoint_interval
+    next_checkpoint_step = checkpoint_events
+    if checkpoint_path is not None:
+        # Identifies the trace, so a checkpoint is only resumed over the same jobs.
+        jobs_digest = job_table.digest()
+        state = checkpoint.load_checkpoint(checkpoint_path, simulator_spec,
+                                           num_jobs, jobs_digest)
+        if state is not None:
+            # Resume from the checkpoint instead of the start of the trace.
+            t = state['t']
+            num_steps = state['num_steps']
+            next_checkpoint_time = state['next_checkpoint_time']
+            next_checkpoint_step = state['next_checkpoint_step']
+            job_table = state['job_table']
+            jobs = state['jobs']
+            queue = state['queue']
+            queue.sort_func = sort_func
+            cluster = state['cluster']
+            calendar = state['calendar']
+            num_finished_jobs = state['num_finished_jobs']
+            cloud_cost = state['cloud_cost']
+            total_cloud_jobs = state['total_cloud_jobs']
+            if snapshot:
+                snapshots = state['snapshots']
+                snapshots.reattach(queue)
+            event_log = state['event_log']
+            rng.bit_generator.state = state['rng_state']
+            pbar.update(state['pbar_n'])
+    profiler = None
+    if simulator_spec['profile']:
+        profiler = PhaseProfiler(cprofile_path=simulator_spec['profile_path'])
+        profiler.start()
     # Simulation Loop - Continues until all jobs have passed and the queue is empty and the cluster has no more jobs.
     while len(jobs) > 0 or len(queue) > 0 or cluster.active_jobs:
+        if checkpoint_path is not None and (
+            (checkpoint_interval > 0 and t >= next_checkpoint_time) or
+            (checkpoint_events > 0 and num_steps >= next_checkpoint_step)):
+            next_checkpoint_time = t + checkpoint_interval
+            next_checkpoint_step = num_steps + checkpoint_events
+            checkpoint.save_checkpoint(
+                checkpoint_path, {
+                    'simulator_spec': simulator_spec,
+                    'num_jobs': num_jobs,
+                    'jobs_digest': jobs_digest,
+                    't': t,
+                    'num_steps': num_steps,
+                    'next_checkpoint_time': next_checkpoint_time,
+                    'next_checkpoint_step': next_checkpoint_step,
+                    'job_table': job_table,
+                    'jobs': jobs,
+                    'queue': queue,
+                    'cluster': cluster,
+                    'calendar': calendar,
+                    'num_finished_jobs': num_finished_jobs,
+                    'cloud_cost': cloud_cost,
+                    'total_cloud_jobs': total_cloud_jobs,
+                    'snapshots': snapshots if snapshot else None,
+                    'event_log': event_log,
+                    'rng_state': rng.bit_generator.state,
+                    'pbar_n': pbar.n,
+                })
+        num_steps += 1
+        if profiler is not None:
+            profiler.lap('bookkeeping')
         # Clear cluster of jobs that have completed
         completed_jobs = cluster.try_clear(t)
-        finished_jobs.extend(completed_jobs)
-
-        # Check for jobs that have waited too long (move to cloud).
-        i = 0
-        while i < len(queue):
-            job = queue[i]
-            # If job has timed out, send to cloud.
-            if t > job.deadline - job.runtime:
-                raise ValueError(
-                    f'Job {job.idx} has timed out: {t} > {job.deadline}')
-            elif t == job.deadline - job.runtime:
-                queue.remove(job)
-                job.state = 'TIMEOUT-CLOUD'
-                # Shortcut: Job can predict it will go to cloud or not, if so, it would have began running at job.arrival.
-                # Perfect Oracle
-                if predict_wait == 1:
-                    job.start = job.arrival
-                elif predict_wait == 0 or predict_wait == 2:
-                    job.start = job.deadline - job.runtime
-                else:
+        num_finished_jobs += len(completed_jobs)
+        for job in completed_jobs:
+            calendar.cancel(event_calendar.COMPLETION, job)
+            job_table.record(job, result_sink)
+            if event_log is not None:
+                event_log.append((t, 'complete', job.idx, None))
+        if profiler is not None:
+            profiler.lap('clear')
+
+        # Check for jobs that have waited too long (move to cloud). Expiring jobs
+        # are popped directly from the calendar's timeout heap.
+        timed_out = calendar.pop_due(event_calendar.QUEUE_TIMEOUT, t)
+        timed_out_jobs = []
+        if timed_out:
+            for timeout, job in timed_out:
+                # If job has timed out, send to cloud.
+                if t > timeout:
                     raise ValueError(
-                        f'Predict wait {predict_wait} wrong value!')
-                
-                if preempt_cloud_ratio > 0:
-                    # If a job has not been prempted to the cloud before.
-                    if not job.preempt_cloud:
-                        # Emulate preemption from cloud back to onprem.
-                        if job.runtime > long_job_thres:
-                            # Job will run on the cloud for long_job_thres and then move back to onprem.
-                            job.preempt_cloud = True
-                            # The job will arrive again at this time (original arrival + original waiting time + long_job_thres)
-                            job.new_arrival = job.deadline - job.runtime + long_job_thres
-                            job.start = None
-                            job.deadline = None
-                            job.state = None
-                            
-                            # Here, we add it back into the arrival jobs, sorted by arrival time.
-                            # Finding the correct position for the new object
-                            position = 0
-                            for obj in jobs:
-                                # Design Choice: Should we insert by its original arrival or new arrival?
-                                # Here, we insert by the new arrival.
-                                if obj.arrival > job.new_arrival:
-                                    break
-                                position += 1
-                            # Inserting the object at the found position
-                            jobs.insert(position, job)
-                            # Cloud cost incurred includes the time job ran for LONG_JOB_THRES on the cloud.
-                            cloud_cost += job.cost / (job.runtime/long_job_thres)
-                            pbar.update(-1)
-                            continue
-                cloud_cost += job.cost
-                total_cloud_jobs += 1
-                finished_jobs.append(job)
+                        f'Job {job.idx} has timed out: {t} > {job.deadline}')
+            # Handle timed out jobs in queue order.
+            timed_out_jobs = [job for _, job in timed_out]
+            timed_out_jobs.sort(key=queue.order_key)
+            for job in timed_out_jobs:
+                queue.remove(job)
+        for job in timed_out_jobs:
+            job.state = 'TIMEOUT-CLOUD'
+            # Shortcut: Job can predict it will go to cloud or not, if so, it would have began running at job.arrival.
+            # Perfect Oracle
+            if predict_wait == 1:
+                job.start = job.arrival
+            elif predict_wait == 0 or predict_wait == 2:
+                job.start = job.deadline - job.runtime
             else:
-                i += 1
+                raise ValueError(
+                    f'Predict wait {predict_wait} wrong value!')
+            
+            if preempt_cloud_ratio > 0:
+                # If a job has not been prempted to the cloud before.
+                if not job.preempt_cloud:
+                    # Emulate preemption from cloud back to onprem.
+                    if job.runtime > long_job_thres:
+                        # Job will run on the cloud for long_job_thres and then move back to onprem.
+                        job.preempt_cloud = True
+                        # The job will arrive again at this time (original arrival + original waiting time + long_job_thres)
+                        job.new_arrival = job.deadline - job.runtime + long_job_thres
+                        job.start = None
+                        job.deadline = None
+                        job.state = None
+                        
+                        # Here, we add it back into the arrival jobs, sorted by its new arrival.
+                        jobs.push_rearrival(job)
+                        calendar.schedule(event_calendar.CLOUD_REARRIVAL,
+                                          job.new_arrival, job)
+                        # Cloud cost incurred includes the time job ran for LONG_JOB_THRES on the cloud.
+                        cloud_cost += job.cost / (job.runtime/long_job_thres)
+                        pbar.update(-1)
+                        if event_log is not None:
+                            event_log.append(
+                                (t, 'cloud_preempt', job.idx, job.new_arrival))
+                        continue
+            cloud_cost += job.cost
+            total_cloud_jobs += 1
+            num_finished_jobs += 1
+            job_table.record(job, result_sink)
+            if event_log is not None:
+                event_log.append((t, 'timeout', job.idx, job.start))
+        if profiler is not None:
+            profiler.lap('timeout')
 
         # Add jobs to queue that have arrived. Jobs are assumed to have been ordered by arrival times.
-        i = 0
-        while i < len(jobs):
-            job = jobs[i]
+        trace_advanced = False
+        while len(jobs) > 0:
+            job = jobs.peek()
             if job.arrival < t and job.new_arrival < t:
                 raise ValueError("Should not have entered here!")
             elif job.arrival == t or job.new_arrival==t:
-                jobs.remove(job)
+                if job is jobs.trace_head():
+                    trace_advanced = True
+                jobs.pop()
+                calendar.cancel(event_calendar.ARRIVAL, job)
+                calendar.cancel(event_calendar.CLOUD_REARRIVAL, job)
                 deadline = waiting_fn(job)
                 if job.preempt_cloud:
                     arrival = job.new_arrival
@@ -230,12 +398,15 @@ def run_simulator(
                     job.start = arrival
                     job.set_deadline(deadline=arrival + job.runtime)
                     cloud_cost += job.cost
-                    finished_jobs.append(job)
+                    num_finished_jobs += 1
+                    job_table.record(job, result_sink)
+                    if event_log is not None:
+                        event_log.append((t, 'offload', job.idx, None))
                 else:
                     # For time estimator ablations.
                     if time_estimator_error != 0:
                         original_runtime = job.runtime
-                        mod_runtime = original_runtime + np.random.normal(
+                        mod_runtime = original_runtime + rng.normal(
                             loc=0.0,
                             scale=time_estimator_error * original_runtime)
                         mod_runtime = max(0, mod_runtime)
@@ -253,25 +424,80 @@ def run_simulator(
                     job.set_deadline(deadline=arrival + job.runtime +
                                      waiting_time)
                     queue.append(job)
+                    calendar.schedule(event_calendar.QUEUE_TIMEOUT,
+                                      job.deadline - job.runtime, job)
+                    if event_log is not None:
+                        event_log.append((t, 'arrive', job.idx, job.deadline))
                 pbar.update(1)
             else:
                 break
-
-        # Sort the queue based on the queueing order algorithm. (FIFO, SJF, etc.)
-        queue.sort(key=sort_func)
+        next_trace_job = jobs.trace_head()
+        if trace_advanced and next_trace_job is not None:
+            calendar.schedule(event_calendar.ARRIVAL, next_trace_job.arrival,
+                              next_trace_job)
+        if profiler is not None:
+            profiler.lap('arrival')
 
         # Go through queue and fit jobs onto cluster as needed
-        i = 0
-        while i < len(queue):
-            job = queue[i]
-            can_fit, _ = cluster.try_fit_v2(t, job)
-            if can_fit:
+        if loop:
+            # Placing jobs only shrinks the free space, so skip jobs that cannot fit.
+            loop_jobs = list(queue)
+            # Smallest GPU(s)/CPU(s) demand among `loop_jobs[k:]`.
+            min_gpus = list(
+                itertools.accumulate(
+                    reversed([j.resources['GPUs'] for j in loop_jobs]),
+                    min))[::-1]
+            min_cpus = list(
+                itertools.accumulate(
+                    reversed([j.resources['CPUs'] for j in loop_jobs]),
+                    min))[::-1]
+            # Maps # of nodes to (GPUs, CPUs) shapes that failed to fit this timestep.
+            failed_shapes = {}
+            free_gpus = cluster.total_free_gpus
+            free_cpus = cluster.total_free_cpus
+            for k, job in enumerate(loop_jobs):
+                # No remaining job passes the quick check in `try_fit_v2`.
+                if free_gpus < min_gpus[k] or free_cpus < min_cpus[k]:
+                    break
+                num_gpus = job.resources['GPUs']
+                num_cpus = job.resources['CPUs']
+                shapes = failed_shapes.setdefault(job.nodes, [])
+                # A job at least as large as a failed shape cannot fit either.
+                if any(num_gpus >= g and num_cpus >= c for g, c in shapes):
+                    continue
+                can_fit, _ = cluster.try_fit_v2(t, job)
+                if profiler is not None:
+                    profiler.record_fit(can_fit)
+                if can_fit:
+                    queue.remove(job)
+                    calendar.cancel(event_calendar.QUEUE_TIMEOUT, job)
+                    calendar.schedule(event_calendar.COMPLETION,
+                                      job.start + job.runtime, job)
+                    if event_log is not None:
+                        event_log.append((t, 'start', job.idx,
+                                          job.allocated_gpu_masks))
+                    free_gpus = cluster.total_free_gpus
+                    free_cpus = cluster.total_free_cpus
+                else:
+                    shapes.append((num_gpus, num_cpus))
+        else:
+            while len(queue) > 0:
+                job = queue[0]
+                can_fit, _ = cluster.try_fit_v2(t, job)
+                if profiler is not None:
+                    profiler.record_fit(can_fit)
+                if not can_fit:
+                    break
                 queue.remove(job)
+                calendar.cancel(event_calendar.QUEUE_TIMEOUT, job)
+                calendar.schedule(event_calendar.COMPLETION,
+                                  job.start + job.runtime, job)
+                if event_log is not None:
+                    event_log.append(
+                        (t, 'start', job.idx, job.allocated_gpu_masks))
                 #queue.extend(preempted_jobs)
-            elif not loop:
-                break
-            else:
-                i += 1
+        if profiler is not None:
+            profiler.lap('placement')
 
         # Perform EASY backfilling (assumes time estimator).
         if backfill:
@@ -280,25 +506,52 @@ def run_simulator(
                 job_to_reserve = queue[0]
                 # Reserving large jobs for backfilling (like in Slurm).
                 can_reserve = cluster.try_reserve(t, job_to_reserve)
+                if profiler is not None:
+                    profiler.count('reserve_attempts')
+                    if not can_reserve:
+                        profiler.count('failed_reserves')
                 # If can't reserve within reasonble time, leave the job in the queue.
                 if not can_reserve:
                     pass
                 else:
                     queue.remove(job_to_reserve)
+                    calendar.cancel(event_calendar.QUEUE_TIMEOUT,
+                                    job_to_reserve)
+                    # Reserved jobs start once their blocking job completes.
+                    calendar.schedule(
+                        event_calendar.COMPLETION,
+                        job_to_reserve.start + job_to_reserve.runtime,
+                        job_to_reserve)
+                    if event_log is not None:
+                        event_log.append(
+                            (t, 'reserve', job_to_reserve.idx,
+                             (job_to_reserve.start,
+                              job_to_reserve.allocated_gpu_masks)))
                 i = 0
                 while i < len(queue):
                     job = queue[i]
                     can_fit, preempted_jobs = cluster.try_fit_v2(t, job)
+                    if profiler is not None:
+                        profiler.record_fit(can_fit)
                     if can_fit:
                         queue.remove(job)
+                        calendar.cancel(event_calendar.QUEUE_TIMEOUT, job)
+                        calendar.schedule(event_calendar.COMPLETION,
+                                          job.start + job.runtime, job)
+                        if event_log is not None:
+                            event_log.append((t, 'start', job.idx,
+                                              job.allocated_gpu_masks))
                         #queue.extend(preempted_jobs)
                     else:
                         i += 1
+        if profiler is not None:
+            profiler.lap('backfill')
 
         if max_queue_length != -1:
             while len(queue) > max_queue_length:
                 q_job = queue[-1]
                 queue.remove(q_job)
+                calendar.cancel(event_calendar.QUEUE_TIMEOUT, q_job)
                 q_job.state = 'TIMEOUT-CLOUD'
                 q_job.start = t
                 if q_job.preempt_cloud:
@@ -307,160 +560,85 @@ def run_simulator(
                 else:
                     q_job.set_deadline(deadline=q_job.arrival + q_job.runtime)
                 cloud_cost += q_job.cost
-                finished_jobs.append(q_job)
+                num_finished_jobs += 1
+                job_table.record(q_job, result_sink)
+                if event_log is not None:
+                    event_log.append((t, 'trim', q_job.idx, None))
+        if profiler is not None:
+            profiler.lap('trim')
 
         if snapshot:
-            if t not in snapshots:
-                snapshots[t] = {}
-            snapshots[t]['new_queue'] = copy.deepcopy(queue)
+            snapshots.record(t)
+            if profiler is not None:
+                profiler.lap('snapshot')
 
-        # Skip to next timestep (matches algorithm 1 in paper). The next timestep is the minimum of:
-        # 1) a new job either arrives (first elmeent in job queue)
+        # Skip to next timestep (matches algorithm 1 in paper). The next timestep is the earliest live event in the calendar:
+        # 1) a new job either arrives (first elmeent in job queue) or returns from the cloud
         # 2) job finishes on the cluster
         # 3) existing job in the queue times out.
-            
-        # Case 2
-        next_time_list = []
-        for _, job in cluster.active_jobs.items():
-            next_time_list.append(job.start + job.runtime)
-
-        # Case 1
-        if len(jobs) > 0:
-            cur_job = jobs[0]
-            if cur_job.preempt_cloud:
-                next_time_list.append(cur_job.new_arrival)
-            else:
-                next_time_list.append(cur_job.arrival)
-        
-        # Case 3
-        if queue:
-            for q in queue:
-                # append time outs
-                next_time_list.append(q.deadline - q.runtime)
+        next_time = calendar.peek_time()
+        if profiler is not None:
+            profiler.lap('next_time')
+            profiler.observe('queue_length', len(queue))
+            profiler.observe('pending_arrivals', len(jobs))
+            profiler.observe('active_jobs', len(cluster.active_jobs))
+            profiler.observe('completion_heap', len(cluster.completion_heap))
+            profiler.observe('calendar_heap', calendar.heap_size())
 
         # If there are no jobs left in the cluster and in the job and queue, terminate simulation.
-        if len(next_time_list) == 0:
+        if next_time is None:
             assert len(queue) == 0 and len(jobs) == 0
             break
 
-        if min(next_time_list) < t and abs(min(next_time_list) - t) > 1e-6:
+        if next_time < t and abs(next_time - t) > 1e-6:
             print(simulator_spec)
             raise ValueError(
-                f'Simulator cannot go back in time, there is a bug: {t}->{min(next_time_list)}'
+                f'Simulator cannot go back in time, there is a bug: {t}->{next_time}'
             )
-        t = min(next_time_list)
+        t = next_time
         if verbose or debug:
             headers = [
                 'Timestamp', 'Cloud Cost', 'Queue Length', 'Jobs Left',
                 'Finished Jobs'
             ]
-            data = [(t, cloud_cost, len(queue), len(jobs), len(finished_jobs))]
+            data = [(t, cloud_cost, len(queue), len(jobs), num_finished_jobs)]
             print(tabulate(data, headers=headers))
             if debug:
                 import pdb
                 pdb.set_trace()
 
+    if profiler is not None:
+        profiler.stop()
     end_sim_jobs = cluster.try_clear(1e12)
     assert len(end_sim_jobs) == 0 and len(jobs) == 0 and len(
         queue) == 0, 'Simulator did not finish properly. There are still running jobs in the cluster.'
+    if checkpoint_path is not None:
+        checkpoint.remove_checkpoint(checkpoint_path)
     
-    # Sort jobs by their initial arrival (aka idx).
-    finished_jobs.sort(key=lambda x: x.idx)
-
     # Generate final logs for the simulator.
-    result_dict = {
-        'idx': np.array([j.idx for j in finished_jobs]),
-        'arrival': np.array([j.arrival for j in finished_jobs]),
-        'start': np.array([j.start for j in finished_jobs]),
-        'runtime': np.array([j.runtime for j in finished_jobs]),
-        'deadline': np.array([j.deadline for j in finished_jobs]),
-        'num_gpus': np.array([j.num_gpus for j in finished_jobs]),
-        'state': np.array([j.state for j in finished_jobs]),
-        'allocated_gpus': np.array([j.allocated_gpus for j in finished_jobs]),
-        'simulator_spec': simulator_spec,
-        'stats': {}
-    }
+    if result_sink is not None:
+        result_sink.close()
+        result_dict = {'result_path': result_sink.path}
+    else:
+        result_dict = job_table.result_columns()
+    result_dict['simulator_spec'] = simulator_spec
+    # Computing Simulator stats, such as avg. waiting, avg. JCT, cloud cost, utilization.
+    result_dict['stats'] = stats.compute_stats(
+        job_table.stats_columns(),
+        cluster_size=simulator_spec['cluster_size'],
+        gpus_per_node=simulator_spec['gpus_per_node'],
+        warmup_jobs=simulator_spec['warmup_jobs'],
+        long_job_thres=long_job_thres,
+        data_gravity=data_gravity)
+    if profiler is not None:
+        result_dict['stats']['profile'] = profiler.summary()
+    if result_sink is not None:
+        result_sink.write_stats(result_dict['stats'], simulator_spec)
 
     if snapshot:
         result_dict['snapshot'] = snapshots
-    # Computing Simulator stats, such as avg. waiting, avg. JCT, cloud cost, utilization.
-    total_waiting_time = 0.0
-    total_running_time = 0.0
-    num_jobs = 0
-    total_cloud_cost = 0
-    sum_local_space = 0.0
-    sum_cloud_space = 0.0
-
-    start_time = finished_jobs[simulator_spec['warmup_jobs']].arrival
-    end_time = finished_jobs[len(finished_jobs) -
-                             simulator_spec['warmup_jobs'] - 1].arrival
-
-    jct_list = []
-    wait_list = []
-    if data_gravity!=-1:
-        for job in finished_jobs:
-            if job.state == 'TIMEOUT-CLOUD':
-                job.cost = job.cost * (1 + data_gravity/job.runtime)
-                job.runtime = job.runtime + data_gravity
-    for job in finished_jobs:
-        inter_start = max(job.start, start_time)
-        inter_end = min(job.start + job.runtime, end_time)
-        # Cut off beginning and ending of simulator to reach steady state. Calculate the "bleeding".
-        if job.idx < simulator_spec['warmup_jobs'] or job.idx > len(
-                finished_jobs) - simulator_spec['warmup_jobs']:
-            if job.state == 'LOCAL':
-                if inter_end >= inter_start:
-                    sum_local_space += job.num_gpus * (inter_end - inter_start)
-            elif job.state == 'TIMEOUT-CLOUD':
-                if inter_end >= inter_start:
-                    sum_cloud_space += job.num_gpus * (inter_end - inter_start)
-            continue
-        # Moved to cloud
-        if job.state == 'TIMEOUT-CLOUD':
-            total_waiting_time += job.start - job.arrival
-            if inter_end >= inter_start:
-                sum_cloud_space += job.num_gpus * (inter_end - inter_start)
-            total_cloud_cost += job.cost
-        elif job.state == 'LOCAL':
-            total_waiting_time += job.start - job.arrival
-            if inter_end >= inter_start:
-                sum_local_space += job.num_gpus * (inter_end - inter_start)
-            if job.preempt_cloud:
-                total_cloud_cost += job.cost / (job.runtime/long_job_thres)
-        else:
-            raise ValueError(f'Job {job.idx} has invalid state: {job.state}')
-        jct_list.append(job.runtime + job.start - job.arrival)
-        wait_list.append(job.start - job.arrival)
-        total_running_time += job.runtime
-        num_jobs += 1
-
-    result_dict['stats']['total_cloud_cost'] = total_cloud_cost
-    result_dict['stats']['avg_cloud_cost'] = total_cloud_cost / (end_time -
-                                                                 start_time)
-    result_dict['stats']['avg_waiting'] = total_waiting_time / num_jobs
-    result_dict['stats']['avg_jct'] = (total_waiting_time +
-                                       total_running_time) / num_jobs
-    result_dict['stats']['90_jct'] = np.percentile(jct_list,
-                                                   90,
-                                                   method='nearest')
-    result_dict['stats']['99_jct'] = np.percentile(jct_list,
-                                                   99,
-                                                   method='nearest')
-
-    result_dict['stats']['avg_wait'] = np.mean(wait_list)
-    result_dict['stats']['90_wait'] = np.percentile(wait_list,
-                                                    90,
-                                                    method='nearest')
-    result_dict['stats']['99_wait'] = min(
-        24, np.percentile(wait_list, 99, method='nearest'))
-
-    result_dict['stats']['cluster_utilization'] = sum_local_space / (
-        simulator_spec['cluster_size'] * simulator_spec['gpus_per_node'] *
-        (end_time - start_time))
-    result_dict['stats']['system_utilization'] = (
-        sum_local_space + sum_cloud_space) / (simulator_spec['cluster_size'] *
-                                              simulator_spec['gpus_per_node'] *
-                                              (end_time - start_time))
+    if event_log is not None:
+        result_dict['events'] = event_log
 
     stats_dict = result_dict['stats']
     headers = [
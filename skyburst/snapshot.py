@@ -0,0 +1,111 @@
+import bisect
+import copy
+from typing import Dict, List
+
+from skyburst.job import Job
+from skyburst.job_queue import JobQueue
+
+
+class QueueSnapshots(object):
+    """Delta-encoded history of the scheduler queue (for underutilization analysis).
+
+    Each snapshot stores only the jobs that entered (copied at snapshot time)
+    and left the queue since the previous snapshot. Every
+    `keyframe_interval` snapshots, the full queue is stored as a keyframe,
+    so rebuilding the queue at any time replays at most `keyframe_interval`
+    deltas. With `sample_interval > 0`, snapshots are taken at most once
+    every `sample_interval` of simulated time.
+    """
+    def __init__(self,
+                 queue: JobQueue,
+                 keyframe_interval: int = 100,
+                 sample_interval: float = 0):
+        if keyframe_interval < 1:
+            raise ValueError(
+                f'Keyframe interval must be positive: {keyframe_interval}')
+        self.keyframe_interval = keyframe_interval
+        self.sample_interval = sample_interval
+        # Enqueues/dequeues of the queue since the last snapshot.
+        self._journal = []
+        queue.journal = self._journal
+        # Queue at the last snapshot, maps queue entry (sort key, insertion order) to job.
+        self._queue = {}
+        # Simulator time of each snapshot.
+        self.times = []
+        # Running max of `times` (the simulator may step back in time by < 1e-6).
+        self._max_times = []
+        # Maps simulator time to its last snapshot index.
+        self._index = {}
+        # Per snapshot, list of (queue entry, job) added and list of queue entries removed.
+        self.deltas = []
+        # Maps snapshot index to the full queue, as a list of (queue entry, job).
+        self.keyframes = {}
+        self._next_sample_time = -float('inf')
+
+    def reattach(self, queue: JobQueue):
+        """Continues recording `queue` after both were loaded from a checkpoint."""
+        self._journal = queue.journal
+
+    def record(self, t: float):
+        """Takes a snapshot of the queue at time t (unless skipped by sampling)."""
+        # Timesteps repeat at the same time, the last snapshot at time t wins.
+        if self.sample_interval > 0 and t < self._next_sample_time and \
+            t not in self._index:
+            return
+        self._next_sample_time = t + self.sample_interval
+
+        added = {}
+        removed = []
+        for is_enqueue, entry, job in self._journal:
+            if is_enqueue:
+                added[entry] = job
+            elif entry in added:
+                del added[entry]
+            else:
+                removed.append(entry)
+        self._journal.clear()
+        added = [(entry, copy.copy(job)) for entry, job in added.items()]
+        for entry in removed:
+            del self._queue[entry]
+        self._queue.update(added)
+
+        snapshot_idx = len(self.times)
+        self.times.append(t)
+        self._max_times.append(
+            max(t, self._max_times[-1]) if self._max_times else t)
+        self._index[t] = snapshot_idx
+        self.deltas.append((added, removed))
+        if snapshot_idx % self.keyframe_interval == 0:
+            self.keyframes[snapshot_idx] = sorted(self._queue.items())
+
+    def queue_at(self, t: float) -> List[Job]:
+        """Rebuilds the queue (in queue order) as of the last snapshot at or before time t."""
+        snapshot_idx = bisect.bisect_right(self._max_times, t) - 1
+        if snapshot_idx < 0:
+            return []
+        return self._queue_at_index(snapshot_idx)
+
+    def _queue_at_index(self, snapshot_idx: int) -> List[Job]:
+        keyframe_idx = snapshot_idx - snapshot_idx % self.keyframe_interval
+        queue = dict(self.keyframes[keyframe_idx])
+        for added, removed in self.deltas[keyframe_idx + 1:snapshot_idx + 1]:
+            for entry in removed:
+                del queue[entry]
+            queue.update(added)
+        return [job for _, job in sorted(queue.items())]
+
+    def __getitem__(self, t: float) -> Dict[str, List[Job]]:
+        # Same layout as the old `snapshots[t]['new_queue']` dictionary.
+        return {'new_queue': self._queue_at_index(self._index[t])}
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The journal is only needed while the simulator runs.
+        state['_journal'] = []
+        return state
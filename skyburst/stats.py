@@ -0,0 +1,90 @@
+import numpy as np
+
+
+def compute_stats(jobs,
+                  cluster_size: int,
+                  gpus_per_node: int,
+                  warmup_jobs: int,
+                  long_job_thres: float = -1,
+                  data_gravity: float = -1):
+    """Computes avg./tail JCT and waiting, cloud cost and utilization.
+
+    Args:
+        jobs: Per-job columns sorted by Job ID (dict or DataFrame) with
+              'idx', 'arrival', 'start', 'runtime', 'num_gpus', 'state',
+              'cost' and optionally 'preempt_cloud'.
+        cluster_size: # of cluster nodes.
+        gpus_per_node: # of GPU(s) per cluster node.
+        warmup_jobs: Jobs to not consider for final metrics at the beg. and
+                     end. of the trace (only counted in utilization).
+        long_job_thres: Time that jobs preempted from the cloud ran on the
+                        cloud (Star-Wait).
+        data_gravity: Data locality delay for cloud jobs, -1 to disable.
+    """
+    idx = np.asarray(jobs['idx'])
+    arrival = np.asarray(jobs['arrival'], dtype=np.float64)
+    start = np.asarray(jobs['start'], dtype=np.float64)
+    runtime = np.array(jobs['runtime'], dtype=np.float64)
+    num_gpus = np.asarray(jobs['num_gpus'])
+    state = np.asarray(jobs['state'])
+    cost = np.array(jobs['cost'], dtype=np.float64)
+    if 'preempt_cloud' in jobs:
+        preempt_cloud = np.asarray(jobs['preempt_cloud'], dtype=bool)
+    else:
+        preempt_cloud = np.zeros(len(idx), dtype=bool)
+    local = state == 'LOCAL'
+    cloud = state == 'TIMEOUT-CLOUD'
+
+    if data_gravity != -1:
+        cost[cloud] *= 1 + data_gravity / runtime[cloud]
+        runtime[cloud] += data_gravity
+
+    total_jobs = len(idx)
+    start_time = arrival[warmup_jobs]
+    end_time = arrival[total_jobs - warmup_jobs - 1]
+
+    # GPU time of each job that falls between start_time and end_time.
+    inter_start = np.maximum(start, start_time)
+    inter_end = np.minimum(start + runtime, end_time)
+    space = np.where(inter_end >= inter_start,
+                     num_gpus * (inter_end - inter_start), 0.0)
+    sum_local_space = space[local].sum()
+    sum_cloud_space = space[cloud].sum()
+
+    # Cut off beginning and ending of simulator to reach steady state.
+    steady = (idx >= warmup_jobs) & (idx <= total_jobs - warmup_jobs)
+    invalid = steady & ~(local | cloud)
+    if invalid.any():
+        raise ValueError(f'Job {idx[invalid][0]} has invalid state: '
+                         f'{state[invalid][0]}')
+    num_jobs = steady.sum()
+
+    total_cloud_cost = cost[steady & cloud].sum()
+    # Jobs preempted from the cloud paid for `long_job_thres` on the cloud.
+    preempted = steady & local & preempt_cloud
+    total_cloud_cost += (cost[preempted] /
+                         (runtime[preempted] / long_job_thres)).sum()
+
+    wait = start[steady] - arrival[steady]
+    jct = runtime[steady] + start[steady] - arrival[steady]
+    total_waiting_time = wait.sum()
+    total_running_time = runtime[steady].sum()
+
+    stats_dict = {}
+    stats_dict['total_cloud_cost'] = total_cloud_cost
+    stats_dict['avg_cloud_cost'] = total_cloud_cost / (end_time - start_time)
+    stats_dict['avg_waiting'] = total_waiting_time / num_jobs
+    stats_dict['avg_jct'] = (total_waiting_time +
+                             total_running_time) / num_jobs
+    stats_dict['90_jct'] = np.percentile(jct, 90, method='nearest')
+    stats_dict['99_jct'] = np.percentile(jct, 99, method='nearest')
+
+    stats_dict['avg_wait'] = np.mean(wait)
+    stats_dict['90_wait'] = np.percentile(wait, 90, method='nearest')
+    stats_dict['99_wait'] = min(24, np.percentile(wait, 99, method='nearest'))
+
+    cluster_space = cluster_size * gpus_per_node * (end_time - start_time)
+    stats_dict['cluster_utilization'] = sum_local_space / cluster_space
+    stats_dict['system_utilization'] = (sum_local_space +
+                                        sum_cloud_space) / cluster_space
+    return stats_dict
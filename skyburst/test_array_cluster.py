@@ -0,0 +1,40 @@
+import pytest
+
+from skyburst import utils
+from skyburst.array_cluster import ArrayCluster
+from skyburst.job import Job
+
+
+def _job(idx, num_gpus, runtime, deadline=100.0):
+    return Job(idx=idx,
+               runtime=runtime,
+               deadline=deadline,
+               resources={'GPUs': num_gpus})
+
+
+def _reserved_cluster():
+    """One 8-GPU node running two 4-GPU jobs, with a 4-GPU job reserved behind the first."""
+    cluster = ArrayCluster(num_nodes=1, backfill=True)
+    assert cluster.try_fit_v2(0.0, _job(0, 4, runtime=1.0))[0]
+    assert cluster.try_fit_v2(0.0, _job(1, 4, runtime=5.0))[0]
+    reserved_job = _job(2, 4, runtime=1.0)
+    assert cluster.try_reserve(0.0, reserved_job)
+    assert reserved_job.block_job_idx == 0
+    return cluster, reserved_job
+
+
+def test_reserved_job_starts_on_freed_gpus():
+    cluster, reserved_job = _reserved_cluster()
+    assert [job.idx for job in cluster.try_clear(1.0)] == [0]
+    assert reserved_job.idx in cluster.active_jobs
+    assert reserved_job.allocated_gpus == {0: [0, 1, 2, 3]}
+    assert cluster.total_free_gpus == 0
+
+
+def test_reservation_on_busy_gpus_raises():
+    cluster, reserved_job = _reserved_cluster()
+    # GPU 4 is still held by job 1 when job 0 completes.
+    reserved_job.allocated_gpu_masks = ((0, utils.bits_to_mask([1, 2, 3,
+                                                                4])), )
+    with pytest.raises(ValueError, match='insufficient space'):
+        cluster.try_clear(1.0)
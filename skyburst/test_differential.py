@@ -0,0 +1,45 @@
+import pytest
+
+from skyburst import job_generator
+from skyburst.differential import compare_engines
+
+SPECS = [
+    {
+        'sched_alg': 'fifo',
+        'waiting_policy': 'linear_runtime-1.25',
+    },
+    {
+        'sched_alg': 'sjf',
+        'waiting_policy': 'linear_capacity-0.77',
+        'loop': True,
+        'max_queue_length': 10,
+    },
+    {
+        'sched_alg': 'edf',
+        'waiting_policy': 'linear_cost_filter_cpu-0.04',
+        'binpack_alg': 'best-fit',
+        'time_estimator_error': 20,
+    },
+    {
+        # Star-Wait.
+        'sched_alg': 'fifo',
+        'waiting_policy': 'linear_runtime-1.25',
+        'long_job_thres': 0.25,
+        'preempt_cloud_ratio': 3,
+    },
+]
+
+
+@pytest.mark.parametrize('spec', SPECS)
+@pytest.mark.parametrize('candidate', ['python', 'numpy'])
+def test_simulator_matches_reference(spec, candidate):
+    """The simulator makes the same decisions as the original loop."""
+    jobs = job_generator.generate_synthetic_jobs(arrival_rate=16.0,
+                                                 total_jobs=600,
+                                                 seed=2024)
+    report = compare_engines(jobs,
+                             dict(spec, cluster_size=4, warmup_jobs=60),
+                             reference='reference',
+                             candidate=candidate)
+    assert report['equivalent'], report
+    assert report['num_events'] > 0
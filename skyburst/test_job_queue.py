@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from skyburst import utils
+from skyburst.job import Job
+from skyburst.job_queue import JobQueue
+
+
+def _random_job(rng: random.Random, idx: int) -> Job:
+    # Small integer values, so that many jobs tie on their sort key.
+    runtime = rng.randint(1, 4)
+    return Job(idx=idx,
+               arrival=rng.randint(0, 5),
+               runtime=runtime,
+               deadline=runtime + rng.randint(0, 5),
+               resources={'GPUs': rng.choice([1, 2, 4, 8])},
+               cost=rng.randint(1, 8))
+
+
+@pytest.mark.parametrize('sched_alg', ['fifo', 'lifo', 'edf', 'sjf', 'lvjf'])
+def test_matches_stable_sort(sched_alg):
+    """The queue order matches stably sorting the jobs in insertion order."""
+    sort_func = utils.generate_sorting_function(sched_alg)
+    rng = random.Random(2024)
+    queue = JobQueue(sort_func)
+    # Jobs in the queue, in insertion order.
+    inserted = []
+    for idx in range(500):
+        if inserted and rng.random() < 0.4:
+            job = inserted.pop(rng.randrange(len(inserted)))
+            queue.remove(job)
+        else:
+            job = _random_job(rng, idx)
+            queue.append(job)
+            inserted.append(job)
+        assert list(queue) == sorted(inserted, key=sort_func)
+    assert len(queue) == len(inserted)
+    assert all(job in queue for job in inserted)
+
+
+def test_reappended_job_goes_after_ties():
+    """A job removed and appended again is ordered after jobs with the same key."""
+    queue = JobQueue(utils.generate_sorting_function('fifo'))
+    jobs = [Job(idx=i, arrival=0.0, resources={'GPUs': 1}) for i in range(3)]
+    for job in jobs:
+        queue.append(job)
+    queue.remove(jobs[0])
+    queue.append(jobs[0])
+    assert [job.idx for job in queue] == [1, 2, 0]
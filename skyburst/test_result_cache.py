@@ -0,0 +1,78 @@
+import pytest
+
+from skyburst import result_cache
+
+SPEC = {
+    'sched_alg': 'fifo',
+    'cluster_size': 4,
+    'jobgen_spec': {
+        'dataset': 'synthetic',
+        'seed': 2024,
+    },
+    'pbar_idx': 0,
+    'verbose': False,
+}
+
+
+@pytest.fixture
+def package_dir(tmp_path, monkeypatch):
+    """Points `code_version` at a fake package in a temporary directory."""
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'simulator.py').write_text('x = 1\n')
+    (tmp_path / 'sub' / 'module.py').write_text('y = 2\n')
+    monkeypatch.setattr(result_cache, 'PACKAGE_DIR', str(tmp_path))
+    result_cache.code_version.cache_clear()
+    yield tmp_path
+    result_cache.code_version.cache_clear()
+
+
+def test_code_version_changes_with_source(package_dir):
+    version = result_cache.code_version()
+    (package_dir / 'notes.txt').write_text('not code')
+    result_cache.code_version.cache_clear()
+    assert result_cache.code_version() == version
+
+    (package_dir / 'sub' / 'module.py').write_text('y = 3\n')
+    result_cache.code_version.cache_clear()
+    assert result_cache.code_version() != version
+
+
+def test_key_changes_with_code_version(package_dir):
+    key = result_cache.result_key(SPEC, 'jobs')
+    (package_dir / 'simulator.py').write_text('x = 2\n')
+    result_cache.code_version.cache_clear()
+    assert result_cache.result_key(SPEC, 'jobs') != key
+    assert result_cache.result_key(SPEC, 'jobs', version='a') != \
+        result_cache.result_key(SPEC, 'jobs', version='b')
+
+
+def test_key_changes_with_jobs_and_settings():
+    key = result_cache.result_key(SPEC, 'jobs', version='v')
+    assert result_cache.result_key(SPEC, 'other jobs', version='v') != key
+    assert result_cache.result_key(dict(SPEC, sched_alg='sjf'), 'jobs',
+                                   version='v') != key
+    jobgen_spec = dict(SPEC['jobgen_spec'], seed=0)
+    assert result_cache.result_key(dict(SPEC, jobgen_spec=jobgen_spec),
+                                   'jobs',
+                                   version='v') != key
+    # Settings that do not change results share the key.
+    assert result_cache.result_key(dict(SPEC, pbar_idx=3, verbose=True),
+                                   'jobs',
+                                   version='v') == key
+
+
+def test_get_put_round_trip(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path), version='v')
+    key = cache.key(SPEC, 'jobs')
+    assert cache.get(key, SPEC) is None
+    cache.put(key, {'simulator_spec': dict(SPEC), 'stats': {'cost': 1.5}})
+    result = cache.get(key, dict(SPEC, pbar_idx=7))
+    assert result['stats'] == {'cost': 1.5}
+    # Ignored settings come from the spec of the run being served.
+    assert result['simulator_spec'] == dict(SPEC, pbar_idx=7)
+
+
+def test_side_output_runs_are_not_cacheable():
+    assert result_cache.is_cacheable(SPEC)
+    assert not result_cache.is_cacheable(dict(SPEC, result_path='r.parquet'))
+    assert not result_cache.is_cacheable(dict(SPEC, profile_path='r.prof'))
@@ -0,0 +1,74 @@
+import pickle
+import random
+
+import pytest
+
+from skyburst import utils
+from skyburst.job import Job
+from skyburst.job_queue import JobQueue
+from skyburst.snapshot import QueueSnapshots
+
+
+def _run(keyframe_interval, num_steps=200, seed=2024):
+    """Records a randomly changing queue, returns the snapshots and the queue Job IDs at each time."""
+    rng = random.Random(seed)
+    queue = JobQueue(utils.generate_sorting_function('sjf'))
+    snapshots = QueueSnapshots(queue, keyframe_interval=keyframe_interval)
+    expected = {}
+    next_idx = 0
+    for step in range(num_steps):
+        for _ in range(rng.randint(0, 3)):
+            if len(queue) and rng.random() < 0.5:
+                queue.remove(queue[rng.randrange(len(queue))])
+            else:
+                queue.append(
+                    Job(idx=next_idx,
+                        runtime=rng.randint(1, 5),
+                        resources={'GPUs': 1}))
+                next_idx += 1
+        t = float(step)
+        snapshots.record(t)
+        expected[t] = [job.idx for job in queue]
+    return snapshots, expected
+
+
+@pytest.mark.parametrize('keyframe_interval', [1, 3, 100])
+def test_deltas_rebuild_queue(keyframe_interval):
+    snapshots, expected = _run(keyframe_interval)
+    assert len(snapshots) == len(expected)
+    for t, job_ids in expected.items():
+        assert [job.idx for job in snapshots.queue_at(t)] == job_ids
+        assert [job.idx for job in snapshots[t]['new_queue']] == job_ids
+        # Between snapshots, the queue is the one of the last snapshot.
+        assert [job.idx for job in snapshots.queue_at(t + 0.5)] == job_ids
+    assert snapshots.queue_at(-1.0) == []
+
+
+def test_pickled_snapshots_rebuild_queue():
+    snapshots, expected = _run(keyframe_interval=7)
+    snapshots = pickle.loads(pickle.dumps(snapshots))
+    for t, job_ids in expected.items():
+        assert [job.idx for job in snapshots.queue_at(t)] == job_ids
+
+
+def test_last_snapshot_at_same_time_wins():
+    queue = JobQueue(utils.generate_sorting_function('fifo'))
+    snapshots = QueueSnapshots(queue, keyframe_interval=2)
+    job = Job(idx=0, resources={'GPUs': 1})
+    queue.append(job)
+    snapshots.record(0.0)
+    queue.remove(job)
+    snapshots.record(0.0)
+    assert snapshots[0.0]['new_queue'] == []
+    assert snapshots.queue_at(0.0) == []
+
+
+def test_snapshot_copies_jobs():
+    """Later changes to a queued job do not alter earlier snapshots."""
+    queue = JobQueue(utils.generate_sorting_function('fifo'))
+    snapshots = QueueSnapshots(queue)
+    job = Job(idx=0, deadline=1.0, resources={'GPUs': 1})
+    queue.append(job)
+    snapshots.record(0.0)
+    job.deadline = 2.0
+    assert snapshots.queue_at(0.0)[0].deadline == 1.0
@@ -2,6 +2,15 @@ import csv
 from dateutil import parser
 from multiprocessing import Pool
 import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Jobs that ran to completion (or to their time limit).
+FINISHED_STATES = ['COMPLETED', 'TIMEOUT']
+# Rows of the cluster log parsed at a time.
+DEFAULT_CHUNK_SIZE = 1 << 18
 
 
 class HeliosJobTrace:
@@ -72,6 +81,76 @@ def load_helios_traces(trace_dir: str):
                                submitted_time=parser.parse(row['submit_time']),
                                run_time=float(row['duration']) / 3600.0,
                                status=row['state']))
-        counter += 1
+            counter += 1
     jobs = sorted(jobs, key=lambda t: t._submitted_time)
     return jobs
+
+
+def job_columns(helios_jobs: List[HeliosJobTrace]) -> Dict[str, np.ndarray]:
+    """Converts completed Helios jobs into columns, ordered by submission time.
+
+    Returns arrival (hours since the first completed job), runtime (hours),
+    num_gpus, num_cpus and nodes columns. Only COMPLETED and TIMEOUT jobs
+    are kept.
+    """
+    jobs = [
+        j for j in helios_jobs
+        if j._run_time is not None and (j.status in FINISHED_STATES)
+    ]
+    jobs.sort(key=lambda j: j._submitted_time)
+    start_time = jobs[0]._submitted_time
+    return {
+        'arrival':
+        np.array([(j._submitted_time - start_time).total_seconds() / 3600.0
+                  for j in jobs]),
+        'runtime': np.array([j._run_time for j in jobs]),
+        'num_gpus': np.array([j.num_gpus for j in jobs], dtype=np.int64),
+        'num_cpus': np.array([j.num_cpus for j in jobs], dtype=np.int64),
+        'nodes': np.array([j._nodes for j in jobs], dtype=np.int64),
+    }
+
+
+def load_helios_job_columns(
+        trace_dir: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """Parses the Helios cluster log straight into the columns of `job_columns`.
+
+    The CSV is read `chunk_size` rows at a time. Submission times are
+    parsed per chunk, and unfinished jobs are filtered out before the next
+    chunk is read, so no per-job Python objects are built.
+    """
+    trace_dir = os.path.abspath(os.path.expanduser(trace_dir))
+    cluster_job_log_path = os.path.join(trace_dir, 'cluster_log.csv')
+    chunks = []
+    reader = pd.read_csv(cluster_job_log_path,
+                         usecols=[
+                             'gpu_num', 'cpu_num', 'node_num', 'state',
+                             'submit_time', 'duration'
+                         ],
+                         dtype={
+                             'gpu_num': np.int64,
+                             'cpu_num': np.int64,
+                             'node_num': np.int64,
+                             'duration': np.float64,
+                         },
+                         chunksize=chunk_size)
+    for chunk in reader:
+        chunk = chunk[chunk['state'].isin(FINISHED_STATES)]
+        chunks.append({
+            'submitted_time':
+            pd.to_datetime(chunk['submit_time']).to_numpy(),
+            'runtime': chunk['duration'].to_numpy() / 3600.0,
+            'num_gpus': chunk['gpu_num'].to_numpy(),
+            'num_cpus': chunk['cpu_num'].to_numpy(),
+            'nodes': chunk['node_num'].to_numpy(),
+        })
+    columns = {
+        name: np.concatenate([chunk[name] for chunk in chunks])
+        for name in chunks[0]
+    }
+    order = np.argsort(columns['submitted_time'], kind='stable')
+    columns = {name: column[order] for name, column in columns.items()}
+    submitted_time = columns.pop('submitted_time')
+    return dict(arrival=(submitted_time - submitted_time[0]) /
+                np.timedelta64(1, 's') / 3600.0,
+                **columns)
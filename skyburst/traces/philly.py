@@ -1,9 +1,18 @@
+import collections
 import json
-from multiprocessing import Pool
+import multiprocessing
 import os
+from typing import Dict, List, Optional, Union
+
+import numpy as np
 
 from skyburst.traces import philly_utils
 
+# Jobs per batch handed to a timestamp parsing worker.
+DEFAULT_BATCH_SIZE = 20000
+# Characters of the job log read at a time.
+DEFAULT_CHUNK_SIZE = 1 << 22
+
 
 class JobTrace:
     """Encapsulates a job."""
@@ -123,3 +132,175 @@ def load_philly_traces(trace_dir: str):
     ]
     jobs = sorted(jobs, key=lambda t: t._submitted_time)
     return jobs
+
+
+def _date_str(date_str):
+    """Returns None for missing dates (see `philly_utils.parse_date`)."""
+    if date_str is None or date_str == '' or date_str == 'None':
+        return None
+    return date_str
+
+
+def _gpu_count(attempt) -> int:
+    return sum([len(detail['gpus']) for detail in attempt['detail']])
+
+
+def _iter_json_array(f, chunk_size: int):
+    """Yields the elements of a JSON array read incrementally from `f`.
+
+    Only one chunk of the file (plus the element being decoded) is held in
+    memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size).lstrip()
+    if not buf.startswith('['):
+        raise ValueError('Expected a JSON array of jobs.')
+    pos = 1
+    eof = False
+    while True:
+        # Skip whitespace and commas between elements.
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        try:
+            if pos == len(buf):
+                raise json.JSONDecodeError('Need more data', buf, pos)
+            element, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield element
+
+
+def _parse_batch(batch) -> Dict[str, np.ndarray]:
+    """Parses the timestamps of a batch of jobs into columns (runs in a worker)."""
+    status, submitted_time, first_start, last_end, num_gpus = batch
+    submitted_time = np.array(submitted_time, dtype='datetime64[s]')
+    first_start = np.array(first_start, dtype='datetime64[s]')
+    last_end = np.array(last_end, dtype='datetime64[s]')
+    finished = ~np.isnat(first_start) & ~np.isnat(last_end)
+    seconds = (last_end - first_start)[finished].astype(np.int64)
+    days, seconds = np.divmod(seconds, 24 * 60 * 60)
+    # Same arithmetic as `philly_utils.timedelta_to_minutes`.
+    run_time = np.full(len(status), np.nan)
+    run_time[finished] = days * philly_utils.MINUTES_PER_DAY + seconds / 60.0
+    return {
+        'submitted_time': submitted_time,
+        'run_time': run_time,
+        'num_gpus': np.array(num_gpus, dtype=np.int64),
+        'status': np.array(status, dtype=object),
+    }
+
+
+def _batches(trace_path: str, batch_size: int, chunk_size: int):
+    """Streams the job log, yielding the fields needed per job in batches."""
+    batch = ([], [], [], [], [])
+    with open(trace_path, 'r') as f:
+        for job in _iter_json_array(f, chunk_size):
+            attempts = job['attempts']
+            batch[0].append(job['status'])
+            batch[1].append(_date_str(job['submitted_time']))
+            if attempts:
+                batch[2].append(_date_str(attempts[0]['start_time']))
+                batch[3].append(_date_str(attempts[-1]['end_time']))
+                batch[4].append(_gpu_count(attempts[-1]))
+            else:
+                batch[2].append(None)
+                batch[3].append(None)
+                batch[4].append(0)
+            if len(batch[0]) == batch_size:
+                yield batch
+                batch = ([], [], [], [], [])
+    if batch[0]:
+        yield batch
+
+
+def load_philly_trace_columns(trace_dir: str,
+                              num_procs: Optional[int] = None,
+                              batch_size: int = DEFAULT_BATCH_SIZE,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE
+                              ) -> Dict[str, np.ndarray]:
+    """Parses the Philly job log straight into columns, ordered by submission time.
+
+    Unlike `load_philly_traces`, the JSON is decoded incrementally and no
+    `JobTrace` objects are built; batches of `batch_size` jobs have their
+    timestamps parsed by a pool of `num_procs` processes (default: all
+    CPUs). At most two batches per process are in flight, so memory stays
+    bounded by the columns themselves.
+
+    Returns submitted_time (datetime64), run_time (minutes, NaN if the job
+    has not finished), num_gpus (GPUs of the last attempt, 0 if the job has
+    no attempts) and status columns.
+    """
+    trace_dir = os.path.abspath(os.path.expanduser(trace_dir))
+    cluster_job_log_path = os.path.join(trace_dir, 'cluster_job_log')
+    num_procs = os.cpu_count() if num_procs is None else num_procs
+    batches = _batches(cluster_job_log_path, batch_size, chunk_size)
+    # Pool workers (e.g. of a sweep) are daemonic and cannot start a pool.
+    if num_procs <= 1 or multiprocessing.current_process().daemon:
+        parsed = [_parse_batch(batch) for batch in batches]
+    else:
+        parsed = []
+        pending = collections.deque()
+        with multiprocessing.Pool(processes=num_procs) as pool:
+            for batch in batches:
+                pending.append(pool.apply_async(_parse_batch, (batch, )))
+                if len(pending) >= 2 * num_procs:
+                    parsed.append(pending.popleft().get())
+            parsed.extend(result.get() for result in pending)
+    columns = {
+        name: np.concatenate([p[name] for p in parsed])
+        for name in ['submitted_time', 'run_time', 'num_gpus', 'status']
+    }
+    order = np.argsort(columns['submitted_time'], kind='stable')
+    return {name: column[order] for name, column in columns.items()}
+
+
+def _trace_columns(philly_jobs: List[JobTrace]) -> Dict[str, np.ndarray]:
+    """Converts parsed `JobTrace`s into the columns of `load_philly_trace_columns`."""
+    return {
+        'submitted_time':
+        np.array([j._submitted_time for j in philly_jobs],
+                 dtype='datetime64[us]'),
+        'run_time':
+        np.array([np.nan if j._run_time is None else j._run_time
+                  for j in philly_jobs]),
+        'num_gpus':
+        np.array([
+            _gpu_count(j.attempts[-1]) if j.attempts else 0
+            for j in philly_jobs
+        ], dtype=np.int64),
+        'status':
+        np.array([j.status for j in philly_jobs], dtype=object),
+    }
+
+
+def job_columns(
+    philly_jobs: Union[List[JobTrace], Dict[str, np.ndarray]]
+) -> Dict[str, np.ndarray]:
+    """Converts finished Philly jobs into columns, ordered by submission time.
+
+    Takes `JobTrace`s or the columns of `load_philly_trace_columns`. Returns
+    arrival (hours since the first finished job), runtime (hours) and
+    num_gpus (GPUs of the last attempt) columns. Jobs that have not
+    finished or that failed/were killed are dropped.
+    """
+    if not isinstance(philly_jobs, dict):
+        philly_jobs = _trace_columns(philly_jobs)
+    finished = ~np.isnan(philly_jobs['run_time']) & \
+        (philly_jobs['status'] == 'Pass')
+    submitted_time = philly_jobs['submitted_time'][finished]
+    order = np.argsort(submitted_time, kind='stable')
+    submitted_time = submitted_time[order]
+    return {
+        'arrival': (submitted_time - submitted_time[0]) /
+        np.timedelta64(1, 's') / 3600.0,
+        'runtime': philly_jobs['run_time'][finished][order] / 60.0,
+        'num_gpus': philly_jobs['num_gpus'][finished][order],
+    }
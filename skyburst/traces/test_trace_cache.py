@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from skyburst.traces import trace_cache
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    root = tmp_path / 'cache'
+    monkeypatch.setenv(trace_cache.CACHE_DIR_ENV, str(root))
+    return root
+
+
+class CountingParser(object):
+    """Stands in for a trace parser, derives columns from the file contents."""
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        with open(self.path, 'rb') as f:
+            data = np.frombuffer(f.read(), dtype=np.uint8)
+        return {'arrival': data.astype(np.float64), 'num_gpus': data % 8}
+
+
+def _load(parser, **kwargs):
+    return trace_cache.load_cached_columns('test', str(parser.path), parser,
+                                           **kwargs)
+
+
+def _assert_columns_equal(a, b):
+    assert list(a) == list(b)
+    for name in a:
+        np.testing.assert_array_equal(a[name], b[name])
+        assert a[name].dtype == b[name].dtype
+
+
+def test_unchanged_source_hits_cache(tmp_path, cache_root):
+    source = tmp_path / 'trace.log'
+    source.write_bytes(b'abcdef')
+    parser = CountingParser(source)
+    parsed = _load(parser)
+    cached = _load(parser)
+    assert parser.calls == 1
+    _assert_columns_equal(parsed, cached)
+    assert isinstance(cached['arrival'], np.memmap)
+    assert not isinstance(_load(parser, mmap=False)['arrival'], np.memmap)
+    assert parser.calls == 1
+
+
+def test_touched_source_hits_cache(tmp_path, cache_root):
+    """A new mtime rehashes the file, but identical contents reuse the entry."""
+    source = tmp_path / 'trace.log'
+    source.write_bytes(b'abcdef')
+    parser = CountingParser(source)
+    _load(parser)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _load(parser)
+    assert parser.calls == 1
+
+
+@pytest.mark.parametrize('new_contents', [b'abcdefgh', b'abcdeg'])
+def test_changed_source_is_parsed_again(tmp_path, cache_root, new_contents):
+    source = tmp_path / 'trace.log'
+    source.write_bytes(b'abcdef')
+    parser = CountingParser(source)
+    _load(parser)
+    stat = os.stat(source)
+    source.write_bytes(new_contents)
+    # Same-size edits are only noticed through the mtime, make sure it moves.
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    columns = _load(parser)
+    assert parser.calls == 2
+    _assert_columns_equal(columns, CountingParser(source)())
+    _assert_columns_equal(_load(parser), columns)
+    assert parser.calls == 2
+
+
+def test_source_hash_is_remembered(tmp_path, cache_root):
+    source = tmp_path / 'trace.log'
+    source.write_bytes(b'abcdef')
+    sha256 = trace_cache.source_hash(str(source))
+    index = trace_cache._read_index(str(cache_root))
+    assert index[str(source)]['sha256'] == sha256
+    assert trace_cache.source_hash(str(source), str(cache_root)) == sha256
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# Bumped whenever the layout or processing of cached columns changes.
+CACHE_VERSION = 1
+
+# Overrides the cache directory (default: `~/.cache/skyburst/traces`).
+CACHE_DIR_ENV = 'SKYBURST_TRACE_CACHE'
+DEFAULT_CACHE_DIR = '~/.cache/skyburst/traces'
+
+# Maps source paths to their size, mtime and content hash.
+INDEX_FILE = 'index.json'
+
+HASH_CHUNK_SIZE = 1 << 22
+
+
+def cache_dir() -> str:
+    return os.path.abspath(
+        os.path.expanduser(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)))
+
+
+def _file_hash(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _read_index(root: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(root, INDEX_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(root: str, index: Dict[str, Dict]):
+    index_path = os.path.join(root, INDEX_FILE)
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+def source_hash(path: str, root: Optional[str] = None) -> str:
+    """Returns the SHA-256 of the file at `path`.
+
+    Hashing a multi-hundred-MB trace takes a while, so hashes are remembered
+    in the cache index and only recomputed when the file's size or mtime
+    changes.
+    """
+    root = cache_dir() if root is None else root
+    path = os.path.abspath(os.path.expanduser(path))
+    stat = os.stat(path)
+    index = _read_index(root)
+    entry = index.get(path)
+    if entry is not None and entry['size'] == stat.st_size and \
+        entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+    sha256 = _file_hash(path)
+    os.makedirs(root, exist_ok=True)
+    # Re-read, another process may have indexed other files meanwhile.
+    index = _read_index(root)
+    index[path] = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256,
+    }
+    _write_index(root, index)
+    return sha256
+
+
+def _load_columns(entry_dir: str, mmap: bool) -> Dict[str, np.ndarray]:
+    with open(os.path.join(entry_dir, 'columns.json'), 'r') as f:
+        names = json.load(f)
+    mmap_mode = 'r' if mmap else None
+    return {
+        name: np.load(os.path.join(entry_dir, f'{name}.npy'),
+                      mmap_mode=mmap_mode)
+        for name in names
+    }
+
+
+def _save_columns(entry_dir: str, columns: Dict[str, np.ndarray]):
+    """Writes one `.npy` file per column, then renames the directory into place."""
+    tmp_dir = f'{entry_dir}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, column in columns.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), np.asarray(column))
+    with open(os.path.join(tmp_dir, 'columns.json'), 'w') as f:
+        json.dump(list(columns), f)
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process cached the same trace first.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_cached_columns(name: str,
+                        source_path: str,
+                        parse_fn: Callable[[], Dict[str, np.ndarray]],
+                        mmap: bool = True) -> Dict[str, np.ndarray]:
+    """Returns the processed job columns of a trace file, parsing it only once.
+
+    The columns returned by `parse_fn` are stored as `.npy` files under
+    `<cache dir>/<name>-<content hash>`, so editing or replacing the source
+    file invalidates its cache entry. Cached columns are memory-mapped
+    read-only unless `mmap` is False.
+    """
+    root = cache_dir()
+    sha256 = source_hash(source_path, root)
+    entry_dir = os.path.join(root, f'{name}-v{CACHE_VERSION}-{sha256}')
+    if os.path.isdir(entry_dir):
+        return _load_columns(entry_dir, mmap)
+    columns = parse_fn()
+    _save_columns(entry_dir, columns)
+    return columns
@@ -1,4 +1,5 @@
 import itertools
+import os
 import pickle
 from typing import Any, List
 
@@ -105,13 +106,57 @@ def is_subset(list1: List[Any], list2: List[Any]):
     return indexes
 
 
-def _load_logs(file_path: str):
-    file = open(file_path, 'rb')
-    return pickle.load(file)
+def lowest_set_bits(mask: int, count: int):
+    """Returns the indexes of the `count` lowest set bits of `mask`."""
+    indexes = []
+    while len(indexes) < count:
+        low_bit = mask & -mask
+        indexes.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return indexes
+
+
+def set_bits(mask: int):
+    """Returns the indexes of all set bits of `mask`, in ascending order."""
+    indexes = []
+    while mask:
+        low_bit = mask & -mask
+        indexes.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return indexes
+
+
+def bits_to_mask(indexes: List[int]):
+    """Returns the bitmask with the bits at `indexes` set."""
+    mask = 0
+    for idx in indexes:
+        mask |= 1 << idx
+    return mask
+
+
+def load_logs(file_path: str):
+    with open(file_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_logs(file_path: str, obj: Any):
+    """Pickles `obj` to `file_path`, creating its directory.
+
+    The pickle is written to a temporary file that is then renamed over
+    `file_path`, so readers never see a partially written file.
+    """
+    absolute_file_path = os.path.abspath(file_path)
+    os.makedirs(os.path.dirname(absolute_file_path), exist_ok=True)
+    tmp_path = f'{absolute_file_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, absolute_file_path)
 
 
 def load_logs_as_dataframe(file_path: str):
-    simulator_results = _load_logs(file_path)
+    simulator_results = load_logs(file_path)
     for r in simulator_results:
         if 'snapshot' in r:
             r['snapshot'] = [r['snapshot']]
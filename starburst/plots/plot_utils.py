@@ -7,6 +7,8 @@ import heapq
 import numpy as np
 from tabulate import tabulate
 
+from skyburst import stats
+
 def read_yaml(log_path):
 	with open(log_path, "r") as f:
 		loaded_data = yaml.safe_load(f)
@@ -256,91 +258,24 @@ def parse_sweep(event_number=0, log_path='../sweep_logs/'):
     runs_df = runs_df.transpose()
     return runs_df.loc[0]
 
-def compute_stats(jobs_df, warmup_jobs=5):
+def compute_stats(jobs_df, warmup_jobs=5, cluster_size=4, gpus_per_node=8):
     # Computing Simulator stats, such as avg. waiting, avg. JCT, cloud cost, utilization.
-    total_waiting_time = 0.0
-    total_running_time = 0.0
-    num_jobs = 0
-    total_cloud_cost = 0
-    sum_local_space = 0.0
-    sum_cloud_space = 0.0
-
-    start_time = jobs_df['arrival'][warmup_jobs]
-    end_time = jobs_df['arrival'][len(jobs_df['arrival']) - warmup_jobs - 1]
-    total_jobs = len(jobs_df['arrival'])
-
-    jct_list = []
-    wait_list = []
-
-    for idx in range(len(jobs_df['arrival'])):
-        job_idx = jobs_df['idx'][idx]
-        job_arrival = jobs_df['arrival'][idx]
-        job_runtime = jobs_df['runtime'][idx]
-        job_start = jobs_df['start'][idx]
-        job_state = jobs_df['state'][idx]
-        job_gpus = jobs_df['num_gpus'][idx]
-        job_cost = jobs_df['num_gpus'][idx] * jobs_df['runtime'][idx]
-
-        inter_start = max(job_start, start_time)
-        inter_end = min(job_start + job_runtime, end_time)
-        # Cut off beginning and ending of simulator to reach steady state. Calculate the "bleeding".
-        if job_idx < warmup_jobs or job_idx > total_jobs - warmup_jobs:
-            if job_state == 'LOCAL':
-                if inter_end >= inter_start:
-                    sum_local_space += job_gpus * (inter_end - inter_start)
-            elif job_state == 'TIMEOUT-CLOUD':
-                if inter_end >= inter_start:
-                    sum_cloud_space += job_gpus * (inter_end - inter_start)
-            continue
-        # Moved to cloud
-        if job_state == 'TIMEOUT-CLOUD':
-            total_waiting_time += job_start - job_arrival
-            if inter_end >= inter_start:
-                sum_cloud_space += job_gpus * (inter_end - inter_start)
-            total_cloud_cost += job_cost
-        elif job_state == 'LOCAL':
-            total_waiting_time += job_start - job_arrival
-            if inter_end >= inter_start:
-                sum_local_space += job_gpus * (inter_end - inter_start)
-
-        jct_list.append(job_runtime + job_start - job_arrival)
-        wait_list.append(job_start - job_arrival)
-        total_running_time += job_runtime
-        num_jobs += 1
-
-    stats_dict = {}
-
-    stats_dict['total_cloud_cost'] = total_cloud_cost
-    stats_dict['avg_cloud_cost'] = total_cloud_cost / (end_time -
-                                                                    start_time)
-    stats_dict['avg_waiting'] = total_waiting_time / num_jobs
-    stats_dict['avg_jct'] = (total_waiting_time +
-                                        total_running_time) / num_jobs
-    stats_dict['90_jct'] = np.percentile(jct_list,
-                                                    90,
-                                                    method='nearest')
-    stats_dict['99_jct'] = np.percentile(jct_list,
-                                                    99,
-                                                    method='nearest')
-
-    stats_dict['avg_wait'] = np.mean(wait_list)
-    stats_dict['90_wait'] = np.percentile(wait_list,
-                                                    90,
-                                                    method='nearest')
-    stats_dict['99_wait'] = min(
-        24, np.percentile(wait_list, 99, method='nearest'))
-
-    stats_dict['cluster_utilization'] = sum_local_space / (
-        4 * 8 *
-        (end_time - start_time))
-    stats_dict['system_utilization'] = (
-        sum_local_space + sum_cloud_space) / (4 * 8 * (end_time - start_time))
+    jobs = {
+        col: np.asarray(jobs_df[col])
+        for col in ['idx', 'arrival', 'start', 'runtime', 'num_gpus', 'state']
+    }
+    # Job cost is measured in GPU-hours.
+    jobs['cost'] = jobs['num_gpus'] * jobs['runtime']
+    stats_dict = stats.compute_stats(jobs,
+                                     cluster_size=cluster_size,
+                                     gpus_per_node=gpus_per_node,
+                                     warmup_jobs=warmup_jobs)
 
     headers = ['# Cluster Nodes',
         'Total Cloud Cost', 'Avg. Cloud Cost', 'Avg. Waiting', 'Avg. JCT',
         '90th JCT', '99th JCT', 'Cluster Utilization', 'System Utilization'
     ]
-    data = [(4, \
+    data = [(cluster_size, \
         stats_dict['total_cloud_cost'], stats_dict['avg_cloud_cost'], \
         stats_dict['avg_waiting'], stats_dict['avg_jct'], stats_dict['90_jct'], stats_dict['99_jct'], stats_dict['cluster_utilization'], stats_dict['system_utilization'])]
     print(tabulate(data, headers=headers))